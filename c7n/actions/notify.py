@@ -14,9 +14,109 @@ from c7n.resolver import ValuesFrom
 from c7n.version import version
 
 
+class MessagePacker:
+    """Packs resources into compressed messages within a byte budget.
+
+    Messages are a message envelope with a list of resources, zlib
+    compressed and base64 encoded as with :py:meth:`BaseNotify.pack`.
+    Resources are compressed incrementally as they're added, with the
+    final message size only computed exactly once a conservative bound
+    on it exceeds the budget.
+    """
+
+    # deflate holds back at most the input of the last call and its
+    # lookahead, plus block framing.
+    lookahead = 262
+    margin = 64
+
+    def __init__(self, envelope, max_size, batch_size=None):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        prefix = utils.dumps(envelope).rstrip()[:-1].rstrip()
+        self.prefix = (prefix + (envelope and ', ' or '') + '"resources": [').encode('utf8')
+        self.suffix = b']}'
+
+    def encoded_size(self, size):
+        return (size + 2) // 3 * 4
+
+    def pack(self, resources):
+        """Yield tuples of (resources, packed message).
+
+        The packed message is None for a resource which by itself
+        exceeds the size budget.
+        """
+        batch = []
+        for r in resources:
+            data = utils.dumps(r).encode('utf8')
+            if batch and (
+                    len(batch) == self.batch_size or
+                    not self.fits(b',' + data)):
+                yield from self.finish(batch)
+                batch = []
+            if not batch:
+                self.start()
+            else:
+                data = b',' + data
+            self.add(data)
+            batch.append(r)
+        if batch:
+            yield from self.finish(batch)
+
+    def start(self):
+        self.compressor = zlib.compressobj()
+        self.output = []
+        self.output_size = 0
+        self.pending = 0
+        # exact size of the message at the last probe, and input since.
+        self.probe_size = None
+        self.probe_pending = 0
+        self.add(self.prefix)
+
+    def add(self, data):
+        out = self.compressor.compress(data)
+        self.pending += len(data)
+        self.probe_pending += len(data)
+        if out:
+            self.output.append(out)
+            self.output_size += len(out)
+            self.pending = len(data) + self.lookahead
+
+    def get_bound(self, size, pending):
+        return size + pending + pending // 1000 + self.margin
+
+    def fits(self, data):
+        bound = self.get_bound(
+            self.output_size + len(self.suffix), self.pending + len(data))
+        if self.probe_size is not None:
+            bound = min(bound, self.get_bound(
+                self.probe_size, self.probe_pending + len(data)))
+        if self.encoded_size(bound) <= self.max_size:
+            return True
+        probe = self.compressor.copy()
+        size = (self.output_size + len(probe.compress(data)) +
+                len(probe.compress(self.suffix)) + len(probe.flush()))
+        if self.encoded_size(size) > self.max_size:
+            return False
+        self.probe_size, self.probe_pending = size, -len(data)
+        return True
+
+    def finish(self, batch):
+        self.output.append(self.compressor.compress(self.suffix))
+        self.output.append(self.compressor.flush())
+        packed = base64.b64encode(b''.join(self.output)).decode('ascii')
+        if len(packed) <= self.max_size:
+            yield batch, packed
+        elif len(batch) > 1:
+            yield from self.pack(batch[:len(batch) // 2])
+            yield from self.pack(batch[len(batch) // 2:])
+        else:
+            yield batch, None
+
+
 class BaseNotify(EventAction):
 
     batch_size = 250
+    max_message_size = 256 * 1024
 
     def expand_variables(self, message):
         """expand any variables in the action to_from/cc_from fields.
@@ -42,6 +142,20 @@ class BaseNotify(EventAction):
         b64encoded = base64.b64encode(compressed)
         return b64encoded.decode('ascii')
 
+    def pack_resources(self, message, resources):
+        """Pack resources into messages of up to batch_size resources
+        within the transport's message size limit.
+
+        Returns an iterator of (resources, packed message) tuples.
+        """
+        envelope = {k: v for k, v in message.items() if k != 'resources'}
+        return MessagePacker(
+            envelope, self.get_max_message_size(), self.batch_size).pack(resources)
+
+    def get_max_message_size(self):
+        return self.data.get('transport', {}).get(
+            'max_message_size', self.max_message_size)
+
 
 class Notify(BaseNotify):
     """
@@ -129,13 +243,17 @@ class Notify(BaseNotify):
                      'required': ['type', 'queue'],
                      'properties': {
                          'queue': {'type': 'string'},
-                         'type': {'enum': ['sqs']}}},
+                         'type': {'enum': ['sqs']},
+                         'max_message_size': {
+                             'type': 'integer', 'minimum': 1024, 'maximum': 262144}}},
                     {'type': 'object',
                      'required': ['type', 'topic'],
                      'properties': {
                          'topic': {'type': 'string'},
                          'type': {'enum': ['sns']},
                          'attributes': {'type': 'object'},
+                         'max_message_size': {
+                             'type': 'integer', 'minimum': 1024, 'maximum': 262144},
                      }}]
             },
             'assume_role': {'type': 'boolean'}
@@ -175,13 +293,47 @@ class Notify(BaseNotify):
             'policy': self.manager.data}
         message['action'] = self.expand_variables(message)
 
-        for batch in utils.chunks(resources, self.batch_size):
-            message['resources'] = self.prepare_resources(batch)
-            receipt = self.send_data_message(message)
+        packed = self.pack_resources(message, self.prepare_resources(resources))
+        if self.data['transport']['type'] == 'sqs':
+            sent = self.send_sqs_batches(message, self.check_packed(packed))
+        else:
+            sent = ((batch, self.send_sns(message, body))
+                    for batch, body in self.check_packed(packed))
+        for batch, receipt in sent:
             self.log.info("sent message:%s policy:%s template:%s count:%s" % (
                 receipt, self.manager.data['name'],
                 self.data.get('template', 'default'), len(batch)))
 
+    def check_packed(self, packed):
+        for batch, body in packed:
+            if body is None:
+                self.log.error(
+                    "policy:%s notify resource exceeds max message size %d, skipping",
+                    self.manager.data['name'], self.get_max_message_size())
+                continue
+            yield batch, body
+
+    def get_max_message_size(self):
+        # message attributes count towards the transport's size limit.
+        size = super().get_max_message_size()
+        for k, v in self.get_message_attributes().items():
+            size -= len(k) + len(v['DataType']) + len(v['StringValue'].encode('utf8'))
+        return size
+
+    def get_message_attributes(self):
+        attrs = {
+            'mtype': {
+                'DataType': 'String',
+                'StringValue': self.C7N_DATA_MESSAGE,
+            },
+        }
+        if self.data['transport']['type'] != 'sns':
+            return attrs
+        for k, v in self.data['transport'].get('attributes', {}).items():
+            if k != 'mtype':
+                attrs[k] = {'DataType': 'String', 'StringValue': v}
+        return attrs
+
     def prepare_resources(self, resources):
         """Resources preparation for transport.
 
@@ -224,9 +376,8 @@ class Notify(BaseNotify):
         elif self.data['transport']['type'] == 'sns':
             return self.send_sns(message)
 
-    def send_sns(self, message):
+    def send_sns(self, message, body=None):
         topic = self.data['transport']['topic'].format(**message)
-        user_attributes = self.data['transport'].get('attributes')
         if topic.startswith('arn:'):
             region = region = topic.split(':', 5)[3]
             topic_arn = topic
@@ -238,23 +389,13 @@ class Notify(BaseNotify):
                 region=message['region'])
         client = self.manager.session_factory(
             region=region, assume=self.assume_role).client('sns')
-        attrs = {
-            'mtype': {
-                'DataType': 'String',
-                'StringValue': self.C7N_DATA_MESSAGE,
-            },
-        }
-        if user_attributes:
-            for k, v in user_attributes.items():
-                if k != 'mtype':
-                    attrs[k] = {'DataType': 'String', 'StringValue': v}
         client.publish(
             TopicArn=topic_arn,
-            Message=self.pack(message),
-            MessageAttributes=attrs
+            Message=body or self.pack(message),
+            MessageAttributes=self.get_message_attributes()
         )
 
-    def send_sqs(self, message):
+    def get_sqs_queue(self, message):
         queue = self.data['transport']['queue'].format(**message)
         if queue.startswith('https://queue.amazonaws.com'):
             region = 'us-east-1'
@@ -278,20 +419,56 @@ class Notify(BaseNotify):
             queue_name = queue
             queue_url = "https://sqs.%s.amazonaws.com/%s/%s" % (
                 region, owner_id, queue_name)
+        return region, queue_url
+
+    def send_sqs(self, message, body=None):
+        region, queue_url = self.get_sqs_queue(message)
         client = self.manager.session_factory(
             region=region, assume=self.assume_role).client('sqs')
-        attrs = {
-            'mtype': {
-                'DataType': 'String',
-                'StringValue': self.C7N_DATA_MESSAGE,
-            },
-        }
         result = client.send_message(
             QueueUrl=queue_url,
-            MessageBody=self.pack(message),
-            MessageAttributes=attrs)
+            MessageBody=body or self.pack(message),
+            MessageAttributes=self.get_message_attributes())
         return result['MessageId']
 
+    def send_sqs_batches(self, message, packed):
+        """Send packed messages in batches of up to 10 messages and 256kb.
+
+        Yields tuples of (resources, message id).
+        """
+        region, queue_url = self.get_sqs_queue(message)
+        client = self.manager.session_factory(
+            region=region, assume=self.assume_role).client('sqs')
+        attrs = self.get_message_attributes()
+        max_size = super().get_max_message_size()
+        attrs_size = max_size - self.get_max_message_size()
+        batch, size = [], 0
+        for resources, body in packed:
+            if batch and (len(batch) == 10 or size + len(body) + attrs_size > max_size):
+                yield from self.send_sqs_batch(client, queue_url, attrs, batch)
+                batch, size = [], 0
+            batch.append((resources, body))
+            size += len(body) + attrs_size
+        if batch:
+            yield from self.send_sqs_batch(client, queue_url, attrs, batch)
+
+    def send_sqs_batch(self, client, queue_url, attrs, batch):
+        if len(batch) == 1:
+            result = client.send_message(
+                QueueUrl=queue_url, MessageBody=batch[0][1], MessageAttributes=attrs)
+            yield batch[0][0], result['MessageId']
+            return
+        result = client.send_message_batch(
+            QueueUrl=queue_url,
+            Entries=[{'Id': str(idx), 'MessageBody': body, 'MessageAttributes': attrs}
+                     for idx, (resources, body) in enumerate(batch)])
+        for entry in result.get('Successful', ()):
+            yield batch[int(entry['Id'])][0], entry['MessageId']
+        # retry failed entries individually, raising on persistent errors.
+        for entry in result.get('Failed', ()):
+            resources, body = batch[int(entry['Id'])]
+            yield from self.send_sqs_batch(client, queue_url, attrs, [(resources, body)])
+
     @classmethod
     def register_resource(cls, registry, resource_class):
         if 'notify' in resource_class.action_registry:
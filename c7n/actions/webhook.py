@@ -6,6 +6,8 @@ try:
 except ImportError:
     certifi = None
 
+import time
+
 import jmespath
 
 import urllib3
@@ -32,8 +34,19 @@ class Webhook(EventAction):
                  query-params:
                     resource_name: resource.name
                     policy_name: policy.name
+
+    Requests are sent with up to ``concurrency`` (default 1) in flight over
+    pooled keep-alive connections, and retried with backoff on 429 and 5xx
+    responses. POST, PUT and PATCH requests are only retried on 429 and 503
+    responses, where the receiver declined to process them.
     """
 
+    max_retries = 3
+    retry_backoff = 0.5
+    retry_statuses = (429, 500, 502, 503, 504)
+    rejected_statuses = (429, 503)
+    idempotent_methods = ('GET', 'DELETE')
+
     schema_alias = True
     schema = utils.type_schema(
         'webhook',
@@ -43,6 +56,7 @@ class Webhook(EventAction):
             'body': {'type': 'string'},
             'batch': {'type': 'boolean'},
             'batch-size': {'type': 'number'},
+            'concurrency': {'type': 'integer', 'minimum': 1},
             'method': {'type': 'string', 'enum': ['PUT', 'POST', 'GET', 'PATCH', 'DELETE']},
             'query-params': {
                 "type": "object",
@@ -71,10 +85,11 @@ class Webhook(EventAction):
         self.query_params = self.data.get('query-params', {})
         self.headers = self.data.get('headers', {})
         self.method = self.data.get('method', 'POST')
+        self.concurrency = self.data.get('concurrency', 1)
         self.lookup_data = None
 
     def process(self, resources, event=None):
-        self.lookup_data = {
+        self.lookup_data = lookup_data = {
             'account_id': self.manager.config.account_id,
             'region': self.manager.config.region,
             'execution_id': self.manager.ctx.execution_id,
@@ -85,16 +100,28 @@ class Webhook(EventAction):
 
         self.http = self._build_http_manager()
 
+        # each request gets its own payload, so requests can be sent concurrently.
         if self.batch:
-            for chunk in utils.chunks(resources, self.batch_size):
-                resource_data = self.lookup_data
-                resource_data['resources'] = chunk
-                self._process_call(resource_data)
+            payloads = [dict(lookup_data, resources=chunk)
+                        for chunk in utils.chunks(resources, self.batch_size)]
+        else:
+            payloads = [dict(lookup_data, resource=r) for r in resources]
+
+        if self.concurrency > 1 and len(payloads) > 1:
+            with self.executor_factory(max_workers=self.concurrency) as w:
+                latencies = list(w.map(self._process_call, payloads))
         else:
-            for r in resources:
-                resource_data = self.lookup_data
-                resource_data['resource'] = r
-                self._process_call(resource_data)
+            latencies = list(map(self._process_call, payloads))
+        self._log_latency(latencies)
+
+    def _log_latency(self, latencies):
+        timings = sorted(t for t in latencies if t is not None)
+        if not timings:
+            return
+        self.log.info(
+            "%s %d requests to %s errors:%d latency p50:%0.3fs p95:%0.3fs max:%0.3fs",
+            self.method, len(latencies), self.url, len(latencies) - len(timings),
+            timings[len(timings) // 2], timings[int(len(timings) * 0.95)], timings[-1])
 
     def _process_call(self, resource):
         prepared_url = self._build_url(resource)
@@ -104,22 +131,49 @@ class Webhook(EventAction):
         if prepared_body:
             prepared_headers['Content-Type'] = 'application/json'
 
+        t = time.time()
         try:
             res = self.http.request(
                 method=self.method,
                 url=prepared_url,
                 body=prepared_body,
-                headers=prepared_headers)
-
-            self.log.info("%s got response %s with URL %s" %
-                          (self.method, res.status, prepared_url))
+                headers=prepared_headers,
+                retries=self._build_retry())
         except urllib3.exceptions.HTTPError as e:
-            self.log.error("Error calling %s. Code: %s" % (prepared_url, e.reason))
+            self.log.error("Error calling %s. Code: %s" % (
+                prepared_url, getattr(e, 'reason', e)))
+            return None
+
+        elapsed = time.time() - t
+        self.log.info("%s got response %s with URL %s in %0.3fs" %
+                      (self.method, res.status, prepared_url, elapsed))
+        return elapsed
+
+    def _build_retry(self):
+        params = {
+            'total': self.max_retries,
+            'backoff_factor': self.retry_backoff,
+            'status_forcelist': self.retry_statuses,
+            'raise_on_status': False}
+        if self.method not in self.idempotent_methods:
+            # the receiver may have acted on a request that failed or timed
+            # out, only retry ones it declined.
+            params['status_forcelist'] = self.rejected_statuses
+            params['read'] = 0
+        # retry regardless of verb, the status list is chosen per verb above.
+        try:
+            return urllib3.Retry(allowed_methods=None, **params)
+        except TypeError:
+            # urllib3 < 1.26
+            return urllib3.Retry(method_whitelist=None, **params)
 
     def _build_http_manager(self):
         pool_kwargs = {
             'cert_reqs': 'CERT_REQUIRED',
-            'ca_certs': certifi and certifi.where() or None
+            'ca_certs': certifi and certifi.where() or None,
+            # keep a connection alive per in flight request to each host.
+            'maxsize': self.concurrency,
+            'block': True,
         }
 
         proxy_url = utils.get_proxy_url(self.url)
@@ -4,10 +4,14 @@
 multiple policies on the same resource type.
 """
 import pickle
+import sqlite3
+import threading
+from contextlib import contextmanager
 
 import os
 import logging
 import time
+from datetime import datetime, timedelta
 
 log = logging.getLogger('custodian.cache')
 
@@ -32,7 +36,7 @@ def factory(config):
             CACHE_NOTIFY = True
         return InMemoryCache()
 
-    return FileCacheManager(config)
+    return SqlKvCache(config)
 
 
 class NullCache:
@@ -49,6 +53,9 @@ class NullCache:
     def save(self, key, data):
         pass
 
+    def fill_lock(self, key):
+        return null_lock()
+
     def size(self):
         return 0
 
@@ -70,6 +77,9 @@ class InMemoryCache:
     def save(self, key, data):
         self.data[pickle.dumps(key)] = data
 
+    def fill_lock(self, key):
+        return null_lock()
+
     def size(self):
         return sum(map(len, self.data.values()))
 
@@ -121,5 +131,211 @@ class FileCacheManager:
                     log.warning("Could not create directory: %s err: %s" % (
                         directory, e))
 
+    def fill_lock(self, key):
+        return null_lock()
+
     def size(self):
         return os.path.exists(self.cache_path) and os.path.getsize(self.cache_path) or 0
+
+
+@contextmanager
+def null_lock():
+    yield
+
+
+class SqlKvCache:
+    """Resource cache with one row per key stored in a sqlite database.
+
+    Entries expire individually based on their own creation time, saves
+    only write the entry being updated, and reads only deserialize the
+    requested entry, so cost is independent of the number of cached keys.
+
+    The database may be shared by concurrent processes (ie. c7n-org
+    workers), :meth:`fill_lock` provides a lease per key so only one
+    of them enumerates a given resource query while the others wait
+    for the result. Entries and leases are scoped to a namespace of the
+    configured account and region, so workers sharing the database
+    never see each other's entries regardless of how keys are built.
+    """
+
+    # How long a fill lease is honored before it's considered abandoned.
+    lease_period = 600
+    # How often waiters check whether a lease has been released.
+    poll_interval = 0.5
+
+    create_table = """
+    create table if not exists c7n_cache (
+        namespace text,
+        key blob,
+        value blob,
+        create_date timestamp,
+        primary key (namespace, key)
+    )
+    """
+
+    create_lock_table = """
+    create table if not exists c7n_cache_lock (
+        namespace text,
+        key blob,
+        owner text,
+        expire_date timestamp,
+        primary key (namespace, key)
+    )
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.cache_period = config.cache_period
+        self.cache_path = os.path.abspath(
+            os.path.expanduser(
+                os.path.expandvars(
+                    config.cache)))
+        self.conn = None
+        self.conn_lock = threading.RLock()
+        self.owner = "%s:%s" % (os.getpid(), id(self))
+        self.namespace = "%s:%s" % (
+            getattr(config, 'account_id', None) or '',
+            getattr(config, 'region', None) or '')
+
+    def init(self):
+        if os.path.exists(self.cache_path):
+            # migrate away from the monolithic pickle file format, only
+            # removing files that are recognizably pickle, an empty file
+            # may be a database another process has just created.
+            with open(self.cache_path, 'rb') as fh:
+                header = fh.read(1)
+            if header == b'\x80':
+                log.debug("Removing legacy cache file %s" % self.cache_path)
+                os.remove(self.cache_path)
+        else:
+            directory = os.path.dirname(self.cache_path)
+            if not os.path.exists(directory):
+                log.info('Generating Cache directory: %s.' % directory)
+                os.makedirs(directory)
+        self.conn = sqlite3.connect(
+            self.cache_path,
+            timeout=30,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False)
+        # write ahead logging lets readers proceed while another process writes.
+        self.conn.execute('pragma journal_mode=wal')
+        with self.conn as cursor:
+            for table in ('c7n_cache', 'c7n_cache_lock'):
+                # tables created before entries were namespaced
+                columns = [r[1] for r in cursor.execute('pragma table_info(%s)' % table)]
+                if columns and 'namespace' not in columns:
+                    cursor.execute('drop table %s' % table)
+            cursor.execute(self.create_table)
+            cursor.execute(self.create_lock_table)
+            cursor.execute(
+                'delete from c7n_cache where create_date < ?',
+                [self.expiry()])
+
+    def expiry(self):
+        return datetime.utcnow() - timedelta(minutes=self.cache_period)
+
+    def load(self):
+        if self.conn:
+            return True
+        with self.conn_lock:
+            if self.conn:
+                return True
+            try:
+                self.init()
+            except (OSError, sqlite3.Error) as e:
+                log.warning("Could not load cache %s err: %s" % (
+                    self.cache_path, e))
+                self.close()
+                return False
+        log.debug("Using cache file %s" % self.cache_path)
+        return True
+
+    def get(self, key):
+        if not self.load():
+            return None
+        with self.conn_lock:
+            row = self.conn.execute(
+                'select value, create_date from c7n_cache where namespace = ? and key = ?',
+                [self.namespace, sqlite3.Binary(pickle.dumps(key))]).fetchone()
+        if row is None:
+            return None
+        value, create_date = row
+        if create_date < self.expiry():
+            return None
+        return pickle.loads(value)
+
+    def save(self, key, data, timestamp=None):
+        if not self.load():
+            return
+        try:
+            with self.conn_lock, self.conn as cursor:
+                cursor.execute(
+                    'replace into c7n_cache (namespace, key, value, create_date) '
+                    'values (?, ?, ?, ?)',
+                    (self.namespace,
+                     sqlite3.Binary(pickle.dumps(key)),
+                     sqlite3.Binary(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)),
+                     timestamp or datetime.utcnow()))
+        except (pickle.PickleError, sqlite3.Error) as e:
+            log.warning("Could not save cache %s err: %s" % (
+                self.cache_path, e))
+
+    @contextmanager
+    def fill_lock(self, key):
+        """Hold an exclusive lease on filling the cache entry for key.
+
+        Callers should re-check the cache once the lock is acquired, as
+        the entry may have been filled by the previous holder.
+        """
+        if not self.load():
+            yield
+            return
+        k = sqlite3.Binary(pickle.dumps(key))
+        owner = "%s:%s" % (self.owner, threading.get_ident())
+        acquired = False
+        while not acquired:
+            acquired = self._acquire(k, owner)
+            if not acquired:
+                time.sleep(self.poll_interval)
+        try:
+            yield
+        finally:
+            self._release(k, owner)
+
+    def _acquire(self, key, owner):
+        now = datetime.utcnow()
+        try:
+            with self.conn_lock, self.conn as cursor:
+                cursor.execute(
+                    'delete from c7n_cache_lock where namespace = ? and key = ? '
+                    'and expire_date < ?',
+                    (self.namespace, key, now))
+                cursor.execute(
+                    'insert into c7n_cache_lock (namespace, key, owner, expire_date) '
+                    'values (?, ?, ?, ?)',
+                    (self.namespace, key, owner,
+                     now + timedelta(seconds=self.lease_period)))
+        except sqlite3.IntegrityError:
+            return False
+        except sqlite3.Error as e:
+            # degrade to an unlocked fill rather than failing the policy
+            log.warning("Could not lock cache %s err: %s" % (self.cache_path, e))
+        return True
+
+    def _release(self, key, owner):
+        try:
+            with self.conn_lock, self.conn as cursor:
+                cursor.execute(
+                    'delete from c7n_cache_lock where namespace = ? and key = ? and owner = ?',
+                    (self.namespace, key, owner))
+        except sqlite3.Error as e:
+            log.warning("Could not unlock cache %s err: %s" % (self.cache_path, e))
+
+    def size(self):
+        return os.path.exists(self.cache_path) and os.path.getsize(self.cache_path) or 0
+
+    def close(self):
+        with self.conn_lock:
+            if self.conn:
+                self.conn.close()
+                self.conn = None
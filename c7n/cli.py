@@ -117,6 +117,10 @@ def _report_options(p):
     p.add_argument(
         '--no-default-fields', action="store_true",
         help='Exclude default fields for report.')
+    p.add_argument(
+        '--index', default=None, metavar='PATH',
+        help="Local index file of fetched s3 output records, reused across "
+        "reports to only download new outputs")
     p.add_argument(
         '--format', default='csv', choices=['csv', 'grid', 'simple', 'json'],
         help="Format to output data in (default: %(default)s). "
@@ -222,6 +226,12 @@ def setup_parser():
         "--skip-validation",
         action="store_true",
         help="Skips validation of policies (assumes you've run the validate command seperately).")
+    run.add_argument(
+        "--parallel", type=int, default=0, metavar="N",
+        help="Execute policies concurrently across N worker processes. Policies "
+        "querying the same resources in a region run together in one worker, "
+        "sharing enumeration via the resource cache, which must be enabled "
+        "(--cache, --cache-period) for them to do so.")
 
     metrics_help = ("Emit metrics to provider metrics. Specify 'aws', 'gcp', or 'azure'. "
             "For more details on aws metrics options, see: "
@@ -236,6 +246,11 @@ def setup_parser():
         dest="tracer",
         help="Tracing integration",
         default=None, nargs="?", const="default")
+    run.add_argument(
+        "--resources-format", default="json",
+        choices=("json", "jsonl", "jsonl.gz", "jsonl.zst"),
+        help="Format of the resources file written to the output dir. The jsonl "
+        "formats stream compact json lines, optionally compressed (default: %(default)s)")
 
     schema_desc = ("Browse the available vocabularies (resources, filters, modes, and "
                    "actions) for policy construction. The selector "
@@ -1,6 +1,7 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
 from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import timedelta, datetime
 from functools import wraps
 import json
@@ -13,6 +14,7 @@ import yaml
 from yaml.constructor import ConstructorError
 
 from c7n.exceptions import ClientError, PolicyValidationError
+from c7n.output import HAVE_ZSTD
 from c7n.provider import clouds
 from c7n.policy import Policy, PolicyCollection, load as policy_load
 from c7n.schema import ElementSchema, StructureParser, generate
@@ -265,22 +267,102 @@ def run(options, policies):
             log.exception("Unable to assume role %s", options.assume_role)
             sys.exit(1)
 
+    if getattr(options, 'resources_format', None) == 'jsonl.zst' and not HAVE_ZSTD:
+        log.error("The jsonl.zst resources format requires the zstandard package")
+        sys.exit(1)
+
+    parallel = getattr(options, 'parallel', None)
+    if parallel and parallel > 1 and not options.debug:
+        errored_policies = _run_parallel(options, policies, parallel)
+    else:
+        errored_policies = _run_policies(policies, options.debug)
+    if errored_policies:
+        exit_code = 2
+    if exit_code != 0:
+        log.error("The following policies had errors while executing\n - %s" % (
+            "\n - ".join(errored_policies)))
+        sys.exit(exit_code)
+
+
+def _run_policies(policies, debug=False):
     errored_policies = []
     for policy in policies:
         try:
             policy()
         except Exception:
-            exit_code = 2
             errored_policies.append(policy.name)
-            if options.debug:
+            if debug:
                 raise
             log.exception(
                 "Error while executing policy %s, continuing" % (
                     policy.name))
-    if exit_code != 0:
-        log.error("The following policies had errors while executing\n - %s" % (
-            "\n - ".join(errored_policies)))
-        sys.exit(exit_code)
+    return errored_policies
+
+
+def _policy_group_key(policy):
+    return (
+        policy.provider_name,
+        policy.resource_manager.__class__.__name__,
+        policy.options.region,
+        policy.data.get('source', 'describe'),
+        json.dumps(policy.data.get('query'), sort_keys=True))
+
+
+def group_policies(policies):
+    """Group policies which enumerate the same resources in a region."""
+    groups = {}
+    for p in policies:
+        groups.setdefault(_policy_group_key(p), []).append(p)
+    return list(groups.values())
+
+
+def run_policy_group(group):
+    """Execute a group of policies within a worker process.
+
+    Members of a group share a resource query and are run serially, so
+    the first policy populates the resource cache for the rest of them.
+    """
+    load_resources(StructureParser().get_resource_types(
+        {'policies': [data for data, _ in group]}))
+    errored_policies = []
+    policies = []
+    for data, options in group:
+        try:
+            p = Policy(data, options)
+            p.validate()
+        except Exception:
+            errored_policies.append(data['name'])
+            log.exception(
+                "Error while loading policy %s, continuing" % data['name'])
+            continue
+        policies.append(p)
+    return errored_policies + _run_policies(policies)
+
+
+def _run_parallel(options, policies, max_workers):
+    errored_policies = []
+    groups = group_policies(policies)
+    log.info("Running %d policies in %d groups with %d workers",
+             len(policies), len(groups), max_workers)
+    if not options.cache or not options.cache_period:
+        log.warning(
+            "Resource cache is disabled, policies in a group will each "
+            "enumerate their resources")
+    with ProcessPoolExecutor(max_workers=max_workers) as w:
+        futures = {}
+        for g in groups:
+            futures[w.submit(
+                run_policy_group, [(p.data, p.options) for p in g])] = g
+        for f in as_completed(futures):
+            if f.exception():
+                names = [p.name for p in futures[f]]
+                log.error(
+                    "Error while executing policies %s: %s" % (
+                        ", ".join(names), f.exception()))
+                errored_policies.extend(names)
+                continue
+            errored_policies.extend(f.result())
+    return errored_policies
 
 
 @policy_command
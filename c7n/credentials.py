@@ -4,7 +4,11 @@
 Authentication utilities
 """
 import os
+import threading
+import weakref
+from collections import OrderedDict
 
+from botocore.config import Config
 from botocore.credentials import RefreshableCredentials
 from botocore.session import get_session
 from boto3 import Session
@@ -19,6 +23,127 @@ USE_STS_REGIONAL = os.environ.get(
     'C7N_USE_STS_REGIONAL', '').lower() in ('yes', 'true')
 
 
+class ClientPool:
+    """Process wide pool of boto clients shared across executor threads.
+
+    Clients are keyed on credential identity, service, region, endpoint
+    and client config, so sessions resolving the same credentials share
+    a single client, its connection pool and endpoint resolution. When a
+    refreshable credential rotates, clients keyed on its prior identity
+    are evicted. The pool holds at most max_clients, evicting the least
+    recently used, so sessions replaced by credential refreshes or other
+    accounts (ie. c7n-org workers) don't accumulate clients.
+
+    C7N_MAX_POOL_CONNECTIONS tunes the per client connection pool size, a
+    value of 0 disables pooling.
+    """
+
+    env_var = 'C7N_MAX_POOL_CONNECTIONS'
+    default_max_pool_connections = 50
+    max_clients = 256
+
+    def __init__(self, max_pool_connections=default_max_pool_connections):
+        self.max_pool_connections = max_pool_connections
+        self.clients = OrderedDict()
+        self.identities = weakref.WeakKeyDictionary()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        max_connections = int(
+            os.environ.get(cls.env_var) or cls.default_max_pool_connections)
+        if not max_connections:
+            return None
+        return cls(max_connections)
+
+    def attach(self, session, subscribers=()):
+        """Route the session's client construction through the pool."""
+        session_client = type(session).client.__get__(session)
+
+        def client(service_name, region_name=None, api_version=None,
+                   use_ssl=True, verify=None, endpoint_url=None,
+                   aws_access_key_id=None, aws_secret_access_key=None,
+                   aws_session_token=None, config=None):
+            if aws_access_key_id or api_version or not use_ssl or verify is not None:
+                return session_client(
+                    service_name, region_name=region_name, api_version=api_version,
+                    use_ssl=use_ssl, verify=verify, endpoint_url=endpoint_url,
+                    aws_access_key_id=aws_access_key_id,
+                    aws_secret_access_key=aws_secret_access_key,
+                    aws_session_token=aws_session_token, config=config)
+            return self.get_client(
+                session, session_client, service_name, region_name,
+                endpoint_url, config, subscribers)
+
+        session.client = client
+        return session
+
+    def get_config(self, config=None):
+        pool_config = Config(max_pool_connections=self.max_pool_connections)
+        if config is None:
+            return pool_config
+        return pool_config.merge(config)
+
+    def get_config_key(self, config):
+        return repr(sorted(
+            (name, getattr(config, name, None)) for name in Config.OPTION_DEFAULTS))
+
+    def get_identity(self, session):
+        credentials = session._session.get_credentials()
+        if credentials is None:
+            return None
+        access_key = credentials.access_key
+        with self.lock:
+            previous = self.identities.get(credentials)
+            self.identities[credentials] = access_key
+            if previous and previous != access_key:
+                self.evict(previous)
+        return access_key
+
+    def evict(self, identity):
+        for k in [k for k in self.clients if k[0] == identity]:
+            self.clients.pop(k)
+
+    def release(self, subscribers):
+        """Drop clients carrying event subscribers that are going away."""
+        subscribers = tuple(subscribers)
+        with self.lock:
+            for k in [k for k in self.clients if k[-1] == subscribers]:
+                self.clients.pop(k)
+
+    def get_client(self, session, session_client, service_name,
+                   region_name=None, endpoint_url=None, config=None, subscribers=()):
+        identity = self.get_identity(session)
+        config = self.get_config(config)
+        key = (
+            identity,
+            service_name,
+            region_name or session.region_name,
+            endpoint_url,
+            self.get_config_key(config),
+            session._session.user_agent(),
+            tuple(subscribers))
+        with self.lock:
+            client = self.clients.get(key)
+            if client is not None:
+                self.clients.move_to_end(key)
+                return client
+            client = self.clients[key] = session_client(
+                service_name, region_name=region_name,
+                endpoint_url=endpoint_url, config=config)
+            while len(self.clients) > self.max_clients:
+                self.clients.popitem(last=False)
+        return client
+
+    def clear(self):
+        with self.lock:
+            self.clients.clear()
+            self.identities.clear()
+
+
+CLIENT_POOL = ClientPool.from_env()
+
+
 class SessionFactory:
 
     def __init__(self, region, profile=None, assume_role=None, external_id=None):
@@ -57,9 +182,13 @@ class SessionFactory:
         for s in self._subscribers:
             s(session)
 
+        if CLIENT_POOL is not None:
+            CLIENT_POOL.attach(session, self._subscribers)
         return session
 
     def set_subscribers(self, subscribers):
+        if CLIENT_POOL is not None and self._subscribers:
+            CLIENT_POOL.release(self._subscribers)
         self._subscribers = subscribers
 
 
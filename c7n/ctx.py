@@ -129,6 +129,9 @@ class ExecutionContext:
             md['sys-stats'] = self.sys_stats.get_metadata()
         if 'api-stats' in include and self.api_stats:
             md['api-stats'] = self.api_stats.get_metadata()
+            throttles = getattr(self.api_stats, 'get_throttles', dict)()
+            if throttles:
+                md['api-throttles'] = throttles
         if 'metrics' in include and self.metrics:
             md['metrics'] = self.metrics.get_metadata()
         return md
@@ -5,6 +5,7 @@ Resource Filtering Logic
 """
 import copy
 import datetime
+import functools
 from datetime import timedelta
 import fnmatch
 import ipaddress
@@ -182,6 +183,10 @@ class Filter(Element):
 
     log = logging.getLogger('custodian.filters')
 
+    # Whether the filter needs the complete resource set, when streaming
+    # resources it, and subsequent filters, are applied post enumeration.
+    stream_barrier = False
+
     def __init__(self, data, manager=None):
         self.data = data
         self.manager = manager
@@ -271,6 +276,8 @@ def intersect_list(a, b):
 
 class BooleanGroupFilter(Filter):
 
+    compiled = False
+
     def __init__(self, data, registry, manager):
         super(BooleanGroupFilter, self).__init__(data)
         self.registry = registry
@@ -286,6 +293,43 @@ class BooleanGroupFilter(Filter):
         resource_type = self.manager.get_model()
         return resource_type.id
 
+    def compile(self):
+        """Compile the block into a single short circuiting predicate.
+
+        Only blocks composed entirely of value filters (and nested blocks
+        of them) are compiled, returns None otherwise.
+        """
+        if self.compiled is not False:
+            return self.compiled
+        self.compiled = None
+        predicates = []
+        for f in self.filters:
+            if isinstance(f, BooleanGroupFilter):
+                p = f.compile()
+            elif type(f) is ValueFilter and f.data.get('value_type') != 'resource_count':
+                p = f.compile()
+            else:
+                p = None
+            if p is None:
+                return None
+            predicates.append(p)
+        self.compiled = self.compile_block(predicates)
+        return self.compiled
+
+    def annotate_match(self, r):
+        """Annotate a resource matched by the compiled block predicate."""
+        for f in self.filters:
+            if isinstance(f, BooleanGroupFilter):
+                f.annotate_match(r)
+            elif f.annotate:
+                set_annotation(r, ANNOTATION_KEY, f.k)
+
+    def process_compiled(self, resources, predicate):
+        results = [r for r in resources if predicate(r)]
+        for r in results:
+            self.annotate_match(r)
+        return results
+
     def __len__(self):
         return len(self.filters)
 
@@ -296,10 +340,30 @@ class BooleanGroupFilter(Filter):
 class Or(BooleanGroupFilter):
 
     def process(self, resources, event=None):
+        predicate = self.compile()
+        if predicate is not None:
+            return self.process_compiled(resources, predicate)
         if self.manager:
             return self.process_set(resources, event)
         return super(Or, self).process(resources, event)
 
+    def compile_block(self, predicates):
+        def predicate(r):
+            for p in predicates:
+                if p(r):
+                    return True
+            return False
+        return predicate
+
+    def annotate_match(self, r):
+        # only the members which matched contribute annotations.
+        for f in self.filters:
+            if f.compile()(r):
+                if isinstance(f, BooleanGroupFilter):
+                    f.annotate_match(r)
+                elif f.annotate:
+                    set_annotation(r, ANNOTATION_KEY, f.k)
+
     def __call__(self, r):
         """Fallback for older unit tests that don't utilize a query manager"""
         for f in self.filters:
@@ -320,6 +384,9 @@ class Or(BooleanGroupFilter):
 class And(BooleanGroupFilter):
 
     def process(self, resources, events=None):
+        predicate = self.compile()
+        if predicate is not None:
+            return self.process_compiled(resources, predicate)
         if self.manager:
             sweeper = AnnotationSweeper(self.get_resource_type_id(), resources)
 
@@ -333,14 +400,38 @@ class And(BooleanGroupFilter):
 
         return resources
 
+    def compile_block(self, predicates):
+        def predicate(r):
+            for p in predicates:
+                if not p(r):
+                    return False
+            return True
+        return predicate
+
 
 class Not(BooleanGroupFilter):
 
     def process(self, resources, event=None):
+        predicate = self.compile()
+        if predicate is not None:
+            return self.process_compiled(resources, predicate)
         if self.manager:
             return self.process_set(resources, event)
         return super(Not, self).process(resources, event)
 
+    def compile_block(self, predicates):
+        # There is an implicit 'and' for self.filters
+        def predicate(r):
+            for p in predicates:
+                if not p(r):
+                    return True
+            return False
+        return predicate
+
+    def annotate_match(self, r):
+        # annotations from members of a not block are always discarded.
+        return
+
     def __call__(self, r):
         """Fallback for older unit tests that don't utilize a query manager"""
 
@@ -410,6 +501,7 @@ class ValueFilter(BaseValueFilter):
     """Generic value filter using jmespath
     """
     op = v = vtype = None
+    matcher = None
 
     schema = {
         'type': 'object',
@@ -538,7 +630,7 @@ class ValueFilter(BaseValueFilter):
     def get_resource_value(self, k, i):
         return super(ValueFilter, self).get_resource_value(k, i, self.data.get('value_regex'))
 
-    def match(self, i):
+    def initialize_content(self):
         if self.v is None and len(self.data) == 1:
             [(self.k, self.v)] = self.data.items()
         elif self.v is None and not hasattr(self, 'content_initialized'):
@@ -547,45 +639,135 @@ class ValueFilter(BaseValueFilter):
             if 'value_from' in self.data:
                 values = ValuesFrom(self.data['value_from'], self.manager)
                 self.v = values.get_values()
+                # membership tests against a prebuilt set rather than a list scan
+                if (self.op in ('in', 'ni', 'not-in') and isinstance(self.v, list) and
+                        all(isinstance(v, (str, int, float)) for v in self.v)):
+                    self.v = frozenset(self.v)
             else:
                 self.v = self.data.get('value')
             self.content_initialized = True
             self.vtype = self.data.get('value_type')
 
-        if i is None:
-            return False
+    def match(self, i):
+        if self.matcher is None:
+            self.compile()
+        return self.matcher(i)
 
-        # value extract
-        r = self.get_resource_value(self.k, i)
+    def compile(self):
+        """Compile the filter into a predicate over a single resource.
 
-        if self.op in ('in', 'not-in') and r is None:
-            r = ()
+        The key accessor, value type conversion and comparison operator
+        are resolved once, instead of for every resource matched. The
+        predicate does not annotate resources.
+        """
+        if self.matcher is not None:
+            return self.matcher
+        self.initialize_content()
+        accessor = self.compile_accessor(self.k)
+        compare = self.compile_comparison()
 
-        # value type conversion
         if self.vtype is not None:
-            v, r = self.process_value_type(self.v, r, i)
+            convert = functools.partial(self.process_value_type, self.v)
+
+            def matcher(i):
+                if i is None:
+                    return False
+                v, r = convert(accessor(i), i)
+                return compare(r, v)
         else:
             v = self.v
 
-        # Value match
-        if r is None and v == 'absent':
-            return True
-        elif r is not None and v == 'present':
-            return True
-        elif v == 'not-null' and r:
-            return True
-        elif v == 'empty' and not r:
-            return True
-        elif self.op:
-            op = OPERATORS[self.op]
-            try:
-                return op(r, v)
-            except TypeError:
-                return False
-        elif r == self.v:
-            return True
+            def matcher(i):
+                if i is None:
+                    return False
+                return compare(accessor(i), v)
 
-        return False
+        self.matcher = matcher
+        return matcher
+
+    def compile_accessor(self, k):
+        """Return a callable extracting the value of key k from a resource."""
+        if type(self).get_resource_value is not ValueFilter.get_resource_value:
+            accessor = functools.partial(self.get_resource_value, k)
+        elif k.startswith('tag:'):
+            tk = k.split(':', 1)[1]
+
+            def accessor(i):
+                if 'Tags' in i:
+                    for t in i.get("Tags", []):
+                        if t.get('Key') == tk:
+                            return t.get('Value')
+                # GCP schema: 'labels': {'key': 'value'}
+                elif 'labels' in i:
+                    return i.get('labels', {}).get(tk, None)
+                # Azure schema: 'tags': {'key': 'value'}
+                elif 'tags' in i:
+                    return i.get('tags', {}).get(tk, None)
+        else:
+            expr = self.expr
+
+            def accessor(i):
+                if k in i:
+                    return i.get(k)
+                # keys may not be valid expressions, ie. annotations.
+                if k not in expr:
+                    expr[k] = jmespath.compile(k)
+                return expr[k].search(i)
+
+        regex = self.data.get('value_regex')
+        if regex and type(self).get_resource_value is ValueFilter.get_resource_value:
+            extract = ValueRegex(regex).get_resource_value
+            key_accessor = accessor
+
+            def accessor(i):
+                return extract(key_accessor(i))
+
+        if self.op in ('in', 'not-in'):
+            value_accessor = accessor
+
+            def accessor(i):
+                r = value_accessor(i)
+                return () if r is None else r
+        return accessor
+
+    def compile_comparison(self):
+        """Return a callable comparing a resource value to the filter value."""
+        raw = self.v
+        op = self.op and OPERATORS[self.op] or None
+
+        def compare(r, v):
+            if op:
+                try:
+                    return op(r, v)
+                except TypeError:
+                    return False
+            return r == raw
+
+        def match_sentinel(r, v):
+            if r is None and v == 'absent':
+                return True
+            elif r is not None and v == 'present':
+                return True
+            elif v == 'not-null' and r:
+                return True
+            elif v == 'empty' and not r:
+                return True
+            return compare(r, v)
+
+        # with a value type conversion, the value is only known per resource.
+        if self.vtype is not None:
+            return match_sentinel
+        elif not isinstance(raw, str):
+            return compare
+        elif raw == 'absent':
+            return lambda r, v: r is None or compare(r, v)
+        elif raw == 'present':
+            return lambda r, v: r is not None or compare(r, v)
+        elif raw == 'not-null':
+            return lambda r, v: bool(r) or compare(r, v)
+        elif raw == 'empty':
+            return lambda r, v: not r or compare(r, v)
+        return compare
 
     def process_value_type(self, sentinel, value, resource):
         if self.vtype == 'normalize' and isinstance(value, str):
@@ -834,6 +1016,7 @@ class ReduceFilter(BaseValueFilter):
 
     """
     annotate = False
+    stream_barrier = True
 
     schema = {
         'type': 'object',
@@ -23,9 +23,12 @@ References
   https://docs.aws.amazon.com/IAM/latest/UserGuide/reference_policies_elements.html
 
 """
+import copy
 import fnmatch
+import hashlib
 import logging
 import json
+import threading
 
 from c7n.filters import Filter
 from c7n.resolver import ValuesFrom
@@ -42,6 +45,16 @@ def _account(arn):
     return arn.split(':', 5)[4]
 
 
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(v) for v in value)
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
 class PolicyChecker:
     """
     checker_config:
@@ -50,9 +63,31 @@ class PolicyChecker:
       - allowed_accounts: permission grants to these accounts are okay
       - whitelist_conditions: a list of conditions that are considered
             sufficient enough to whitelist the statement.
+
+    Results are memoized at the class level for the life of the process,
+    keyed by a digest of the normalized policy document and the checker
+    class and config, so identical documents across resources, resource
+    types and policies (ie. c7n-org runs) are evaluated once. Checks must
+    only depend on the document and checker config. The caches are
+    bounded by cache_size, and may be reset with :meth:`clear_cache`.
     """
+
+    # Process wide, normalized policy digest and checker config -> violations
+    results = {}
+    # policy text -> normalized policy digest
+    digests = {}
+    cache_lock = threading.Lock()
+    cache_size = 10000
+
     def __init__(self, checker_config):
         self.checker_config = checker_config
+        self._config_key = None
+
+    @classmethod
+    def clear_cache(cls):
+        with cls.cache_lock:
+            cls.results.clear()
+            cls.digests.clear()
 
     # Config properties
     @property
@@ -83,13 +118,59 @@ class PolicyChecker:
     def allowed_orgid(self):
         return self.checker_config.get('allowed_orgid', ())
 
-    # Policy statement handling
-    def check(self, policy_text):
+    def get_config_key(self):
+        if self._config_key is None:
+            self._config_key = (
+                self.__class__.__module__, self.__class__.__name__,
+                _freeze(self.checker_config))
+        return self._config_key
+
+    def get_policy_digest(self, policy_text):
+        """Return the normalized policy digest and the parsed policy.
+
+        The policy is only parsed if its text hasn't been seen before.
+        """
         if isinstance(policy_text, str):
+            digest = self.digests.get(policy_text)
+            if digest is not None:
+                return digest, None
             policy = json.loads(policy_text)
         else:
             policy = policy_text
+        digest = hashlib.sha256(json.dumps(
+            policy, sort_keys=True, separators=(',', ':')).encode('utf8')).hexdigest()
+        if isinstance(policy_text, str):
+            with self.cache_lock:
+                if len(self.digests) >= self.cache_size:
+                    self.digests.clear()
+                self.digests[policy_text] = digest
+        return digest, policy
 
+    # Policy statement handling
+    def check(self, policy_text):
+        config_key = self.get_config_key()
+        digest, policy = self.get_policy_digest(policy_text)
+        key = (digest, config_key)
+        violations = self.results.get(key)
+        if violations is None:
+            if policy is None:
+                policy = json.loads(policy_text)
+            violations = self.evaluate(policy)
+            with self.cache_lock:
+                if len(self.results) >= self.cache_size:
+                    self.results.clear()
+                self.results[key] = violations
+        # callers annotate resources with violations, don't share them.
+        return copy.deepcopy(violations)
+
+    def check_many(self, policies):
+        """Check a sequence of policies, returning violations for each.
+
+        Each distinct policy document is evaluated at most once.
+        """
+        return [None if p is None else self.check(p) for p in policies]
+
+    def evaluate(self, policy):
         violations = []
         for s in policy.get('Statement', ()):
             if self.handle_statement(s):
@@ -289,7 +370,17 @@ class CrossAccountAccessFilter(Filter):
              'everyone_only': self.everyone_only,
              'whitelist_conditions': self.conditions})
         self.checker = self.checker_factory(self.checker_config)
-        return super(CrossAccountAccessFilter, self).process(resources, event)
+        if type(self).__call__ is not CrossAccountAccessFilter.__call__:
+            return super(CrossAccountAccessFilter, self).process(resources, event)
+
+        results = []
+        resources = list(resources)
+        policies = [self.get_resource_policy(r) for r in resources]
+        for r, violations in zip(resources, self.checker.check_many(policies)):
+            if violations:
+                r[self.annotation_key] = violations
+                results.append(r)
+        return results
 
     def get_accounts(self):
         owner_id = self.manager.config.account_id
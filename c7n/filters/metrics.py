@@ -5,6 +5,7 @@ CloudWatch Metrics suppport for resources
 """
 from concurrent.futures import as_completed
 from datetime import datetime, timedelta
+import math
 
 from c7n.exceptions import PolicyValidationError
 from c7n.filters.core import Filter, OPERATORS
@@ -64,6 +65,22 @@ class MetricsFilter(Filter):
     policy to treat their request counts as 0.
 
     Note the default statistic for metrics is Average.
+
+    For large fleets, "batch: true" retrieves metrics with GetMetricData,
+    packing queries for up to 500 resources into each api call instead
+    of calling GetMetricStatistics per resource.
+
+    .. code-block:: yaml
+
+      - name: ec2-underutilized
+        resource: ec2
+        filters:
+          - type: metrics
+            name: CPUUtilization
+            days: 4
+            value: 30
+            op: less-than
+            batch: true
     """
 
     schema = type_schema(
@@ -84,12 +101,15 @@ class MetricsFilter(Filter):
            'attr-multiplier': {'type': 'number'},
            'percent-attr': {'type': 'string'},
            'missing-value': {'type': 'number'},
+           'batch': {'type': 'boolean'},
            'required': ('value', 'name')})
     schema_alias = True
     permissions = ("cloudwatch:GetMetricStatistics",)
 
     MAX_QUERY_POINTS = 50850
     MAX_RESULT_POINTS = 1440
+    # GetMetricData limit on queries per api call
+    MAX_BATCH_QUERIES = 500
 
     # Default per service, for overloaded services like ec2
     # we do type specific default namespace annotation
@@ -145,13 +165,20 @@ class MetricsFilter(Filter):
                 ns = self.DEFAULT_NAMESPACE[self.model.service]
         self.namespace = ns
 
+        if self.data.get('batch'):
+            process_resource_set = self.process_resource_set_batch
+            chunk_size = self.MAX_BATCH_QUERIES
+        else:
+            process_resource_set = self.process_resource_set
+            chunk_size = 50
+
         self.log.debug("Querying metrics for %d", len(resources))
         matched = []
         with self.executor_factory(max_workers=3) as w:
             futures = []
-            for resource_set in chunks(resources, 50):
+            for resource_set in chunks(resources, chunk_size):
                 futures.append(
-                    w.submit(self.process_resource_set, resource_set))
+                    w.submit(process_resource_set, resource_set))
 
             for f in as_completed(futures):
                 if f.exception():
@@ -161,6 +188,11 @@ class MetricsFilter(Filter):
                 matched.extend(f.result())
         return matched
 
+    def get_permissions(self):
+        if self.data.get('batch'):
+            return ("cloudwatch:GetMetricData",)
+        return self.permissions
+
     def get_dimensions(self, resource):
         return [{'Name': self.model.dimension,
                  'Value': resource[self.model.dimension]}]
@@ -173,25 +205,29 @@ class MetricsFilter(Filter):
             dims.append({'Name': k, 'Value': v})
         return dims
 
+    def get_metric_key(self):
+        # Note this annotation cache is policy scoped, not across
+        # policies, still the lack of full qualification on the key
+        # means multiple filters within a policy using the same metric
+        # across different periods or dimensions would be problematic.
+        return "%s.%s.%s" % (self.namespace, self.metric, self.statistics)
+
+    def get_resource_dimensions(self, resource):
+        # if we overload dimensions with multiple resources we get
+        # the statistics/average over those resources.
+        dimensions = self.get_dimensions(resource)
+        # Merge in any filter specified metrics, get_dimensions is
+        # commonly overridden so we can't do it there.
+        dimensions.extend(self.get_user_dimensions())
+        return dimensions
+
     def process_resource_set(self, resource_set):
         client = local_session(
             self.manager.session_factory).client('cloudwatch')
 
-        matched = []
+        key = self.get_metric_key()
         for r in resource_set:
-            # if we overload dimensions with multiple resources we get
-            # the statistics/average over those resources.
-            dimensions = self.get_dimensions(r)
-            # Merge in any filter specified metrics, get_dimensions is
-            # commonly overridden so we can't do it there.
-            dimensions.extend(self.get_user_dimensions())
-
             collected_metrics = r.setdefault('c7n.metrics', {})
-            # Note this annotation cache is policy scoped, not across
-            # policies, still the lack of full qualification on the key
-            # means multiple filters within a policy using the same metric
-            # across different periods or dimensions would be problematic.
-            key = "%s.%s.%s" % (self.namespace, self.metric, self.statistics)
             if key not in collected_metrics:
                 collected_metrics[key] = client.get_metric_statistics(
                     Namespace=self.namespace,
@@ -200,7 +236,60 @@ class MetricsFilter(Filter):
                     StartTime=self.start,
                     EndTime=self.end,
                     Period=self.period,
-                    Dimensions=dimensions)['Datapoints']
+                    Dimensions=self.get_resource_dimensions(r))['Datapoints']
+        return self.match_resources(resource_set)
+
+    def process_resource_set_batch(self, resource_set):
+        """Retrieve metrics for a set of resources with GetMetricData.
+
+        Results are converted to the same datapoint annotation format
+        as GetMetricStatistics.
+        """
+        client = local_session(
+            self.manager.session_factory).client('cloudwatch')
+
+        key = self.get_metric_key()
+        # GetMetricData requires periods to be a multiple of 60s.
+        period = int(math.ceil(self.period / 60.0)) * 60
+        queries = {}
+        for idx, r in enumerate(resource_set):
+            if key in r.setdefault('c7n.metrics', {}):
+                continue
+            queries['m%d' % idx] = {
+                'Id': 'm%d' % idx,
+                'MetricStat': {
+                    'Metric': {
+                        'Namespace': self.namespace,
+                        'MetricName': self.metric,
+                        'Dimensions': self.get_resource_dimensions(r)},
+                    'Period': period,
+                    'Stat': self.statistics},
+                'ReturnData': True}
+
+        datapoints = {qid: [] for qid in queries}
+        if queries:
+            from c7n.query import RetryPageIterator
+            paginator = client.get_paginator('get_metric_data')
+            paginator.PAGE_ITERATOR_CLS = RetryPageIterator
+            for page in paginator.paginate(
+                    MetricDataQueries=list(queries.values()),
+                    StartTime=self.start,
+                    EndTime=self.end,
+                    ScanBy='TimestampAscending'):
+                for result in page['MetricDataResults']:
+                    datapoints[result['Id']].extend([
+                        {'Timestamp': t, self.statistics: v}
+                        for t, v in zip(result['Timestamps'], result['Values'])])
+
+        for qid in queries:
+            resource_set[int(qid[1:])]['c7n.metrics'][key] = datapoints[qid]
+        return self.match_resources(resource_set)
+
+    def match_resources(self, resource_set):
+        key = self.get_metric_key()
+        matched = []
+        for r in resource_set:
+            collected_metrics = r['c7n.metrics']
 
             # In certain cases CloudWatch reports no data for a metric.
             # If the policy specifies a fill value for missing data, add
@@ -230,6 +319,9 @@ class MetricsFilter(Filter):
 
 class ShieldMetrics(MetricsFilter):
     """Specialized metrics filter for shield
+
+    Metrics are queried by resource arn in the AWS/DDoSProtection
+    namespace, "batch: true" is supported as with the metrics filter.
     """
     schema = type_schema('shield-metrics', rinherit=MetricsFilter.schema)
 
@@ -245,6 +245,37 @@ def parens_removed(u):
     return u.translate({ord('('): None, ord(')'): None})
 
 
+class TimezoneAliases(dict):
+    """Timezone alias table, extended with the zoneinfo names that are not title case.
+
+    Reading the zone names from the dateutil zoneinfo tarball is slow, so
+    it is deferred until a lookup misses the static aliases.
+    """
+
+    loaded = False
+
+    def load(self):
+        z_names = list(zoneinfo.get_zonefile_instance().zones)
+        self.update({
+            z.lower(): z for z in z_names
+            if z.title() != z and not dict.__contains__(self, z.lower())})
+        self.loaded = True
+
+    def __missing__(self, key):
+        if self.loaded:
+            raise KeyError(key)
+        self.load()
+        return self[key]
+
+    def __contains__(self, key):
+        if not dict.__contains__(self, key) and not self.loaded:
+            self.load()
+        return dict.__contains__(self, key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+
 class Time(Filter):
     """
     Schedule offhours for resources see :ref:`offhours <offhours>`
@@ -270,7 +301,7 @@ class Time(Filter):
     DEFAULT_TAG = "maid_offhours"
     DEFAULT_TZ = 'et'
 
-    TZ_ALIASES = {
+    TZ_ALIASES = TimezoneAliases({
         'pdt': 'America/Los_Angeles',
         'pt': 'America/Los_Angeles',
         'pst': 'America/Los_Angeles',
@@ -299,14 +330,7 @@ class Time(Filter):
         'brt': 'America/Sao_Paulo',
         'nzst': 'Pacific/Auckland',
         'utc': 'Etc/UTC',
-    }
-
-    z_names = list(zoneinfo.get_zonefile_instance().zones)
-    non_title_case_zones = (
-        lambda aliases=TZ_ALIASES.keys(), z_names=z_names:
-        {z.lower(): z for z in z_names
-            if z.title() != z and z.lower() not in aliases})()
-    TZ_ALIASES.update(non_title_case_zones)
+    })
 
     def __init__(self, data, manager=None):
         super(Time, self).__init__(data, manager)
@@ -317,6 +341,8 @@ class Time(Filter):
         self.tag_key = self.data.get('tag', self.DEFAULT_TAG).lower()
         self.default_schedule = self.get_default_schedule()
         self.parser = ScheduleParser(self.default_schedule)
+        self.schedules = {}
+        self.skip_days = None
 
         self.id_key = None
 
@@ -340,6 +366,7 @@ class Time(Filter):
         return self
 
     def process(self, resources, event=None):
+        self.skip_days = None
         resources = super(Time, self).process(resources)
         if self.parse_errors and self.manager and self.manager.ctx.log_dir:
             self.log.warning("parse errors %d", len(self.parse_errors))
@@ -388,6 +415,33 @@ class Time(Filter):
     def process_resource_schedule(self, i, value, time_type):
         """Does the resource tag schedule and policy match the current time."""
         rid = i[self.id_key]
+        key = (value, time_type)
+        if key not in self.schedules:
+            self.schedules[key] = self.compile_schedule(value, time_type)
+        schedule = self.schedules[key]
+        if schedule is None:
+            log.warning(
+                "Invalid schedule on resource:%s value:%s", rid, value)
+            self.parse_errors.append((rid, value))
+            return False
+        if not schedule.tz:
+            log.warning(
+                "Could not resolve tz on resource:%s value:%s", rid, value)
+            self.parse_errors.append((rid, value))
+            return False
+        now = datetime.datetime.now(schedule.tz).replace(
+            minute=0, second=0, microsecond=0)
+        if self.skip_days is None:
+            self.skip_days = self.get_skip_days()
+        if now.strftime("%Y-%m-%d") in self.skip_days:
+            return False
+        return schedule.match(now)
+
+    def compile_schedule(self, value, time_type):
+        """Parse a tag value into a :py:class:`CompiledSchedule`.
+
+        Returns None if the schedule is invalid.
+        """
         # this is to normalize trailing semicolons which when done allows
         # dateutil.parser.parse to process: value='off=(m-f,1);' properly.
         # before this normalization, some cases would silently fail.
@@ -405,35 +459,15 @@ class Time(Filter):
         else:
             schedule = None
         if schedule is None:
-            log.warning(
-                "Invalid schedule on resource:%s value:%s", rid, value)
-            self.parse_errors.append((rid, value))
-            return False
-        tz = self.get_tz(schedule['tz'])
-        if not tz:
-            log.warning(
-                "Could not resolve tz on resource:%s value:%s", rid, value)
-            self.parse_errors.append((rid, value))
-            return False
-        now = datetime.datetime.now(tz).replace(
-            minute=0, second=0, microsecond=0)
-        now_str = now.strftime("%Y-%m-%d")
+            return None
+        return CompiledSchedule(
+            self.get_tz(schedule['tz']), schedule.get(time_type, ()))
+
+    def get_skip_days(self):
         if 'skip-days-from' in self.data:
             values = ValuesFrom(self.data['skip-days-from'], self.manager)
-            self.skip_days = values.get_values()
-        else:
-            self.skip_days = self.data.get('skip-days', [])
-        if now_str in self.skip_days:
-            return False
-        return self.match(now, schedule)
-
-    def match(self, now, schedule):
-        time = schedule.get(self.time_type, ())
-        for item in time:
-            days, hour = item.get("days"), item.get('hour')
-            if now.weekday() in days and now.hour == hour:
-                return True
-        return False
+            return values.get_values()
+        return self.data.get('skip-days', [])
 
     def get_tag_value(self, i):
         """Get the resource's tag value specifying its schedule."""
@@ -508,6 +542,26 @@ class OnHour(Time):
         return default
 
 
+class CompiledSchedule:
+    """A resource schedule's timezone and hours for one time type.
+
+    The hours of the week are held in a bitmap indexed by
+    ``weekday * 24 + hour``.
+    """
+
+    __slots__ = ('tz', 'hours')
+
+    def __init__(self, tz, times):
+        self.tz = tz
+        self.hours = 0
+        for item in times:
+            for day in item.get('days') or ():
+                self.hours |= 1 << (day * 24 + item['hour'])
+
+    def match(self, now):
+        return bool(self.hours >> (now.weekday() * 24 + now.hour) & 1)
+
+
 class ScheduleParser:
     """Parses tag values for custom on/off hours schedules.
 
@@ -1,12 +1,85 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
 import importlib
+import threading
+import time
 
 import jmespath
 
 from .core import ValueFilter, OPERATORS
 
 
+class RelatedResourceIndex:
+    """Index of a related resource type's resources by id.
+
+    Indexes are shared across filters and policies evaluating the same
+    resource type in the same account and region, for as long as the
+    resource cache period. With caching disabled each lookup uses its
+    own index.
+    """
+
+    indexes = {}
+    lock = threading.Lock()
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.id_key = manager.get_model().id
+        self.resources = {}
+        self.missing = set()
+        self.complete = False
+        self.created = time.time()
+        self.lock = threading.RLock()
+
+    @classmethod
+    def get_index(cls, manager):
+        config = manager.config
+        if not config.get('cache') or not config.get('cache_period'):
+            return cls(manager)
+        key = (manager.__class__, config.get('account_id'),
+               config.get('region'), config['cache'])
+        with cls.lock:
+            index = cls.indexes.get(key)
+            if index is None or (
+                    time.time() - index.created > config['cache_period'] * 60):
+                index = cls.indexes[key] = cls(manager)
+            return index
+
+    @classmethod
+    def clear(cls):
+        with cls.lock:
+            cls.indexes.clear()
+
+    def add(self, resources):
+        for r in resources:
+            self.resources[r[self.id_key]] = r
+
+    def get_resources(self, ids, fetch_threshold=10):
+        """Return a mapping of id to resource for the given ids.
+
+        Ids not yet indexed are fetched by id if there are fewer than
+        fetch_threshold of them, else the full resource set is indexed.
+        """
+        with self.lock:
+            misses = [i for i in ids
+                      if i not in self.resources and i not in self.missing]
+            if misses and not self.complete:
+                if len(misses) < fetch_threshold:
+                    self.add(self.manager.get_resources(misses))
+                    self.missing.update(
+                        i for i in misses if i not in self.resources)
+                else:
+                    self.add(self.manager.resources())
+                    self.complete = True
+            return {i: self.resources[i] for i in ids if i in self.resources}
+
+    def all_resources(self):
+        with self.lock:
+            if not self.complete:
+                self.add(self.manager.resources())
+                self.complete = True
+            return list(self.resources.values())
+
+
 class RelatedResourceFilter(ValueFilter):
 
     schema_alias = False
@@ -38,15 +111,9 @@ class RelatedResourceFilter(ValueFilter):
             "[].%s" % self.RelatedIdsExpression, resources))
 
     def get_related(self, resources):
-        resource_manager = self.get_resource_manager()
-        related_ids = self.get_related_ids(resources)
-        model = resource_manager.get_model()
-        if len(related_ids) < self.FetchThreshold:
-            related = resource_manager.get_resources(list(related_ids))
-        else:
-            related = resource_manager.resources()
-        return {r[model.id]: r for r in related
-                if r[model.id] in related_ids}
+        index = RelatedResourceIndex.get_index(self.get_resource_manager())
+        return index.get_resources(
+            self.get_related_ids(resources), self.FetchThreshold)
 
     def get_resource_manager(self):
         mod_path, class_name = self.RelatedResource.rsplit('.', 1)
@@ -111,11 +178,11 @@ class RelatedResourceByIdFilter(RelatedResourceFilter):
     RelatedResourceByIdExpression = None
 
     def get_related(self, resources):
-        resource_manager = self.get_resource_manager()
+        index = RelatedResourceIndex.get_index(self.get_resource_manager())
         related_ids = self.get_related_ids(resources)
 
         related = {}
-        for r in resource_manager.resources():
+        for r in index.all_resources():
             matched_vpc = self.get_related_by_ids(r) & related_ids
             if matched_vpc:
                 for vpc in matched_vpc:
@@ -69,8 +69,15 @@ class SchemaValidator:
     def _gen_schema(self, resource_types):
         if schema is None:
             raise RuntimeError("missing jsonschema dependency")
-        rt_schema = schema.generate(resource_types)
-        schema.JsonSchemaValidator.check_schema(rt_schema)
+        cache = schema.SchemaCache.from_env()
+        rt_schema = None
+        if cache:
+            key, rt_schema = cache.load(resource_types)
+        if rt_schema is None:
+            rt_schema = schema.generate(resource_types)
+            schema.JsonSchemaValidator.check_schema(rt_schema)
+            if cache:
+                cache.save(key, rt_schema)
         return schema.JsonSchemaValidator(rt_schema)
 
 
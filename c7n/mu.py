@@ -16,6 +16,7 @@ import os
 import shutil
 import time
 import tempfile
+import threading
 import zipfile
 
 
@@ -116,13 +117,21 @@ class PythonPackageArchive:
         files, including compiled modules. You'll have to add such files
         manually using :py:meth:`add_file`.
         """
+        for src, dest in self.module_files(ignore, modules):
+            self.add_file(src, dest)
+
+    @classmethod
+    def module_files(cls, ignore, modules):
+        """Yield the ``(source path, archive path)`` of each file that
+        :py:meth:`add_modules` would add for the named modules.
+        """
         for module_name in modules:
             module = importlib.import_module(module_name)
 
             if hasattr(module, '__path__'):
                 # https://docs.python.org/3/reference/import.html#module-path
                 for directory in module.__path__:
-                    self.add_directory(directory, ignore)
+                    yield from cls.directory_files(directory, ignore)
                 if getattr(module, '__file__', None) is None:
 
                     # Likely a namespace package. Try to add *.pth files so
@@ -133,7 +142,7 @@ class PythonPackageArchive:
                         s = filename.startswith
                         e = filename.endswith
                         if s(module_name) and e('-nspkg.pth'):
-                            self.add_file(os.path.join(sitedir, filename))
+                            yield os.path.join(sitedir, filename), filename
 
             elif hasattr(module, '__file__'):
                 # https://docs.python.org/3/reference/import.html#__file__
@@ -150,11 +159,16 @@ class PythonPackageArchive:
                     raise ValueError(
                         'We need a *.py source file instead of ' + path)
 
-                self.add_file(path)
+                yield path, os.path.basename(path)
 
     def add_directory(self, path, ignore=None):
         """Add ``*.py`` files under the directory ``path`` to the archive.
         """
+        for src, dest in self.directory_files(path, ignore):
+            self.add_file(src, dest)
+
+    @staticmethod
+    def directory_files(path, ignore=None):
         for root, dirs, files in os.walk(path):
             arc_prefix = os.path.relpath(root, os.path.dirname(path))
             # py3 remove pyc cache dirs.
@@ -171,7 +185,7 @@ class PythonPackageArchive:
                     continue
                 f_path = os.path.join(root, f)
 
-                self.add_file(f_path, dest_path)
+                yield f_path, dest_path
 
     def add_file(self, src, dest=None):
         """Add the file at ``src`` to the archive.
@@ -360,7 +374,31 @@ def custodian_archive(packages=None):
     modules = {'c7n'}
     if packages:
         modules = filter(None, modules.union(packages))
-    return PythonPackageArchive(sorted(modules))
+    modules = sorted(modules)
+
+    # Zipping the package sources dominates provisioning time, so we
+    # compress each distinct set of module contents once and hand out
+    # copies of it for the per function files to be appended to.
+    key = modules_checksum(modules)
+    with _archive_lock:
+        base = _archive_cache.get(key)
+        if base is None:
+            base = _archive_cache[key] = PythonPackageArchive(modules).close()
+    return PythonPackageArchive(cache_file=base.path)
+
+
+_archive_cache = {}
+_archive_lock = threading.Lock()
+
+
+def modules_checksum(modules, hasher=hashlib.sha256):
+    """Return a hex digest of the archive paths and contents of modules."""
+    h = hasher()
+    for src, dest in PythonPackageArchive.module_files(None, modules):
+        h.update(dest.encode('utf8'))
+        with open(src, 'rb') as fh:
+            checksum(fh, h)
+    return h.hexdigest()
 
 
 class LambdaManager:
@@ -457,22 +495,17 @@ class LambdaManager:
         archive = func.get_archive()
         existing = self.get(func.name, qualifier)
 
-        if s3_uri:
-            # TODO: support versioned buckets
-            bucket, key = self._upload_func(s3_uri, func, archive)
-            code_ref = {'S3Bucket': bucket, 'S3Key': key}
-        else:
-            code_ref = {'ZipFile': archive.get_bytes()}
-
         changed = False
         if existing:
             result = old_config = existing['Configuration']
             if archive.get_checksum() != old_config['CodeSha256']:
                 log.debug("Updating function %s code", func.name)
                 params = dict(FunctionName=func.name, Publish=True)
-                params.update(code_ref)
+                params.update(self._get_code_ref(s3_uri, func, archive))
                 result = self.client.update_function_code(**params)
                 changed = True
+            else:
+                log.debug("Function %s code unchanged", func.name)
 
             # TODO/Consider also set publish above to false, and publish
             # after configuration change?
@@ -494,7 +527,10 @@ class LambdaManager:
         else:
             log.info('Publishing custodian policy lambda function %s', func.name)
             params = func.get_config()
-            params.update({'Publish': True, 'Code': code_ref, 'Role': role})
+            params.update({
+                'Publish': True,
+                'Code': self._get_code_ref(s3_uri, func, archive),
+                'Role': role})
             result = self.client.create_function(**params)
             self._update_concurrency(None, func)
             changed = True
@@ -537,6 +573,13 @@ class LambdaManager:
             changed = True
         return changed
 
+    def _get_code_ref(self, s3_uri, func, archive):
+        if s3_uri:
+            # TODO: support versioned buckets
+            bucket, key = self._upload_func(s3_uri, func, archive)
+            return {'S3Bucket': bucket, 'S3Key': key}
+        return {'ZipFile': archive.get_bytes()}
+
     def _upload_func(self, s3_uri, func, archive):
         from boto3.s3.transfer import S3Transfer, TransferConfig
         _, bucket, key_prefix = parse_s3(s3_uri)
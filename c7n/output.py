@@ -10,6 +10,8 @@ See docs/usage/outputs.rst
 import contextlib
 import datetime
 import gzip
+import io
+import json
 import logging
 import os
 import shutil
@@ -20,7 +22,7 @@ import uuid
 
 from c7n.exceptions import InvalidOutputConfig
 from c7n.registry import PluginRegistry
-from c7n.utils import parse_url_config
+from c7n.utils import DateTimeEncoder, parse_url_config
 
 try:
     import psutil
@@ -28,6 +30,12 @@ try:
 except ImportError:
     HAVE_PSUTIL = False
 
+try:
+    import zstandard
+    HAVE_ZSTD = True
+except ImportError:
+    HAVE_ZSTD = False
+
 log = logging.getLogger('custodian.output')
 
 
@@ -382,6 +390,81 @@ class NullLog(LogOutput):
         return None
 
 
+# Formats for a policy's resources record file, json is the legacy
+# pretty printed document, the others are compact json lines.
+RESOURCE_FORMATS = ('json', 'jsonl', 'jsonl.gz', 'jsonl.zst')
+COMPRESSED_SUFFIXES = ('.gz', '.zst')
+
+
+def get_resources_file(resources_format=None):
+    return 'resources.%s' % (resources_format or 'json')
+
+
+class JsonLinesWriter:
+    """Stream records as compact json lines into a plain, gzip or zstd file.
+
+    Records are serialized one at a time straight into the (compressed)
+    file, so large result sets are never rendered as a single document
+    and the output needs no separate compression pass.
+    """
+
+    compress_level = 7
+
+    def __init__(self, path):
+        self.path = path
+        self.fh = None
+        self.count = 0
+
+    def __enter__(self):
+        if self.path.endswith('.gz'):
+            self.fh = gzip.open(
+                self.path, 'wt', encoding='utf8', compresslevel=self.compress_level)
+        elif self.path.endswith('.zst'):
+            if not HAVE_ZSTD:
+                raise InvalidOutputConfig(
+                    "zstandard package required for %s" % self.path)
+            self.fh = io.TextIOWrapper(
+                zstandard.ZstdCompressor(level=self.compress_level).stream_writer(
+                    open(self.path, 'wb')),
+                encoding='utf8')
+        else:
+            self.fh = open(self.path, 'w', encoding='utf8')
+        return self
+
+    def __exit__(self, exc_type=None, exc_value=None, exc_traceback=None):
+        self.fh.close()
+
+    def write(self, record):
+        self.fh.write(json.dumps(record, cls=DateTimeEncoder, separators=(',', ':')))
+        self.fh.write('\n')
+        self.count += 1
+
+    def write_records(self, records):
+        for r in records:
+            self.write(r)
+        return self.count
+
+
+def load_records(fileobj, name):
+    """Load the records in a binary file object, using the name's suffix for format.
+
+    Understands the legacy resources.json document, plain or gzipped,
+    along with json lines in plain, gzip or zstd form.
+    """
+    if name.endswith('.gz'):
+        fileobj = gzip.GzipFile(fileobj=fileobj)
+    elif name.endswith('.zst'):
+        if not HAVE_ZSTD:
+            raise InvalidOutputConfig("zstandard package required for %s" % name)
+        fileobj = zstandard.ZstdDecompressor().stream_reader(fileobj)
+    if name.endswith(COMPRESSED_SUFFIXES):
+        name = name.rsplit('.', 1)[0]
+    if not name.endswith('.jsonl'):
+        return json.load(fileobj)
+    return [json.loads(line) for line in io.TextIOWrapper(fileobj, encoding='utf8')
+            if line.strip()]
+
+
 @blob_outputs.register('null')
 class NullBlobOutput:
     # default - for unit tests
@@ -433,6 +516,9 @@ class DirectoryOutput:
         # downloading tar and extracting.
         for root, dirs, files in os.walk(self.root_dir):
             for f in files:
+                # streamed record files are already compressed
+                if f.endswith(COMPRESSED_SUFFIXES):
+                    continue
                 fp = os.path.join(root, f)
                 with gzip.open(fp + ".gz", "wb", compresslevel=7) as zfh:
                     with open(fp, "rb") as sfh:
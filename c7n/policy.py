@@ -16,9 +16,12 @@ from c7n.ctx import ExecutionContext
 from c7n.exceptions import PolicyValidationError, ClientError, ResourceLimitExceeded
 from c7n.filters import FilterRegistry, And, Or, Not
 from c7n.manager import iter_filters
-from c7n.output import DEFAULT_NAMESPACE, NullBlobOutput
+from c7n.output import (
+    DEFAULT_NAMESPACE, RESOURCE_FORMATS, JsonLinesWriter, NullBlobOutput,
+    get_resources_file)
 from c7n.resources import load_resources
 from c7n.registry import PluginRegistry
+from c7n.tags import flush_tag_schedulers
 from c7n.provider import clouds, get_resource_class
 from c7n import utils
 from c7n.version import version
@@ -299,8 +302,7 @@ class PullMode(PolicyExecutionMode):
                 "ResourceCount", len(resources), "Count", Scope="Policy")
             self.policy.ctx.metrics.put_metric(
                 "ResourceTime", rt, "Seconds", Scope="Policy")
-            self.policy._write_file(
-                'resources.json', utils.dumps(resources, indent=2))
+            self.policy._write_resources(resources)
 
             if not resources:
                 return []
@@ -310,19 +312,22 @@ class PullMode(PolicyExecutionMode):
                 return resources
 
             at = time.time()
-            for a in self.policy.resource_manager.actions:
-                s = time.time()
-                with self.policy.ctx.tracer.subsegment('action:%s' % a.type):
-                    results = a.process(resources)
-                self.policy.log.info(
-                    "policy:%s action:%s"
-                    " resources:%d"
-                    " execution_time:%0.2f" % (
-                        self.policy.name, a.name,
-                        len(resources), time.time() - s))
-                if results:
-                    self.policy._write_file(
-                        "action-%s" % a.name, utils.dumps(results))
+            try:
+                for a in self.policy.resource_manager.actions:
+                    s = time.time()
+                    with self.policy.ctx.tracer.subsegment('action:%s' % a.type):
+                        results = a.process(resources)
+                    self.policy.log.info(
+                        "policy:%s action:%s"
+                        " resources:%d"
+                        " execution_time:%0.2f" % (
+                            self.policy.name, a.name,
+                            len(resources), time.time() - s))
+                    if results:
+                        self.policy._write_file(
+                            "action-%s" % a.name, utils.dumps(results))
+            finally:
+                flush_tag_schedulers(self.policy.resource_manager)
             self.policy.ctx.metrics.put_metric(
                 "ActionTime", time.time() - at, "Seconds", Scope="Policy")
             return resources
@@ -470,19 +475,21 @@ class LambdaMode(ServerlessExecutionMode):
                 self.policy.log.info(
                     "Invoking actions %s", self.policy.resource_manager.actions)
 
-            self.policy._write_file(
-                'resources.json', utils.dumps(resources, indent=2))
+            self.policy._write_resources(resources)
 
-            for action in self.policy.resource_manager.actions:
-                self.policy.log.info(
-                    "policy:%s invoking action:%s resources:%d",
-                    self.policy.name, action.name, len(resources))
-                if isinstance(action, EventAction):
-                    results = action.process(resources, event)
-                else:
-                    results = action.process(resources)
-                self.policy._write_file(
-                    "action-%s" % action.name, utils.dumps(results))
+            try:
+                for action in self.policy.resource_manager.actions:
+                    self.policy.log.info(
+                        "policy:%s invoking action:%s resources:%d",
+                        self.policy.name, action.name, len(resources))
+                    if isinstance(action, EventAction):
+                        results = action.process(resources, event)
+                    else:
+                        results = action.process(resources)
+                    self.policy._write_file(
+                        "action-%s" % action.name, utils.dumps(results))
+            finally:
+                flush_tag_schedulers(self.policy.resource_manager)
         return resources
 
     def provision(self):
@@ -1191,6 +1198,24 @@ class Policy:
         with open(os.path.join(self.ctx.log_dir, rel_path), 'w') as fh:
             fh.write(value)
 
+    def _write_resources(self, resources):
+        if isinstance(self.ctx.output, NullBlobOutput):
+            return
+        resources_format = self.options.get('resources_format') or 'json'
+        path = os.path.join(self.ctx.log_dir, get_resources_file(resources_format))
+        # remove output of a previous run in another format, so it's never
+        # read in place of this one.
+        for other_format in RESOURCE_FORMATS:
+            other_path = os.path.join(self.ctx.log_dir, get_resources_file(other_format))
+            if other_path != path and os.path.exists(other_path):
+                os.remove(other_path)
+        if resources_format == 'json':
+            with open(path, 'w') as fh:
+                utils.dumps(resources, fh, indent=2)
+            return
+        with JsonLinesWriter(path) as writer:
+            writer.write_records(resources)
+
     def load_resource_manager(self):
         factory = get_resource_class(self.data.get('resource'))
         return factory(self.ctx, self.data)
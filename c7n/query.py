@@ -9,6 +9,7 @@ from concurrent.futures import as_completed
 import functools
 import itertools
 import json
+import time
 
 import jmespath
 import os
@@ -16,11 +17,12 @@ import os
 from c7n.actions import ActionRegistry
 from c7n.exceptions import ClientError, ResourceLimitExceeded, PolicyExecutionError
 from c7n.filters import FilterRegistry, MetricsFilter
-from c7n.manager import ResourceManager
+from c7n.manager import ResourceManager, iter_filters
 from c7n.registry import PluginRegistry
 from c7n.tags import register_ec2_tags, register_universal_tags
 from c7n.utils import (
-    local_session, generate_arn, get_retry, chunks, camelResource)
+    local_session, generate_arn, get_retry, chunks, camelResource, backoff_delays,
+    is_throttle_error, THROTTLES)
 
 
 try:
@@ -64,6 +66,23 @@ class ResourceQuery:
 
         return data
 
+    def _invoke_client_enum_pages(self, client, enum_op, params, path, retry=None):
+        if client.can_paginate(enum_op):
+            p = client.get_paginator(enum_op)
+            if retry:
+                p.PAGE_ITERATOR_CLS = RetryPageIterator
+            pages = p.paginate(**params)
+        else:
+            op = getattr(client, enum_op)
+            pages = [op(**params)]
+
+        if path:
+            path = jmespath.compile(path)
+        for data in pages:
+            if path:
+                data = path.search(data)
+            yield data or []
+
     def filter(self, resource_manager, **params):
         """Query a set of resources."""
         m = self.resolve(resource_manager.resource_type)
@@ -76,6 +95,18 @@ class ResourceQuery:
             client, enum_op, params, path,
             getattr(resource_manager, 'retry', None)) or []
 
+    def filter_pages(self, resource_manager, **params):
+        """Query a set of resources, yielding a list of resources per api page."""
+        m = self.resolve(resource_manager.resource_type)
+        client = local_session(self.session_factory).client(
+            m.service, resource_manager.config.region)
+        enum_op, path, extra_args = m.enum_spec
+        if extra_args:
+            params.update(extra_args)
+        return self._invoke_client_enum_pages(
+            client, enum_op, params, path,
+            getattr(resource_manager, 'retry', None))
+
     def get(self, resource_manager, identities):
         """Get resources by identities
         """
@@ -221,6 +252,17 @@ class DescribeSource:
     def resources(self, query):
         return self.query.filter(self.manager, **query)
 
+    def resources_pages(self, query):
+        """Iterate over resources a page at a time.
+
+        Sources and queries which customize enumeration yield their
+        results as a single page.
+        """
+        if (type(self).resources is DescribeSource.resources and
+                type(self.query).filter is ResourceQuery.filter):
+            return self.query.filter_pages(self.manager, **query)
+        return iter([self.resources(query)])
+
     def get_query(self):
         return self.resource_query_factory(self.manager.session_factory)
 
@@ -277,15 +319,58 @@ class ConfigSource:
 
     retry = staticmethod(get_retry(('ThrottlingException',)))
 
+    # batch get api limit, and bound for its adaptive concurrency.
+    batch_size = 100
+    batch_max_concurrency = 8
+    batch_max_rounds = 8
+
+    # config resource types which don't support batch get, these
+    # fallback to fetching config history per resource.
+    batch_unsupported = set()
+    # batch get errors which fallback to config history, access denied
+    # covers execution roles predating the batch get permission.
+    batch_fallback_errors = (
+        'ValidationException', 'AccessDeniedException', 'AccessDenied')
+
     def __init__(self, manager):
         self.manager = manager
 
     def get_permissions(self):
         return ["config:GetResourceConfigHistory",
+                "config:BatchGetResourceConfig",
                 "config:ListDiscoveredResources"]
 
     def get_resources(self, ids, cache=True):
         client = local_session(self.manager.session_factory).client('config')
+        config_type = self.manager.get_model().config_type
+        if config_type not in self.batch_unsupported:
+            try:
+                return self.get_batch_resources(client, ids)
+            except ClientError as e:
+                code = e.response['Error']['Code']
+                if code not in self.batch_fallback_errors:
+                    raise
+                self.manager.log.debug(
+                    "config batch get failed for %s error:%s, using config history",
+                    config_type, code)
+                if code == 'ValidationException':
+                    self.batch_unsupported.add(config_type)
+
+        results = []
+        with self.manager.executor_factory(max_workers=2) as w:
+            futures = [
+                w.submit(self.get_history_resources, client, resource_set)
+                for resource_set in chunks(ids, 50)]
+            for f in as_completed(futures):
+                if f.exception():
+                    self.manager.log.error(
+                        "Exception getting resources from config \n %s" % (
+                            f.exception()))
+                    continue
+                results.extend(f.result())
+        return results
+
+    def get_history_resources(self, client, ids):
         results = []
         m = self.manager.get_model()
         for i in ids:
@@ -299,6 +384,80 @@ class ConfigSource:
             results.append(self.load_resource(revisions[0]))
         return list(filter(None, results))
 
+    def get_batch_resources(self, client, ids):
+        """Fetch resources with config's batch get api.
+
+        Batches are fetched concurrently through the api's adaptive
+        limiter, throttled batches are retried after a backoff, and
+        resources are loaded as each batch completes.
+        """
+        config_type = self.manager.get_model().config_type
+        batches = list(chunks(
+            [{'resourceType': config_type, 'resourceId': i} for i in ids],
+            self.batch_size))
+        delays = backoff_delays(1, 30, jitter=True)
+        results = []
+        limiter = self.get_batch_limiter()
+
+        for attempt in range(self.batch_max_rounds):
+            if not batches:
+                break
+            retries = []
+            throttled = False
+            with self.manager.executor_factory(
+                    max_workers=limiter.concurrency) as w:
+                futures = {
+                    w.submit(self.get_batch, limiter, client, b): b
+                    for b in batches}
+                for f in as_completed(futures):
+                    e = f.exception()
+                    if e is not None and is_throttle_error(e):
+                        throttled = True
+                        retries.append(futures[f])
+                        continue
+                    elif (isinstance(e, ClientError) and
+                            e.response['Error']['Code'] in self.batch_fallback_errors):
+                        raise e
+                    elif e is not None:
+                        self.manager.log.error(
+                            "Exception getting resources from config \n %s" % e)
+                        continue
+                    response = f.result()
+                    results.extend(filter(None, map(
+                        self.load_batch_item, response.get('baseConfigurationItems', ()))))
+                    if response.get('unprocessedResourceKeys'):
+                        retries.append(response['unprocessedResourceKeys'])
+            if throttled:
+                time.sleep(next(delays))
+            batches = retries
+
+        if batches:
+            self.manager.log.warning(
+                "config batch get unable to retrieve %d %s resources",
+                sum(map(len, batches)), config_type)
+        return results
+
+    def get_batch_limiter(self):
+        return THROTTLES.get(
+            'config', self.manager.region, 'batch_get_resource_config',
+            self.batch_max_concurrency)
+
+    def get_batch(self, limiter, client, resource_keys):
+        with limiter.slot():
+            return client.batch_get_resource_config(resourceKeys=resource_keys)
+
+    def load_batch_item(self, item):
+        # batch get items lack the tags mapping of config history items,
+        # fill it in from supplementary configuration where available.
+        if 'tags' not in item:
+            stags = item.get('supplementaryConfiguration', {}).get('Tags') or {}
+            if isinstance(stags, str):
+                stags = json.loads(stags)
+            if isinstance(stags, list):
+                stags = {t['key']: t['value'] for t in stags}
+            item['tags'] = stags
+        return self.load_resource(item)
+
     def get_query_params(self, query):
         """Parse config select expression from policy and parameter.
 
@@ -372,27 +531,14 @@ class ConfigSource:
         paginator.PAGE_ITERATOR_CLS = RetryPageIterator
         pages = paginator.paginate(
             resourceType=self.manager.get_model().config_type)
-        results = []
-
-        with self.manager.executor_factory(max_workers=2) as w:
-            ridents = pages.build_full_result()
-            resource_ids = [
-                r['resourceId'] for r in ridents.get('resourceIdentifiers', ())]
-            self.manager.log.debug(
-                "querying %d %s resources",
-                len(resource_ids),
-                self.manager.__class__.__name__.lower())
-
-            for resource_set in chunks(resource_ids, 50):
-                futures = []
-                futures.append(w.submit(self.get_resources, resource_set))
-                for f in as_completed(futures):
-                    if f.exception():
-                        self.manager.log.error(
-                            "Exception getting resources from config \n %s" % (
-                                f.exception()))
-                    results.extend(f.result())
-        return results
+        ridents = pages.build_full_result()
+        resource_ids = [
+            r['resourceId'] for r in ridents.get('resourceIdentifiers', ())]
+        self.manager.log.debug(
+            "querying %d %s resources",
+            len(resource_ids),
+            self.manager.__class__.__name__.lower())
+        return self.get_resources(resource_ids)
 
     def resources(self, query=None):
         client = local_session(self.manager.session_factory).client('config')
@@ -420,6 +566,18 @@ class ConfigSource:
         return resources
 
 
+def split_stream_filters(filters):
+    """Split filters at the first one which needs the full resource set.
+
+    Returns the filters which can be applied to pages of resources, and
+    the remainder to apply once enumeration has completed.
+    """
+    for idx, f in enumerate(filters):
+        if any(getattr(sf, 'stream_barrier', False) for sf in iter_filters([f])):
+            return filters[:idx], filters[idx:]
+    return filters, []
+
+
 class QueryResourceManager(ResourceManager, metaclass=QueryMeta):
 
     resource_type = ""
@@ -504,16 +662,22 @@ class QueryResourceManager(ResourceManager, metaclass=QueryMeta):
                                self.__class__.__name__),
                     len(resources)))
 
-        if resources is None:
-            if query is None:
-                query = {}
-            with self.ctx.tracer.subsegment('resource-fetch'):
-                resources = self.source.resources(query)
-            if augment:
-                with self.ctx.tracer.subsegment('resource-augment'):
-                    resources = self.augment(resources)
-                # Don't pollute cache with unaugmented resources.
-                self._cache.save(cache_key, resources)
+        if resources is None and augment and self.data.get('stream'):
+            resources, resource_count = self._stream_resources(query)
+            if self.data == self.ctx.policy.data:
+                self.check_resource_limit(len(resources), resource_count)
+            return resources
+        elif resources is None and augment:
+            # Only one worker sharing the cache fills a given key, the
+            # others wait and pick up its results.
+            with self._cache.fill_lock(cache_key):
+                resources = self._cache.get(cache_key)
+                if resources is None:
+                    resources = self._fetch_resources(query, augment)
+                    self._cache.save(cache_key, resources)
+        elif resources is None:
+            # Don't pollute cache with unaugmented resources.
+            resources = self._fetch_resources(query, augment)
 
         resource_count = len(resources)
         with self.ctx.tracer.subsegment('filter'):
@@ -524,6 +688,44 @@ class QueryResourceManager(ResourceManager, metaclass=QueryMeta):
             self.check_resource_limit(len(resources), resource_count)
         return resources
 
+    def _fetch_resources(self, query, augment=True):
+        if query is None:
+            query = {}
+        with self.ctx.tracer.subsegment('resource-fetch'):
+            resources = self.source.resources(query)
+        if augment:
+            with self.ctx.tracer.subsegment('resource-augment'):
+                resources = self.augment(resources)
+        return resources
+
+    def _stream_resources(self, query):
+        """Enumerate, augment and filter resources a page at a time.
+
+        Peak memory is bounded by page size plus matched resources.
+        Filters which operate on the resource set as a whole (ie. reduce)
+        are barriers, they and the filters following them are applied
+        once all pages have been processed. Streamed results are not
+        cached.
+        """
+        if query is None:
+            query = {}
+        stream_filters, barrier_filters = split_stream_filters(self.filters)
+        resource_count = 0
+        resources = []
+        if hasattr(self.source, 'resources_pages'):
+            pages = self.source.resources_pages(query)
+        else:
+            pages = [self.source.resources(query)]
+        for page in pages:
+            resource_count += len(page)
+            with self.ctx.tracer.subsegment('resource-augment'):
+                page = self.augment(page)
+            with self.ctx.tracer.subsegment('filter'):
+                resources.extend(self.filter_resources(page, filters=stream_filters))
+        with self.ctx.tracer.subsegment('filter'):
+            resources = self.filter_resources(resources, filters=barrier_filters)
+        return resources, resource_count
+
     def check_resource_limit(self, selection_count, population_count):
         """Check if policy's execution affects more resources then its limit.
 
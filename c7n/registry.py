@@ -41,6 +41,10 @@ class PluginRegistry:
         self.plugin_type = plugin_type
         self._factories = {}
         self._subscribers = []
+        # count of changes, and modules of registered classes, these
+        # identify the registry's contents for schema caching.
+        self.generation = 0
+        self.modules = set()
 
     def subscribe(self, func):
         self._subscribers.append(func)
@@ -54,22 +58,28 @@ class PluginRegistry:
         if klass:
             klass.type = name
             klass.type_aliases = aliases
-            self._factories[name] = klass
+            self._add(name, klass)
             return klass
 
         # invoked as class decorator
         def _register_class(klass):
             if not condition:
                 return klass
-            self._factories[name] = klass
+            self._add(name, klass)
             klass.type = name
             klass.type_aliases = aliases
             return klass
         return _register_class
 
+    def _add(self, name, klass):
+        self._factories[name] = klass
+        self.generation += 1
+        self.modules.add(klass.__module__)
+
     def unregister(self, name):
         if name in self._factories:
             del self._factories[name]
+            self.generation += 1
 
     def notify(self, key=None):
         for subscriber in self._subscribers:
@@ -26,28 +26,35 @@ CLI Usage
    $ custodian report -s s3://cloud-custodian-xyz/policies \\
      -p ec2-tag-compliance-terminate -v > terminated.csv
 
+Passing ``--index ~/.cache/c7n-report.db`` keeps a local index of the
+output objects already fetched, so subsequent reports over the same
+history only download objects written since the last report.
 
 """
 from concurrent.futures import as_completed
 
 import csv
 from datetime import datetime
-import gzip
 import io
 import json
 import jmespath
 import logging
 import os
+import sqlite3
 from tabulate import tabulate
 
 from botocore.compat import OrderedDict
 from dateutil.parser import parse as date_parse
 
 from c7n.executor import ThreadPoolExecutor
-from c7n.utils import local_session, dumps
+from c7n.output import RESOURCE_FORMATS, get_resources_file, load_records
+from c7n.utils import chunks, local_session, dumps
 
 log = logging.getLogger('custodian.reports')
 
+# compressed record files as uploaded to blob storage
+RECORD_SUFFIXES = ('resources.json.gz', 'resources.jsonl.gz', 'resources.jsonl.zst')
+
 
 def report(policies, start_date, options, output_fh, raw_output_fh=None):
     """Format a policy's extant records into a report."""
@@ -61,6 +68,10 @@ def report(policies, start_date, options, output_fh, raw_output_fh=None):
         include_policy=len(policy_names) > 1
     )
 
+    index = None
+    if getattr(options, 'index', None):
+        index = ReportIndex(options.index)
+
     records = []
     for policy in policies:
         # initialize policy execution context for output access
@@ -70,7 +81,8 @@ def report(policies, start_date, options, output_fh, raw_output_fh=None):
                 policy.session_factory,
                 policy.ctx.output.config['netloc'],
                 policy.ctx.output.config['path'].strip('/'),
-                start_date)
+                start_date,
+                index=index)
         else:
             policy_records = fs_record_set(policy.ctx.log_dir, policy.name)
 
@@ -82,6 +94,9 @@ def report(policies, start_date, options, output_fh, raw_output_fh=None):
 
         records += policy_records
 
+    if index is not None:
+        index.close()
+
     rows = formatter.to_csv(records)
 
     if options.format == 'csv':
@@ -207,30 +222,37 @@ class Formatter:
 
 
 def fs_record_set(output_path, policy_name):
-    record_path = os.path.join(output_path, 'resources.json')
-
-    if not os.path.exists(record_path):
+    # with files of several formats, the most recently written is current.
+    record_paths = [
+        os.path.join(output_path, get_resources_file(resources_format))
+        for resources_format in RESOURCE_FORMATS]
+    record_paths = [p for p in record_paths if os.path.exists(p)]
+    if not record_paths:
         return []
+    record_path = max(record_paths, key=lambda p: os.stat(p).st_mtime)
 
     mdate = datetime.fromtimestamp(
         os.stat(record_path).st_ctime)
 
-    with open(record_path) as fh:
-        records = json.load(fh)
+    with open(record_path, 'rb') as fh:
+        records = load_records(fh, record_path)
         [r.__setitem__('CustodianDate', mdate) for r in records]
         return records
 
 
-def record_set(session_factory, bucket, key_prefix, start_date, specify_hour=False):
+def record_set(session_factory, bucket, key_prefix, start_date, specify_hour=False,
+               index=None):
     """Retrieve all s3 records for the given policy output url
 
-    From the given start date.
+    From the given start date. With a :class:`ReportIndex` only objects
+    not already ingested (or changed since) are downloaded, the rest are
+    read from the index.
     """
 
     s3 = local_session(session_factory).client('s3')
 
     records = []
-    key_count = 0
+    key_count = fetch_count = 0
 
     date = start_date.strftime('%Y/%m/%d')
     if specify_hour:
@@ -251,16 +273,28 @@ def record_set(session_factory, bucket, key_prefix, start_date, specify_hour=Fal
             if 'Contents' not in key_set:
                 continue
             keys = [k for k in key_set['Contents']
-                    if k['Key'].endswith('resources.json.gz')]
+                    if k['Key'].endswith(RECORD_SUFFIXES)]
             key_count += len(keys)
-            futures = map(lambda k: w.submit(
-                get_records, bucket, k, session_factory), keys)
+            if index is not None:
+                ingested = index.get_ingested(bucket, [k['Key'] for k in keys])
+                records.extend(index.get_records(bucket, [
+                    k['Key'] for k in keys if ingested.get(k['Key']) == k.get('ETag')]))
+                keys = [k for k in keys if ingested.get(k['Key']) != k.get('ETag')]
+                fetch_count += len(keys)
+            futures = {w.submit(get_records, bucket, k, session_factory): k for k in keys}
 
             for f in as_completed(futures):
-                records.extend(f.result())
-
-    log.info("Fetched %d records across %d files" % (
-        len(records), key_count))
+                key_records = f.result()
+                if index is not None:
+                    index.ingest(bucket, futures[f], key_records)
+                records.extend(key_records)
+
+    if index is not None:
+        log.info("Fetched %d records across %d files, downloaded %d files" % (
+            len(records), key_count, fetch_count))
+    else:
+        log.info("Fetched %d records across %d files" % (
+            len(records), key_count))
     return records
 
 
@@ -269,17 +303,99 @@ def get_records(bucket, key, session_factory):
     # though we're talking about a 10k objects, else
     # we should spool to temp files
 
-    # key ends with 'YYYY/mm/dd/HH/resources.json.gz'
-    # so take the date parts only
-    date_str = '-'.join(key['Key'].rsplit('/', 5)[-5:-1])
-    custodian_date = date_parse(date_str)
+    custodian_date = get_key_date(key['Key'])
     s3 = local_session(session_factory).client('s3')
     result = s3.get_object(Bucket=bucket, Key=key['Key'])
     blob = io.BytesIO(result['Body'].read())
 
-    records = json.load(gzip.GzipFile(fileobj=blob))
+    records = load_records(blob, key['Key'])
     log.debug("bucket: %s key: %s records: %d",
               bucket, key['Key'], len(records))
     for r in records:
         r['CustodianDate'] = custodian_date
     return records
+
+
+def get_key_date(key):
+    # key ends with 'YYYY/mm/dd/HH/resources.json.gz' (or a json lines variant)
+    # so take the date parts only
+    return date_parse('-'.join(key.rsplit('/', 5)[-5:-1]))
+
+
+class ReportIndex:
+    """Local sqlite index of policy output records already fetched from s3.
+
+    A manifest of ingested object keys and etags is kept alongside the
+    records of each object, so a report only downloads objects that were
+    written (or rewritten) since the last report using the same index.
+    """
+
+    create_tables = """
+    create table if not exists report_object (
+        bucket text,
+        key text,
+        etag text,
+        record_date text,
+        record_count integer,
+        primary key (bucket, key)
+    );
+    create table if not exists report_record (
+        bucket text,
+        key text,
+        record text
+    );
+    create index if not exists report_record_key on report_record (bucket, key);
+    """
+
+    # sqlite's default limit on host parameters is 999
+    batch_size = 500
+
+    def __init__(self, path):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        directory = os.path.dirname(self.path)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        with self.conn as cursor:
+            cursor.executescript(self.create_tables)
+
+    def close(self):
+        self.conn.close()
+
+    def get_ingested(self, bucket, keys):
+        """Return a mapping of the already ingested keys to their etags."""
+        ingested = {}
+        for key_set in chunks(keys, self.batch_size):
+            ingested.update(self.conn.execute(
+                'select key, etag from report_object where bucket = ? and key in (%s)' % (
+                    ','.join('?' * len(key_set))),
+                [bucket] + list(key_set)).fetchall())
+        return ingested
+
+    def ingest(self, bucket, key, records):
+        with self.conn as cursor:
+            cursor.execute(
+                'delete from report_record where bucket = ? and key = ?',
+                (bucket, key['Key']))
+            cursor.executemany(
+                'insert into report_record (bucket, key, record) values (?, ?, ?)',
+                [(bucket, key['Key'], dumps(r)) for r in records])
+            cursor.execute(
+                'replace into report_object values (?, ?, ?, ?, ?)',
+                (bucket, key['Key'], key.get('ETag'),
+                 get_key_date(key['Key']).isoformat(), len(records)))
+
+    def get_records(self, bucket, keys):
+        records = []
+        dates = {}
+        for key_set in chunks(keys, self.batch_size):
+            for key, record in self.conn.execute(
+                    'select key, record from report_record where bucket = ? and key in (%s)' % (
+                        ','.join('?' * len(key_set))),
+                    [bucket] + list(key_set)):
+                if key not in dates:
+                    dates[key] = get_key_date(key)
+                r = json.loads(record)
+                r['CustodianDate'] = dates[key]
+                records.append(r)
+        return records
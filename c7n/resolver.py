@@ -1,17 +1,22 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
 import csv
+import hashlib
 import io
 import jmespath
 import json
 import os.path
 import logging
 import itertools
+import threading
+import time
+from urllib.error import HTTPError
 from urllib.request import Request, urlopen
 from urllib.parse import parse_qsl, urlparse
 import zlib
 from contextlib import closing
 
+from c7n.exceptions import ClientError
 from c7n.utils import format_string_values
 
 log = logging.getLogger('custodian.resolver')
@@ -44,6 +49,33 @@ class URIResolver:
             self.cache.save(("uri-resolver", uri), contents)
         return contents
 
+    def resolve_revision(self, uri, revision=None):
+        """Conditionally fetch a uri, given the revision of a previous fetch.
+
+        Returns the contents and the new revision, a dictionary of the
+        content validators (ETag, Last-Modified). The contents are None when
+        the server confirmed the previously fetched revision is current.
+        """
+        revision = revision or {}
+        if uri.startswith('s3://'):
+            return self.get_s3_uri_revision(uri, revision)
+
+        headers = {"Accept-Encoding": "gzip"}
+        if revision.get('ETag'):
+            headers['If-None-Match'] = revision['ETag']
+        if revision.get('Last-Modified'):
+            headers['If-Modified-Since'] = revision['Last-Modified']
+        try:
+            with closing(urlopen(Request(uri, headers=headers))) as response:
+                contents = self.handle_response_encoding(response)
+                info = response.info()
+        except HTTPError as e:
+            if e.code == 304:
+                return None, revision
+            raise
+        return contents, {
+            k: info.get(k) for k in ('ETag', 'Last-Modified') if info.get(k)}
+
     def handle_response_encoding(self, response):
         if response.info().get('Content-Encoding') != 'gzip':
             return response.read().decode('utf-8')
@@ -53,6 +85,10 @@ class URIResolver:
         return data
 
     def get_s3_uri(self, uri):
+        contents, _ = self.get_s3_uri_revision(uri, {})
+        return contents
+
+    def get_s3_uri_revision(self, uri, revision):
         parsed = urlparse(uri)
         client = self.session_factory().client('s3')
         params = dict(
@@ -60,12 +96,18 @@ class URIResolver:
             Key=parsed.path[1:])
         if parsed.query:
             params.update(dict(parse_qsl(parsed.query)))
-        result = client.get_object(**params)
+        if revision.get('ETag'):
+            params['IfNoneMatch'] = revision['ETag']
+        try:
+            result = client.get_object(**params)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('304', 'NotModified'):
+                return None, revision
+            raise
         body = result['Body'].read()
-        if isinstance(body, str):
-            return body
-        else:
-            return body.decode('utf-8')
+        if not isinstance(body, str):
+            body = body.decode('utf-8')
+        return body, {'ETag': result.get('ETag')}
 
 
 class ValuesFrom:
@@ -103,6 +145,15 @@ class ValuesFrom:
     """
     supported_formats = ('json', 'txt', 'csv', 'csv2dict')
 
+    # Fetched contents shared by every policy in the process, keyed by url
+    # along with the revision and digest of the contents and their values
+    # parsed per format and expr. Entries are revalidated with a conditional
+    # fetch once older than revalidate_period seconds, and only reparsed
+    # when the content changed.
+    store = {}
+    store_lock = threading.Lock()
+    revalidate_period = 60
+
     # intent is that callers embed this schema
     schema = {
         'type': 'object',
@@ -127,7 +178,7 @@ class ValuesFrom:
         self.cache = manager._cache
         self.resolver = URIResolver(manager.session_factory, manager._cache)
 
-    def get_contents(self):
+    def get_format(self):
         _, format = os.path.splitext(self.data['url'])
 
         if not format or self.data.get('format'):
@@ -139,6 +190,10 @@ class ValuesFrom:
             raise ValueError(
                 "Unsupported format %s for url %s",
                 format, self.data['url'])
+        return format
+
+    def get_contents(self):
+        format = self.get_format()
         contents = str(self.resolver.resolve(self.data['url']))
         return contents, format
 
@@ -158,8 +213,44 @@ class ValuesFrom:
         return contents
 
     def _get_values(self):
-        contents, format = self.get_contents()
-
+        format = self.get_format()
+        url = self.data['url']
+        with self.store_lock:
+            entry = self.store.get(url)
+        if entry is None or time.time() - entry['checked'] > self.revalidate_period:
+            entry = self._fetch(url, entry)
+
+        key = (format, self.data.get('expr'))
+        if key not in entry['values']:
+            values = freeze(self.parse_values(entry['contents'], format))
+            with self.store_lock:
+                entry['values'].setdefault(key, values)
+        return entry['values'][key]
+
+    def _fetch(self, url, entry):
+        revision = entry and entry['revision'] or None
+        contents = self.cache and self.cache.get(("uri-resolver", url))
+        cached = contents is not None
+        if not cached:
+            contents, revision = self.resolver.resolve_revision(url, revision)
+        if contents is None:
+            entry = dict(entry, checked=time.time())
+        else:
+            contents = str(contents)
+            if self.cache and not cached:
+                self.cache.save(("uri-resolver", url), contents)
+            digest = hashlib.sha256(contents.encode('utf8')).hexdigest()
+            if entry is None or entry['digest'] != digest:
+                if cached:
+                    # the previous revision doesn't describe these contents
+                    revision = {}
+                entry = {'contents': contents, 'digest': digest, 'values': {}}
+            entry = dict(entry, revision=revision or {}, checked=time.time())
+        with self.store_lock:
+            self.store[url] = entry
+        return entry
+
+    def parse_values(self, contents, format):
         if format == 'json':
             data = json.loads(contents)
             if 'expr' in self.data:
@@ -194,3 +285,10 @@ class ValuesFrom:
         if isinstance(res, list):
             res = set(res)
         return res
+
+
+def freeze(values):
+    """Return sets as frozensets, so parsed values can be shared by policies."""
+    if isinstance(values, set):
+        return frozenset(values)
+    return values
@@ -7,6 +7,7 @@ from collections import Counter, namedtuple
 import contextlib
 import copy
 import datetime
+import importlib.util
 import itertools
 import logging
 import os
@@ -50,13 +51,10 @@ from c7n import credentials, utils
 
 log = logging.getLogger('custodian.aws')
 
-try:
-    from aws_xray_sdk.core import xray_recorder, patch
-    from aws_xray_sdk.core.context import Context
-    HAVE_XRAY = True
-except ImportError:
-    HAVE_XRAY = False
-    class Context: pass  # NOQA
+# The xray sdk is only imported when tracing is enabled, as its
+# import cost dominates cli startup otherwise, see load_xray.
+HAVE_XRAY = importlib.util.find_spec('aws_xray_sdk') is not None
+xray_recorder = patch = XrayContext = None
 
 _profile_session = None
 
@@ -297,7 +295,20 @@ class XrayEmitter:
                 TraceSegmentDocuments=[s.serialize() for s in segment_set])
 
 
-class XrayContext(Context):
+def load_xray():
+    """Import the xray sdk on first use and build the custodian xray context."""
+    global xray_recorder, patch, XrayContext
+    if xray_recorder is not None:
+        return xray_recorder
+    from aws_xray_sdk.core import xray_recorder as recorder, patch as xray_patch
+    from aws_xray_sdk.core.context import Context
+    XrayContext = type('XrayContext', (XrayContextMixin, Context), {})
+    patch = xray_patch
+    xray_recorder = recorder
+    return xray_recorder
+
+
+class XrayContextMixin:
     """Specialized XRay Context for Custodian.
 
     A context is used as a segment storage stack for currently in
@@ -317,7 +328,7 @@ class XrayContext(Context):
     """
 
     def __init__(self, *args, **kw):
-        super(XrayContext, self).__init__(*args, **kw)
+        super().__init__(*args, **kw)
         self._local = Bag()
         self._current_subsegment = None
         self._main_tid = threading.get_ident()
@@ -381,6 +392,7 @@ class XrayTracer:
 
     @classmethod
     def initialize(cls, config):
+        load_xray()
         context = XrayContext()
         sampling = config.get('sample', 'true') == 'true' and True or False
         xray_recorder.configure(
@@ -392,6 +404,7 @@ class XrayTracer:
         logging.getLogger('aws_xray_sdk.core').setLevel(logging.ERROR)
 
     def __init__(self, ctx, config):
+        load_xray()
         self.ctx = ctx
         self.config = config or {}
         self.client = None
@@ -449,6 +462,7 @@ class ApiStats(DeltaStats):
     def __init__(self, ctx, config=None):
         super(ApiStats, self).__init__(ctx, config)
         self.api_calls = Counter()
+        self.throttle_stack = []
 
     def get_snapshot(self):
         return dict(self.api_calls)
@@ -456,10 +470,26 @@ class ApiStats(DeltaStats):
     def get_metadata(self):
         return self.get_snapshot()
 
+    def get_throttle_snapshot(self):
+        return {k: s['throttles'] for k, s in utils.THROTTLES.get_stats().items()}
+
+    def get_throttles(self):
+        """Operations throttled since entering, with their adaptive limit.
+
+        Throttle limiters are shared by the process, so counts are reported
+        as the change since entering, like api calls.
+        """
+        before = self.throttle_stack and self.throttle_stack[-1] or {}
+        return {
+            k: {'limit': s['limit'], 'throttles': s['throttles'] - before.get(k, 0)}
+            for k, s in utils.THROTTLES.get_stats().items()
+            if s['throttles'] > before.get(k, 0)}
+
     def __enter__(self):
         if isinstance(self.ctx.session_factory, credentials.SessionFactory):
             self.ctx.session_factory.set_subscribers((self,))
         self.push_snapshot()
+        self.throttle_stack.append(self.get_throttle_snapshot())
 
     def __exit__(self, exc_type=None, exc_value=None, exc_traceback=None):
         if isinstance(self.ctx.session_factory, credentials.SessionFactory):
@@ -473,6 +503,7 @@ class ApiStats(DeltaStats):
         self.ctx.metrics.put_metric(
             "ApiCalls", sum(self.api_calls.values()), "Count")
         self.pop_snapshot()
+        self.throttle_stack.pop()
 
     def __call__(self, s):
         s.events.register(
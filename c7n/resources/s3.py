@@ -7,7 +7,8 @@ Filters:
 The generic Values filters (jmespath) expression and Or filter are
 available with all resources, including buckets, we include several
 additonal bucket data (Tags, Replication, Acl, Policy) as keys within
-a bucket representation.
+a bucket representation. Only the keys the policy's filters and
+actions need are fetched up front, the rest on first access.
 
 Actions:
 
@@ -28,13 +29,17 @@ Actions:
 """
 import copy
 import functools
+import hashlib
 import json
 import itertools
 import logging
 import math
 import os
+import re
+import shutil
 import time
 import ssl
+import threading
 
 from botocore.client import Config
 from botocore.exceptions import ClientError
@@ -55,7 +60,7 @@ from c7n.filters import (
     FilterRegistry, Filter, CrossAccountAccessFilter, MetricsFilter,
     ValueFilter)
 from c7n.manager import resources
-from c7n.output import NullBlobOutput
+from c7n.output import BlobOutput, DirectoryOutput, NullBlobOutput
 from c7n import query
 from c7n.resources.securityhub import PostFinding
 from c7n.tags import RemoveTag, Tag, TagActionFilter, TagDelayedAction
@@ -72,18 +77,24 @@ filters.register('marked-for-op', TagActionFilter)
 actions.register('put-metric', PutMetric)
 
 MAX_COPY_SIZE = 1024 * 1024 * 1024 * 2
+BUCKET_CLIENTS_LOCK = threading.Lock()
 
 
 class DescribeS3(query.DescribeSource):
 
     def augment(self, buckets):
+        augment_keys = self.manager.get_augment_keys()
+        clients = self.manager.get_bucket_clients()
         with self.manager.executor_factory(
                 max_workers=min((10, len(buckets) + 1))) as w:
             results = w.map(
-                assemble_bucket,
+                functools.partial(
+                    assemble_bucket, augment_keys=augment_keys, clients=clients),
                 zip(itertools.repeat(self.manager.session_factory), buckets))
             results = list(filter(None, results))
+        if augment_keys is None:
             return results
+        return [LazyBucket(b, clients) for b in results]
 
 
 class ConfigS3(query.ConfigSource):
@@ -363,15 +374,111 @@ class S3(query.QueryResourceManager):
         'config': ConfigS3
     }
 
+    # Augment keys needed by generic filters and actions, s3 specific
+    # ones declare an augment_keys attribute instead.
+    augment_requirements = {
+        'event': (),
+        'marked-for-op': ('Tags',),
+        'put-metric': (),
+    }
+
+    bucket_clients = None
+
     def get_arns(self, resources):
         return ["arn:aws:s3:::{}".format(r["Name"]) for r in resources]
 
+    def get_bucket_clients(self):
+        """Return the pool of regional s3 clients for this run."""
+        with BUCKET_CLIENTS_LOCK:
+            if self.bucket_clients is None:
+                self.bucket_clients = BucketClients(self.session_factory)
+        return self.bucket_clients
+
     @classmethod
     def get_permissions(cls):
         perms = ["s3:ListAllMyBuckets"]
         perms.extend([n[-1] for n in S3_AUGMENT_TABLE])
         return perms
 
+    def validate(self):
+        super().validate()
+        known = {el[1] for el in S3_AUGMENT_TABLE}
+        unknown = set(self.get_query_augment_keys() or ()).difference(known)
+        if unknown:
+            raise PolicyValidationError(
+                "unknown s3 augment keys %s on %s" % (
+                    ", ".join(sorted(unknown)), self.data.get('name', 'unknown')))
+        return self
+
+    def get_query_augment_keys(self):
+        keys = None
+        for q in self.data.get('query', ()):
+            if 'augment' in q:
+                keys = set(keys or ()).union(q['augment'])
+        return keys
+
+    def get_augment_keys(self):
+        """Return the bucket augment keys needed by the policy.
+
+        The keys are worked out from the policy's filters and actions,
+        along with any explicitly requested via a query augment entry,
+        ie. for value filters on keys that can't be resolved statically.
+
+        .. code-block:: yaml
+
+            query:
+              - augment: [Policy, Acl]
+
+        Returns None when all augment keys are needed.
+        """
+        if not self.data.get('filters') and not self.data.get('actions'):
+            return None
+        explicit = self.get_query_augment_keys()
+        keys = set(explicit or ()).union(('Location',))
+        for el in itertools.chain(self.iter_filters(), self.actions):
+            if el.type in ('or', 'and', 'not'):
+                continue
+            if el.type == 'value':
+                key = el.data.get('key')
+                if key is None and len(el.data) == 1:
+                    [key] = el.data
+                el_keys = get_augment_key_paths(key)
+                if el_keys is None and explicit is not None:
+                    continue
+            elif hasattr(el, 'augment_keys'):
+                el_keys = el.augment_keys
+            else:
+                el_keys = self.augment_requirements.get(el.type)
+            if el_keys is None:
+                return None
+            keys.update(el_keys)
+        return keys
+
+    def get_cache_key(self, query):
+        key = super().get_cache_key(query)
+        if self.source_type == 'describe':
+            augment_keys = self.get_augment_keys()
+            # partially augmented buckets must never satisfy a fetch
+            # for a larger set of augment keys.
+            key['augment'] = augment_keys and sorted(augment_keys)
+        return key
+
+    def filter_resources(self, resources, event=None, filters=None):
+        if self.source_type == 'describe' and self.get_augment_keys() is not None:
+            # cached buckets are plain dicts, restore lazy augment fetches.
+            clients = self.get_bucket_clients()
+            resources = [
+                b if isinstance(b, LazyBucket) else LazyBucket(b, clients)
+                for b in resources]
+        resources = super().filter_resources(resources, event, filters)
+        # matched buckets are written out, reported and sent in notifications
+        # as full records, so retrieve their remaining augment keys.
+        lazy = [b for b in resources if isinstance(b, LazyBucket) and b.pending]
+        if lazy:
+            with self.executor_factory(max_workers=min((10, len(lazy) + 1))) as w:
+                list(w.map(LazyBucket.materialize, lazy))
+        return resources
+
 
 S3_CONFIG_SUPPLEMENT_NULL_MAP = {
     'BucketLoggingConfiguration': u'{"destinationBucketName":null,"logFilePrefix":null}',
@@ -404,17 +511,91 @@ S3_AUGMENT_TABLE = (
 )
 
 
-def assemble_bucket(item):
+def get_augment_key_paths(key):
+    """Return the augment keys a value filter key depends on.
+
+    Returns None if the key's dependencies can't be determined.
+    """
+    if not key:
+        return None
+    if key.startswith('tag:'):
+        return ('Tags',)
+    m = re.match(r'[A-Za-z_][A-Za-z0-9_]*', key)
+    if m is None or key[m.end():m.end() + 1] not in ('', '.', '['):
+        return None
+    return tuple(el[1] for el in S3_AUGMENT_TABLE if el[1] == m.group())
+
+
+class LazyBucket(dict):
+    """A bucket whose augment keys outside the fetched set are retrieved
+    on first access.
+
+    Pickles and copies as a plain dict. Serializing doesn't trigger
+    fetches, so pending keys must be retrieved via :meth:`materialize`
+    before a bucket is output.
+    """
+
+    def __init__(self, bucket, clients):
+        super().__init__(bucket)
+        denied = bucket.get('c7n:DeniedMethods', ())
+        self.pending = {
+            el[1] for el in S3_AUGMENT_TABLE
+            if el[1] not in bucket and el[0] not in denied}
+        self.clients = clients
+        self.lock = threading.RLock()
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+    def fetch(self, key):
+        with self.lock:
+            if key not in self.pending:
+                return
+            self.pending.discard(key)
+            assemble_bucket(
+                (self.clients.session_factory, self),
+                augment_keys=(key,), clients=self.clients)
+
+    def materialize(self):
+        with self.lock:
+            if not self.pending:
+                return
+            keys, self.pending = tuple(self.pending), set()
+            assemble_bucket(
+                (self.clients.session_factory, self),
+                augment_keys=keys, clients=self.clients)
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self.pending
+
+    def __missing__(self, key):
+        self.fetch(key)
+        if not dict.__contains__(self, key):
+            raise KeyError(key)
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        if key in self.pending:
+            self.fetch(key)
+        return dict.get(self, key, default)
+
+
+def assemble_bucket(item, augment_keys=None, clients=None):
     """Assemble a document representing all the config state around a bucket.
 
+    If augment_keys is given only those augments are retrieved, clients
+    is an optional :class:`BucketClients` pool to use.
+
     TODO: Refactor this, the logic here feels quite muddled.
     """
     factory, b = item
-    s = factory()
-    c = s.client('s3')
-    # Bucket Location, Current Client Location, Default Location
-    b_location = c_location = location = "us-east-1"
-    methods = list(S3_AUGMENT_TABLE)
+    if clients is None:
+        clients = BucketClients(factory)
+    # A client in the bucket's region if we've seen it before, else
+    # the session's default region.
+    c = clients.get_client(clients.get_bucket_region(b))
+    methods = [el for el in S3_AUGMENT_TABLE
+               if augment_keys is None or el[1] in augment_keys]
     for minfo in methods:
         m, k, default, select = minfo[:4]
         try:
@@ -434,8 +615,7 @@ def assemble_bucket(item):
             if code.startswith("NoSuch") or "NotFound" in code:
                 v = default
             elif code == 'PermanentRedirect':
-                s = factory()
-                c = bucket_client(s, b)
+                c = clients.bucket_client(b)
                 # Requeue with the correct region given location constraint
                 methods.append((m, k, default, select))
                 continue
@@ -467,31 +647,32 @@ def assemble_bucket(item):
             elif b_location == 'EU':
                 b_location = "eu-west-1"
                 v['LocationConstraint'] = 'eu-west-1'
-            if v and v != c_location:
-                c = s.client('s3', region_name=b_location)
-            elif c_location != location:
-                c = s.client('s3', region_name=location)
+            clients.set_bucket_region(b['Name'], b_location)
+            c = clients.get_client(b_location)
         b[k] = v
     return b
 
 
 def bucket_client(session, b, kms=False):
     region = get_region(b)
+    return session.client('s3', region_name=region, config=get_client_config(kms))
+
 
+def get_client_config(kms=False):
     if kms:
         # Need v4 signature for aws:kms crypto, else let the sdk decide
         # based on region support.
-        config = Config(
+        return Config(
             signature_version='s3v4',
             read_timeout=200, connect_timeout=120)
-    else:
-        config = Config(read_timeout=200, connect_timeout=120)
-    return session.client('s3', region_name=region, config=config)
+    return Config(read_timeout=200, connect_timeout=120)
 
 
-def modify_bucket_tags(session_factory, buckets, add_tags=(), remove_tags=()):
+def modify_bucket_tags(session_factory, buckets, add_tags=(), remove_tags=(), clients=None):
+    if clients is None:
+        clients = BucketClients(session_factory)
     for bucket in buckets:
-        client = bucket_client(local_session(session_factory), bucket)
+        client = clients.bucket_client(bucket)
         # Bucket tags are set atomically for the set/document, we want
         # to refetch against current to guard against any staleness in
         # our cached representation across multiple policies or concurrent
@@ -530,6 +711,43 @@ def modify_bucket_tags(session_factory, buckets, add_tags=(), remove_tags=()):
             continue
 
 
+class BucketClients:
+    """A thread safe pool of regional s3 clients.
+
+    Also memoizes the region of each bucket as learned from its
+    location, so clients for a bucket are created in the right region
+    without another redirect round trip.
+    """
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+        self.clients = {}
+        self.regions = {}
+        self.lock = threading.Lock()
+
+    def get_client(self, region=None, kms=False):
+        key = (region, kms)
+        client = self.clients.get(key)
+        if client is not None:
+            return client
+        with self.lock:
+            if key not in self.clients:
+                self.clients[key] = local_session(self.session_factory).client(
+                    's3', region_name=region, config=get_client_config(kms))
+            return self.clients[key]
+
+    def get_bucket_region(self, b):
+        if 'Location' in b:
+            return get_region(b)
+        return self.regions.get(b['Name'])
+
+    def set_bucket_region(self, name, region):
+        self.regions[name] = region
+
+    def bucket_client(self, b, kms=False):
+        return self.get_client(self.get_bucket_region(b) or get_region(b), kms)
+
+
 def get_region(b):
     """Tries to get the bucket region from Location.LocationConstraint
 
@@ -554,6 +772,8 @@ class S3Metrics(MetricsFilter):
     mismatch, and additional required dimension.
     """
 
+    augment_keys = ()
+
     def get_dimensions(self, resource):
         dims = [{'Name': 'BucketName', 'Value': resource['Name']}]
         if (self.data['name'] == 'NumberOfObjects' and
@@ -578,6 +798,7 @@ class S3CrossAccountFilter(CrossAccountAccessFilter):
                 filters:
                   - type: cross-account
     """
+    augment_keys = ('Policy',)
     permissions = ('s3:GetBucketPolicy',)
 
     def get_accounts(self):
@@ -671,6 +892,7 @@ class GlobalGrantsFilter(Filter):
 
     """
 
+    augment_keys = ('Acl', 'Website')
     schema = type_schema(
         'global-grants',
         allow_website={'type': 'boolean'},
@@ -718,6 +940,10 @@ class BucketActionBase(BaseAction):
     def get_permissions(self):
         return self.permissions
 
+    def get_bucket_client(self, bucket, kms=False):
+        """Return a pooled s3 client for the bucket's region."""
+        return self.manager.get_bucket_clients().bucket_client(bucket, kms)
+
     def get_std_format_args(self, bucket):
         return {
             'account_id': self.manager.config.account_id,
@@ -799,6 +1025,7 @@ class HasStatementFilter(BucketFilterBase):
                         Action: 's3:*'
                         Principal: '*'
     """
+    augment_keys = ('Policy',)
     schema = type_schema(
         'has-statement',
         statement_ids={'type': 'array', 'items': {'type': 'string'}},
@@ -884,6 +1111,7 @@ class EncryptionEnabledFilter(Filter):
                 filters:
                   - type: no-encryption-statement
     """
+    augment_keys = ('Policy',)
     schema = type_schema(
         'no-encryption-statement')
 
@@ -935,6 +1163,7 @@ class MissingPolicyStatementFilter(Filter):
                       - RequiredEncryptedPutObject
     """
 
+    augment_keys = ('Policy',)
     schema = type_schema(
         'missing-policy-statement',
         aliases=('missing-statement',),
@@ -979,6 +1208,7 @@ class BucketNotificationFilter(ValueFilter):
                     statement_ids: matched
     """
 
+    augment_keys = ('Notification',)
     schema = type_schema(
         'bucket-notification',
         required=['kind'],
@@ -1045,6 +1275,7 @@ class BucketLoggingFilter(Filter):
                     target_prefix: "{account}/{source_bucket_name}/"
     """
 
+    augment_keys = ('Logging',)
     schema = type_schema(
         'bucket-logging',
         op={'enum': ['enabled', 'disabled', 'equal', 'not-equal', 'eq', 'ne']},
@@ -1103,6 +1334,7 @@ class BucketLoggingFilter(Filter):
 class DeleteBucketNotification(BucketActionBase):
     """Action to delete S3 bucket notification configurations"""
 
+    augment_keys = ('Notification',)
     schema = type_schema(
         'delete-bucket-notification',
         required=['statement_ids'],
@@ -1130,7 +1362,7 @@ class DeleteBucketNotification(BucketActionBase):
                 if c['Id'] not in statement_ids:
                     cfg[t].append(c)
 
-        client = bucket_client(local_session(self.manager.session_factory), bucket)
+        client = self.get_bucket_client(bucket)
         client.put_bucket_notification_configuration(
             Bucket=bucket['Name'],
             NotificationConfiguration=cfg)
@@ -1139,6 +1371,7 @@ class DeleteBucketNotification(BucketActionBase):
 @actions.register('no-op')
 class NoOp(BucketActionBase):
 
+    augment_keys = ()
     schema = type_schema('no-op')
     permissions = ('s3:ListAllMyBuckets',)
 
@@ -1171,6 +1404,7 @@ class SetPolicyStatement(BucketActionBase):
                             "aws:SecureTransport": false
     """
 
+    augment_keys = ('Policy',)
     permissions = ('s3:PutBucketPolicy',)
 
     schema = type_schema(
@@ -1230,7 +1464,7 @@ class SetPolicyStatement(BucketActionBase):
         bucket_statements.extend(target_statements.values())
         policy = json.dumps(policy)
 
-        s3 = bucket_client(local_session(self.manager.session_factory), bucket)
+        s3 = self.get_bucket_client(bucket)
         s3.put_bucket_policy(Bucket=bucket['Name'], Policy=policy)
         return {'Name': bucket['Name'], 'Policy': policy}
 
@@ -1256,6 +1490,7 @@ class RemovePolicyStatement(RemovePolicyBase):
                       - RequiredEncryptedPutObject
     """
 
+    augment_keys = ('Policy',)
     permissions = ("s3:PutBucketPolicy", "s3:DeleteBucketPolicy")
 
     def process(self, buckets):
@@ -1285,7 +1520,7 @@ class RemovePolicyStatement(RemovePolicyBase):
         if not found:
             return
 
-        s3 = bucket_client(local_session(self.manager.session_factory), bucket)
+        s3 = self.manager.get_bucket_clients().bucket_client(bucket)
 
         if not statements:
             s3.delete_bucket_policy(Bucket=bucket['Name'])
@@ -1320,6 +1555,7 @@ class SetBucketReplicationConfig(BucketActionBase):
                   - type: set-replication
                     state: enable
     """
+    augment_keys = ()
     schema = type_schema(
         'set-replication',
         state={'type': 'string', 'enum': ['enable', 'disable', 'remove']})
@@ -1339,7 +1575,7 @@ class SetBucketReplicationConfig(BucketActionBase):
                 raise Exception('\n'.join(map(str, errors)))
 
     def process_bucket(self, bucket):
-        s3 = bucket_client(local_session(self.manager.session_factory), bucket)
+        s3 = self.get_bucket_client(bucket)
         state = self.data.get('state')
         if state is not None:
             if state == 'remove':
@@ -1378,6 +1614,7 @@ class FilterPublicBlock(Filter):
                     BlockPublicPolicy: true
     """
 
+    augment_keys = ()
     schema = type_schema(
         'check-public-block',
         BlockPublicAcls={'type': 'boolean'},
@@ -1399,7 +1636,7 @@ class FilterPublicBlock(Filter):
         return results
 
     def process_bucket(self, bucket):
-        s3 = bucket_client(local_session(self.manager.session_factory), bucket)
+        s3 = self.manager.get_bucket_clients().bucket_client(bucket)
         config = dict(bucket.get(self.annotation_key, {key: False for key in self.keys}))
         if self.annotation_key not in bucket:
             try:
@@ -1464,6 +1701,7 @@ class SetPublicBlock(BucketActionBase):
 
     """
 
+    augment_keys = ()
     schema = type_schema(
         'set-public-block',
         state={'type': 'boolean', 'default': True},
@@ -1482,7 +1720,7 @@ class SetPublicBlock(BucketActionBase):
                 future.result()
 
     def process_bucket(self, bucket):
-        s3 = bucket_client(local_session(self.manager.session_factory), bucket)
+        s3 = self.get_bucket_client(bucket)
         config = dict(bucket.get(self.annotation_key, {key: False for key in self.keys}))
         if self.annotation_key not in bucket:
             try:
@@ -1529,14 +1767,14 @@ class ToggleVersioning(BucketActionBase):
                     enabled: true
     """
 
+    augment_keys = ('Versioning',)
     schema = type_schema(
         'toggle-versioning',
         enabled={'type': 'boolean'})
     permissions = ("s3:PutBucketVersioning",)
 
     def process_versioning(self, resource, state):
-        client = bucket_client(
-            local_session(self.manager.session_factory), resource)
+        client = self.get_bucket_client(resource)
         try:
             client.put_bucket_versioning(
                 Bucket=resource['Name'],
@@ -1598,6 +1836,7 @@ class ToggleLogging(BucketActionBase):
                     target_bucket: "{account_id}-{region}-s3-logs"
                     target_prefix: "{account}/{source_bucket_name}/"
     """
+    augment_keys = ('Logging',)
     schema = type_schema(
         'toggle-logging',
         enabled={'type': 'boolean'},
@@ -1622,7 +1861,7 @@ class ToggleLogging(BucketActionBase):
         account_name = get_account_alias_from_sts(session)
 
         for r in resources:
-            client = bucket_client(session, r)
+            client = self.get_bucket_client(r)
             is_logging = bool(r.get('Logging'))
 
             if enabled:
@@ -1778,6 +2017,7 @@ class EncryptionRequiredPolicy(BucketActionBase):
                   - encryption-policy
     """
 
+    augment_keys = ('Policy',)
     permissions = ("s3:GetBucketPolicy", "s3:PutBucketPolicy")
     schema = type_schema('encryption-policy')
 
@@ -1823,8 +2063,7 @@ class EncryptionRequiredPolicy(BucketActionBase):
                 else:
                     return
 
-        session = self.manager.session_factory()
-        s3 = bucket_client(session, b)
+        s3 = self.get_bucket_client(b)
         statements.append(encryption_statement)
         p['Statement'] = statements
         log.info('Bucket:%s attached encryption policy' % b['Name'])
@@ -1897,10 +2136,83 @@ class BucketScanLog:
         self.fh.write(",\n")
 
 
+class BucketScanCheckpoint:
+    """Durable progress records for a partitioned bucket scan.
+
+    The partitions of the bucket keyspace and the listing marker of
+    each are stored in a directory alongside the scan logs, such that
+    an interrupted scan resumes from the last completed page of each
+    partition. The directory is removed once the scan completes.
+
+    Without a log directory nothing is recorded, see
+    :meth:`ScanBucket.get_checkpoint`.
+    """
+
+    def __init__(self, log_dir, name):
+        self.log_dir = log_dir
+        self.name = name
+
+    @property
+    def path(self):
+        return os.path.join(self.log_dir, "%s.checkpoint" % self.name)
+
+    def load(self, key):
+        if self.log_dir is None:
+            return None
+        try:
+            with open(os.path.join(self.path, "%s.json" % key)) as fh:
+                return json.load(fh)
+        except (IOError, ValueError):
+            return None
+
+    def save(self, key, data):
+        if self.log_dir is None:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        path = os.path.join(self.path, "%s.json" % key)
+        # write and rename, so a crash never leaves a torn checkpoint.
+        with open(path + '.tmp', 'w') as fh:
+            json.dump(data, fh)
+        os.replace(path + '.tmp', path)
+
+    def remove(self):
+        if self.log_dir is None:
+            return
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
 class ScanBucket(BucketActionBase):
+    """Base class for actions visiting every key in a bucket.
+
+    By default a bucket is listed as a single stream. With the
+    partition option the keyspace is split into independent listing
+    streams, by the given prefixes and/or the common prefixes under
+    a delimiter, which are scanned in parallel. The progress of each
+    partition is checkpointed in the policy's output directory, so an
+    interrupted scan resumes where it left off on the next run. Scans
+    only resume with a local output directory, as remote outputs
+    (ie. s3) are staged in a temporary directory per run.
+
+    .. code-block:: yaml
 
+        actions:
+          - type: encrypt-keys
+            partition:
+              delimiter: /
+              workers: 8
+    """
+
+    augment_keys = ('Versioning',)
     permissions = ("s3:ListBucket",)
 
+    partition_schema = {
+        'type': 'object',
+        'additionalProperties': False,
+        'properties': {
+            'prefixes': {'type': 'array', 'items': {'type': 'string'}},
+            'delimiter': {'type': 'string'},
+            'workers': {'type': 'integer', 'minimum': 1}}}
+
     bucket_ops = {
         'standard': {
             'iterator': 'list_objects',
@@ -1977,8 +2289,16 @@ class ScanBucket(BucketActionBase):
             "Scanning bucket:%s visitor:%s style:%s" % (
                 b['Name'], self.__class__.__name__, self.get_bucket_style(b)))
 
-        s = self.manager.session_factory()
-        s3 = bucket_client(s, b)
+        s3 = self.get_bucket_client(b)
+
+        if self.data.get('partition'):
+            try:
+                return self._process_bucket_partitions(b, s3)
+            except ClientError as e:
+                if not self.handle_scan_error(b, e):
+                    log.exception(
+                        "Error processing bucket:%s partitions" % b['Name'])
+                return
 
         # The bulk of _process_bucket function executes inline in
         # calling thread/worker context, neither paginator nor
@@ -1991,14 +2311,7 @@ class ScanBucket(BucketActionBase):
                 try:
                     return self._process_bucket(b, p, key_log, w)
                 except ClientError as e:
-                    if e.response['Error']['Code'] == 'NoSuchBucket':
-                        log.warning(
-                            "Bucket:%s removed while scanning" % b['Name'])
-                        return
-                    if e.response['Error']['Code'] == 'AccessDenied':
-                        log.warning(
-                            "Access Denied Bucket:%s while scanning" % b['Name'])
-                        self.denied_buckets.add(b['Name'])
+                    if self.handle_scan_error(b, e):
                         return
                     log.exception(
                         "Error processing bucket:%s paginator:%s" % (
@@ -2006,27 +2319,24 @@ class ScanBucket(BucketActionBase):
 
     __call__ = process_bucket
 
+    def handle_scan_error(self, b, e):
+        """Log expected scan errors, returns False for unexpected ones."""
+        if e.response['Error']['Code'] == 'NoSuchBucket':
+            log.warning(
+                "Bucket:%s removed while scanning" % b['Name'])
+            return True
+        if e.response['Error']['Code'] == 'AccessDenied':
+            log.warning(
+                "Access Denied Bucket:%s while scanning" % b['Name'])
+            self.denied_buckets.add(b['Name'])
+            return True
+        return False
+
     def _process_bucket(self, b, p, key_log, w):
         count = 0
 
         for key_set in p:
-            keys = self.get_keys(b, key_set)
-            count += len(keys)
-            futures = []
-
-            for batch in chunks(keys, size=100):
-                if not batch:
-                    continue
-                futures.append(w.submit(self.process_chunk, batch, b))
-
-            for f in as_completed(futures):
-                if f.exception():
-                    log.exception("Exception Processing bucket:%s key batch %s" % (
-                        b['Name'], f.exception()))
-                    continue
-                r = f.result()
-                if r:
-                    key_log.add(r)
+            count += self.process_key_set(b, key_set, key_log, w)
 
             # Log completion at info level, progress at debug level
             if key_set['IsTruncated']:
@@ -2041,6 +2351,138 @@ class ScanBucket(BucketActionBase):
         return {
             'Bucket': b['Name'], 'Remediated': key_log.count, 'Count': count}
 
+    def process_key_set(self, b, key_set, key_log, w):
+        """Process a page of keys, returns the number of keys seen."""
+        keys = self.get_keys(b, key_set)
+        futures = []
+
+        for batch in chunks(keys, size=100):
+            if not batch:
+                continue
+            futures.append(w.submit(self.process_chunk, batch, b))
+
+        for f in as_completed(futures):
+            if f.exception():
+                log.exception("Exception Processing bucket:%s key batch %s" % (
+                    b['Name'], f.exception()))
+                continue
+            r = f.result()
+            if r:
+                key_log.add(r)
+        return len(keys)
+
+    def get_partitions(self, b, s3):
+        """Split the bucket keyspace into independently listable partitions."""
+        config = self.data['partition']
+        delimiter = config.get('delimiter')
+        partitions = []
+        for prefix in config.get('prefixes', ['']):
+            if not delimiter:
+                partitions.append({'Prefix': prefix})
+                continue
+            # keys directly under the prefix, and a partition per common prefix.
+            partitions.append({'Prefix': prefix, 'Delimiter': delimiter})
+            pager = s3.get_paginator(self.get_bucket_op(b, 'iterator')).paginate(
+                Bucket=b['Name'], Prefix=prefix, Delimiter=delimiter)
+            for page in pager:
+                for cp in page.get('CommonPrefixes', ()):
+                    partitions.append({'Prefix': cp['Prefix']})
+        return partitions
+
+    def get_resume_marker(self, b, key_set):
+        if self.get_bucket_style(b) == 'versioned':
+            return {'KeyMarker': key_set.get('NextKeyMarker'),
+                    'VersionIdMarker': key_set.get('NextVersionIdMarker')}
+        marker = key_set.get('NextMarker')
+        if marker is None and key_set.get('Contents'):
+            marker = key_set['Contents'][-1]['Key']
+        return {'Marker': marker}
+
+    def get_checkpoint(self, b):
+        """Return the scan checkpoint for a bucket.
+
+        Checkpoints are keyed by the policy, action and partition config
+        in addition to the bucket, so a changed configuration never
+        resumes from partitions computed for another.
+        """
+        ctx = self.manager.ctx
+        log_dir = ctx.log_dir
+        if (not isinstance(ctx.output, DirectoryOutput) or
+                isinstance(ctx.output, BlobOutput)):
+            log_dir = None
+        digest = hashlib.sha256(json.dumps(
+            [ctx.policy.name, self.type, self.data['partition']],
+            sort_keys=True).encode('utf8')).hexdigest()[:12]
+        return BucketScanCheckpoint(log_dir, "%s.%s" % (b['Name'], digest))
+
+    def _process_bucket_partitions(self, b, s3):
+        checkpoint = self.get_checkpoint(b)
+        partitions = checkpoint.load('partitions')
+        if partitions is None:
+            partitions = self.get_partitions(b, s3)
+            checkpoint.save('partitions', partitions)
+        else:
+            log.info("Resuming scan bucket:%s partitions:%d",
+                     b['Name'], len(partitions))
+
+        results = []
+        errors = []
+        workers = self.data['partition'].get('workers', 4)
+        with self.executor_factory(max_workers=10) as w:
+            with self.executor_factory(
+                    max_workers=min(workers, len(partitions) or 1)) as pw:
+                futures = {
+                    pw.submit(self.process_partition,
+                              b, s3, checkpoint, idx, partition, w): partition
+                    for idx, partition in enumerate(partitions)}
+                for f in as_completed(futures):
+                    if f.exception():
+                        log.warning(
+                            "Error scanning bucket:%s prefix:%s error:%s",
+                            b['Name'], futures[f]['Prefix'], f.exception())
+                        errors.append(f.exception())
+                        continue
+                    results.append(f.result())
+        # Leave the checkpoint in place for the next run to resume.
+        if errors:
+            raise errors[0]
+        checkpoint.remove()
+
+        count = sum(r['Count'] for r in results)
+        remediated = sum(r['Remediated'] for r in results)
+        log.info('Scan Complete bucket:%s partitions:%d keys:%d remediated:%d',
+                 b['Name'], len(partitions), count, remediated)
+        b['KeyScanCount'] = count
+        b['KeyRemediated'] = remediated
+        return {'Bucket': b['Name'], 'Remediated': remediated, 'Count': count}
+
+    def process_partition(self, b, s3, checkpoint, idx, partition, w):
+        state = checkpoint.load(idx) or {'Count': 0, 'Remediated': 0, 'Runs': 0}
+        if state.get('Complete'):
+            return state
+
+        params = dict(partition, Bucket=b['Name'])
+        params.update({k: v for k, v in (state.get('Marker') or {}).items()
+                       if v is not None})
+        name = "%s.%04d" % (b['Name'], idx)
+        if state['Runs']:
+            name = "%s.%d" % (name, state['Runs'])
+        state['Runs'] += 1
+
+        pager = s3.get_paginator(
+            self.get_bucket_op(b, 'iterator')).paginate(**params)
+        key_log = BucketScanLog(self.manager.ctx.log_dir, name)
+        with key_log:
+            for key_set in pager:
+                remediated = key_log.count
+                state['Count'] += self.process_key_set(b, key_set, key_log, w)
+                state['Remediated'] += key_log.count - remediated
+                state['Marker'] = self.get_resume_marker(b, key_set)
+                checkpoint.save(idx, state)
+        state['Complete'] = True
+        checkpoint.save(idx, state)
+        return state
+
     def process_chunk(self, batch, bucket):
         raise NotImplementedError()
 
@@ -2084,7 +2526,8 @@ class EncryptExtantKeys(ScanBucket):
             'glacier': {'type': 'boolean'},
             'large': {'type': 'boolean'},
             'crypto': {'enum': ['AES256', 'aws:kms']},
-            'key-id': {'type': 'string'}
+            'key-id': {'type': 'string'},
+            'partition': ScanBucket.partition_schema
         },
         'dependencies': {
             'key-id': {
@@ -2149,9 +2592,7 @@ class EncryptExtantKeys(ScanBucket):
 
     def process_chunk(self, batch, bucket):
         crypto_method = self.data.get('crypto', 'AES256')
-        s3 = bucket_client(
-            local_session(self.manager.session_factory), bucket,
-            kms=(crypto_method == 'aws:kms'))
+        s3 = self.get_bucket_client(bucket, kms=(crypto_method == 'aws:kms'))
         b = bucket['Name']
         results = []
         key_processor = self.get_bucket_op(bucket, 'key_processor')
@@ -2320,6 +2761,7 @@ class LogTarget(Filter):
                   - type: is-log-target
     """
 
+    augment_keys = ('Logging',)
     schema = type_schema(
         'is-log-target',
         services={'type': 'array', 'items': {'enum': [
@@ -2426,14 +2868,14 @@ def _query_elb_attrs(session_factory, elb_set):
 class RemoveWebsiteHosting(BucketActionBase):
     """Action that removes website hosting configuration."""
 
+    augment_keys = ()
     schema = type_schema('remove-website-hosting')
 
     permissions = ('s3:DeleteBucketWebsite',)
 
     def process(self, buckets):
-        session = local_session(self.manager.session_factory)
         for bucket in buckets:
-            client = bucket_client(session, bucket)
+            client = self.get_bucket_client(bucket)
             client.delete_bucket_website(Bucket=bucket['Name'])
 
 
@@ -2454,6 +2896,7 @@ class DeleteGlobalGrants(BucketActionBase):
                   - delete-global-grants
     """
 
+    augment_keys = ('Acl', 'Website')
     schema = type_schema(
         'delete-global-grants',
         grantees={'type': 'array', 'items': {'type': 'string'}})
@@ -2494,7 +2937,7 @@ class DeleteGlobalGrants(BucketActionBase):
 
         log.info({'Owner': acl['Owner'], 'Grants': new_grants})
 
-        c = bucket_client(self.manager.session_factory(), b)
+        c = self.get_bucket_client(b)
         try:
             c.put_bucket_acl(
                 Bucket=b['Name'],
@@ -2526,8 +2969,12 @@ class BucketTag(Tag):
                     value: us-east-1
     """
 
+    augment_keys = ()
+
     def process_resource_set(self, client, resource_set, tags):
-        modify_bucket_tags(self.manager.session_factory, resource_set, tags)
+        modify_bucket_tags(
+            self.manager.session_factory, resource_set, tags,
+            clients=self.manager.get_bucket_clients())
 
 
 @actions.register('mark-for-op')
@@ -2551,6 +2998,7 @@ class MarkBucketForOp(TagDelayedAction):
                     days: 7
     """
 
+    augment_keys = ()
     schema = type_schema(
         'mark-for-op', rinherit=TagDelayedAction.schema)
 
@@ -2574,14 +3022,18 @@ class RemoveBucketTag(RemoveTag):
                     tags: ['BucketOwner']
     """
 
+    augment_keys = ()
+
     def process_resource_set(self, client, resource_set, tags):
         modify_bucket_tags(
-            self.manager.session_factory, resource_set, remove_tags=tags)
+            self.manager.session_factory, resource_set, remove_tags=tags,
+            clients=self.manager.get_bucket_clients())
 
 
 @filters.register('data-events')
 class DataEvents(Filter):
 
+    augment_keys = ()
     schema = type_schema('data-events', state={'enum': ['present', 'absent']})
     permissions = (
         'cloudtrail:DescribeTrails',
@@ -2632,6 +3084,7 @@ class DataEvents(Filter):
 @filters.register('inventory')
 class Inventory(ValueFilter):
     """Filter inventories for a bucket"""
+    augment_keys = ()
     schema = type_schema('inventory', rinherit=ValueFilter.schema)
     schema_alias = False
     permissions = ('s3:GetInventoryConfiguration',)
@@ -2657,7 +3110,7 @@ class Inventory(ValueFilter):
 
     def process_bucket(self, b):
         if 'c7n:inventories' not in b:
-            client = bucket_client(local_session(self.manager.session_factory), b)
+            client = self.manager.get_bucket_clients().bucket_client(b)
             inventories = client.list_bucket_inventory_configurations(
                 Bucket=b['Name']).get('InventoryConfigurationList', [])
             b['c7n:inventories'] = inventories
@@ -2671,6 +3124,7 @@ class Inventory(ValueFilter):
 class SetInventory(BucketActionBase):
     """Configure bucket inventories for an s3 bucket.
     """
+    augment_keys = ()
     schema = type_schema(
         'set-inventory',
         required=['name', 'destination'],
@@ -2715,7 +3169,7 @@ class SetInventory(BucketActionBase):
         if not prefix:
             prefix = "Inventories/%s" % (self.manager.config.account_id)
 
-        client = bucket_client(local_session(self.manager.session_factory), b)
+        client = self.get_bucket_client(b)
         if state == 'absent':
             try:
                 client.delete_bucket_inventory_configuration(
@@ -2801,7 +3255,10 @@ class DeleteBucket(ScanBucket):
                     remove-contents: true
     """
 
-    schema = type_schema('delete', **{'remove-contents': {'type': 'boolean'}})
+    augment_keys = ('Replication', 'Versioning')
+    schema = type_schema(
+        'delete', **{'remove-contents': {'type': 'boolean'},
+                     'partition': ScanBucket.partition_schema})
 
     permissions = ('s3:*',)
 
@@ -2826,8 +3283,7 @@ class DeleteBucket(ScanBucket):
         Disable versioning on the bucket, so deletes don't
         generate fresh deletion markers.
         """
-        client = bucket_client(
-            local_session(self.manager.session_factory), b)
+        client = self.get_bucket_client(b)
 
         # Stop replication so we can suspend versioning
         if b.get('Replication') is not None:
@@ -2862,7 +3318,7 @@ class DeleteBucket(ScanBucket):
         return results
 
     def delete_bucket(self, b):
-        s3 = bucket_client(self.manager.session_factory(), b)
+        s3 = self.get_bucket_client(b)
         try:
             self._run_api(s3.delete_bucket, Bucket=b['Name'])
         except ClientError as e:
@@ -2895,7 +3351,7 @@ class DeleteBucket(ScanBucket):
         return results
 
     def process_chunk(self, batch, bucket):
-        s3 = bucket_client(local_session(self.manager.session_factory), bucket)
+        s3 = self.get_bucket_client(bucket)
         objects = []
         for key in batch:
             obj = {'Key': key['Key']}
@@ -2936,6 +3392,7 @@ class Lifecycle(BucketActionBase):
 
     """
 
+    augment_keys = ('Lifecycle',)
     schema = type_schema(
         'configure-lifecycle',
         **{
@@ -3059,7 +3516,7 @@ class Lifecycle(BucketActionBase):
             return results
 
     def process_bucket(self, bucket):
-        s3 = bucket_client(local_session(self.manager.session_factory), bucket)
+        s3 = self.get_bucket_client(bucket)
 
         if 'get_bucket_lifecycle_configuration' in bucket.get('c7n:DeniedMethods', []):
             log.warning("Access Denied Bucket:%s while reading lifecycle" % bucket['Name'])
@@ -3160,6 +3617,7 @@ class BucketEncryption(KMSKeyResolverMixin, Filter):
                   - type: bucket-encryption
                     state: False
     """
+    augment_keys = ()
     schema = type_schema('bucket-encryption',
                          state={'type': 'boolean'},
                          crypto={'type': 'string', 'enum': ['AES256', 'aws:kms']},
@@ -3185,7 +3643,7 @@ class BucketEncryption(KMSKeyResolverMixin, Filter):
 
     def process_bucket(self, b):
 
-        client = bucket_client(local_session(self.manager.session_factory), b)
+        client = self.manager.get_bucket_clients().bucket_client(b)
         rules = []
         if self.annotation_key not in b:
             try:
@@ -3276,6 +3734,7 @@ class SetBucketEncryption(KMSKeyResolverMixin, BucketActionBase):
                     enabled: false
     """
 
+    augment_keys = ()
     schema = {
         'type': 'object',
         'additionalProperties': False,
@@ -3310,7 +3769,7 @@ class SetBucketEncryption(KMSKeyResolverMixin, BucketActionBase):
                                    futures[future]['Name'])
 
     def process_bucket(self, bucket):
-        s3 = bucket_client(local_session(self.manager.session_factory), bucket)
+        s3 = self.get_bucket_client(bucket)
         if not self.data.get('enabled', True):
             s3.delete_bucket_encryption(Bucket=bucket['Name'])
             return
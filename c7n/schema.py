@@ -15,9 +15,13 @@ All filters and actions are annotated with schema typically using
 the utils.type_schema function.
 """
 from collections import Counter
+import hashlib
 import json
 import inspect
 import logging
+import os
+import sys
+import tempfile
 
 from jsonschema import Draft7Validator as JsonSchemaValidator
 from jsonschema.exceptions import best_match
@@ -35,6 +39,9 @@ from c7n.filters.core import (
     VALUE_TYPES,
 )
 from c7n.structure import StructureParser # noqa
+from c7n.version import version
+
+log = logging.getLogger('custodian.schema')
 
 
 def validate(data, schema=None):
@@ -143,6 +150,154 @@ def specific_error(error):
     return error
 
 
+def iter_resource_types(resource_types=()):
+    """Yield (cloud, type name, resource class) for the given qualified types.
+
+    An empty set of resource types yields every registered resource.
+    """
+    for cloud_name, cloud_type in sorted(clouds.items()):
+        for type_name, resource_type in sorted(cloud_type.resources.items()):
+            r_type_name = "%s.%s" % (cloud_name, type_name)
+            if resource_types and r_type_name not in resource_types:
+                if not resource_type.type_aliases:
+                    continue
+                elif not {"%s.%s" % (cloud_name, ralias) for ralias
+                        in resource_type.type_aliases}.intersection(
+                        resource_types):
+                    continue
+            yield cloud_name, type_name, resource_type
+
+
+def registry_fingerprint(resource_types=()):
+    """Digest of the registries that feed the schema for the given resource types.
+
+    Covers the resource classes and the size and change count of their
+    filter, action, and the execution mode registries along with the
+    packages defining their classes, so registrations, plugin upgrades
+    and local edits all invalidate cached schemas, without visiting each
+    registered class.
+    """
+    entries = [[len(execution), execution.generation]]
+    modules = set(execution.modules)
+    modules.update((__name__, ValueFilter.__module__, ValuesFrom.__module__))
+    for cloud_name, type_name, resource_type in iter_resource_types(resource_types):
+        entry = [cloud_name, type_name, class_name(resource_type)]
+        modules.add(resource_type.__module__)
+        for registry in (resource_type.filter_registry, resource_type.action_registry):
+            entry.extend((len(registry), registry.generation))
+            modules.update(registry.modules)
+        entries.append(entry)
+
+    digest = hashlib.sha256(json.dumps(
+        [entries, package_mtimes(modules)], separators=(',', ':')).encode('utf8'))
+    return digest.hexdigest()
+
+
+def package_mtimes(module_names):
+    """Modification times identifying the packages of the given modules.
+
+    Installs and upgrades replace a package's files, which updates the
+    mtime of its directory, so an installed package is stat'd once. Modules
+    of packages outside site-packages (ie. a development checkout) are
+    edited in place, and are stat'd individually.
+    """
+    packages = {}
+    for name in module_names:
+        packages.setdefault(name.split('.', 1)[0], []).append(name)
+
+    mtimes = []
+    for package, names in sorted(packages.items()):
+        module = sys.modules.get(package)
+        path = getattr(module, '__file__', None)
+        if not path:
+            continue
+        path = os.path.dirname(path)
+        if os.path.basename(os.path.dirname(path)) in ('site-packages', 'dist-packages'):
+            paths = [path]
+        else:
+            paths = [getattr(sys.modules.get(n), '__file__', None) for n in sorted(names)]
+        for p in filter(None, paths):
+            try:
+                mtimes.append([p, os.stat(p).st_mtime])
+            except OSError:
+                mtimes.append([p, None])
+    return mtimes
+
+
+def class_name(klass):
+    return "%s.%s" % (klass.__module__, klass.__name__)
+
+
+class SchemaCache:
+    """Versioned on-disk cache of generated policy schemas.
+
+    Entries are keyed on the custodian version, the requested resource
+    types, and the registry fingerprint, and are only read when a schema
+    is first needed for a set of resource types. Set C7N_SCHEMA_CACHE to
+    a directory to relocate the cache, or to an empty value to disable it.
+    """
+
+    env_var = 'C7N_SCHEMA_CACHE'
+    default_path = '~/.cache/c7n-schema'
+
+    def __init__(self, path):
+        self.path = os.path.abspath(os.path.expanduser(path))
+
+    @classmethod
+    def from_env(cls):
+        path = os.environ.get(cls.env_var)
+        if path is None and os.environ.get('C7N_TEST_RUN'):
+            # keep test runs from writing to the user's cache.
+            path = os.path.join(tempfile.gettempdir(), 'c7n-schema-test')
+        elif path is None:
+            path = cls.default_path
+        if not path:
+            return None
+        return cls(path)
+
+    def get_key(self, resource_types):
+        return {
+            'version': version,
+            'resource_types': sorted(resource_types),
+            'fingerprint': registry_fingerprint(resource_types)}
+
+    def get_path(self, key):
+        digest = hashlib.sha256(json.dumps(
+            key, sort_keys=True).encode('utf8')).hexdigest()
+        return os.path.join(self.path, version, '%s.json' % digest)
+
+    def load(self, resource_types):
+        key = self.get_key(resource_types)
+        path = self.get_path(key)
+        if not os.path.exists(path):
+            return key, None
+        try:
+            with open(path) as fh:
+                data = json.load(fh)
+        except (OSError, ValueError) as e:
+            log.debug("schema cache unreadable path:%s error:%s", path, e)
+            return key, None
+        if data.get('key') != key:
+            return key, None
+        return key, data['schema']
+
+    def save(self, key, schema):
+        path = self.get_path(key)
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'w') as fh:
+                json.dump({'key': key, 'schema': schema}, fh, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log.debug("schema cache not writable path:%s error:%s", path, e)
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        return True
+
+
 def generate(resource_types=()):
     resource_defs = {}
     definitions = {
@@ -262,6 +417,8 @@ def generate(resource_types=()):
                 'mode': {'$ref': '#/definitions/policy-mode'},
                 'source': {'enum': ['describe', 'config', 'inventory',
                                     'resource-graph', 'disk', 'static']},
+                # enumerate, augment and filter resources a page at a time
+                'stream': {'type': 'boolean'},
                 'actions': {
                     'type': 'array',
                 },
@@ -295,37 +452,28 @@ def generate(resource_types=()):
     }
 
     resource_refs = []
-    for cloud_name, cloud_type in sorted(clouds.items()):
-        for type_name, resource_type in sorted(cloud_type.resources.items()):
-            r_type_name = "%s.%s" % (cloud_name, type_name)
-            if resource_types and r_type_name not in resource_types:
-                if not resource_type.type_aliases:
-                    continue
-                elif not {"%s.%s" % (cloud_name, ralias) for ralias
-                        in resource_type.type_aliases}.intersection(
-                        resource_types):
-                    continue
-
-            aliases = []
-            if resource_type.type_aliases:
-                aliases.extend(["%s.%s" % (cloud_name, a) for a in resource_type.type_aliases])
-                # aws gets legacy aliases with no cloud prefix
-                if cloud_name == 'aws':
-                    aliases.extend(resource_type.type_aliases)
-
-            # aws gets additional alias for default name
+    for cloud_name, type_name, resource_type in iter_resource_types(resource_types):
+        r_type_name = "%s.%s" % (cloud_name, type_name)
+        aliases = []
+        if resource_type.type_aliases:
+            aliases.extend(["%s.%s" % (cloud_name, a) for a in resource_type.type_aliases])
+            # aws gets legacy aliases with no cloud prefix
             if cloud_name == 'aws':
-                aliases.append(type_name)
-
-            resource_refs.append(
-                process_resource(
-                    r_type_name,
-                    resource_type,
-                    resource_defs,
-                    aliases,
-                    definitions,
-                    cloud_name
-                ))
+                aliases.extend(resource_type.type_aliases)
+
+        # aws gets additional alias for default name
+        if cloud_name == 'aws':
+            aliases.append(type_name)
+
+        resource_refs.append(
+            process_resource(
+                r_type_name,
+                resource_type,
+                resource_defs,
+                aliases,
+                definitions,
+                cloud_name
+            ))
 
     schema = {
         "$schema": "http://json-schema.org/draft-07/schema#",
@@ -105,21 +105,194 @@ def _common_tag_processer(executor_factory, batch_size, concurrency, client,
                           process_resource_set, id_key, resources, tags,
                           log):
 
-    error = None
-    with executor_factory(max_workers=concurrency) as w:
-        futures = []
-        for resource_set in utils.chunks(resources, size=batch_size):
-            futures.append(
-                w.submit(process_resource_set, client, resource_set, tags))
+    scheduler = TagScheduler(
+        executor_factory, client, process_resource_set,
+        batch_size, concurrency, log)
+    scheduler.add(resources, tags)
+    scheduler.flush()
 
-        for f in as_completed(futures):
-            if f.exception():
-                error = f.exception()
-                log.error(
-                    "Exception with tags: %s  %s", tags, f.exception())
 
-    if error:
-        raise error
+class TagScheduler:
+    """Batches tag api calls for a tagging api.
+
+    Tag sets added for the same resource are merged, resources are
+    grouped by their merged tag set, and each group is submitted in
+    batches of up to batch_size resources per api call.
+
+    Calls go through the adaptive limiter for the client's tagging
+    api, shared with other schedulers and retried calls to that api in
+    the process. When calls are throttled the limit shrinks and the
+    affected batches are retried, the limit recovers as calls succeed.
+    """
+
+    max_attempts = 6
+
+    def __init__(self, executor_factory, client, process_resource_set,
+                 batch_size, concurrency, log):
+        self.executor_factory = executor_factory
+        self.client = client
+        self.process_resource_set = process_resource_set
+        self.batch_size = batch_size
+        self.max_concurrency = concurrency
+        self.log = log
+        self.shape = None
+        self.pending = {}
+        self._limiter = None
+
+    @property
+    def limiter(self):
+        meta = getattr(self.client, 'meta', None)
+        if getattr(meta, 'service_model', None) is not None:
+            return utils.THROTTLES.get(
+                meta.service_model.service_name, meta.region_name, 'tagging')
+        if self._limiter is None:
+            self._limiter = utils.AdaptiveLimiter(self.max_concurrency)
+        return self._limiter
+
+    @property
+    def concurrency(self):
+        return min(self.max_concurrency, self.limiter.concurrency)
+
+    def add(self, resources, tags):
+        """Queue tags to be applied to resources.
+
+        tags may be a mapping, a list of Key/Value dicts, or a list of
+        tag keys (for removal), matching what process_resource_set expects.
+        """
+        if isinstance(tags, dict):
+            shape, tag_map = 'map', tags
+        elif not tags:
+            shape, tag_map = self.shape, {}
+        elif isinstance(tags[0], dict):
+            shape, tag_map = 'list', {t['Key']: t['Value'] for t in tags}
+        else:
+            shape, tag_map = 'keys', dict.fromkeys(tags)
+        if self.shape and self.shape != shape:
+            raise ValueError("Mixed tag formats %s %s" % (self.shape, shape))
+        self.shape = shape
+        for r in resources:
+            self.pending.setdefault(id(r), (r, {}))[1].update(tag_map)
+
+    def format_tags(self, tag_items):
+        if self.shape == 'map':
+            return dict(tag_items)
+        elif self.shape == 'list':
+            return [{'Key': k, 'Value': v} for k, v in tag_items]
+        return [k for k, v in tag_items]
+
+    def flush(self):
+        groups = {}
+        for r, tag_map in self.pending.values():
+            groups.setdefault(tuple(sorted(tag_map.items())), []).append(r)
+        self.pending = {}
+
+        batches = []
+        for tag_items, group in groups.items():
+            tags = self.format_tags(tag_items)
+            for resource_set in utils.chunks(group, size=self.batch_size):
+                batches.append((resource_set, tags))
+        if batches:
+            self.process_batches(batches)
+
+    def process_batches(self, batches):
+        error = None
+        delays = utils.backoff_delays(1, 2 ** self.max_attempts, jitter=True)
+        for attempt in range(self.max_attempts):
+            retries = []
+            limiter = self.limiter
+            with self.executor_factory(max_workers=self.concurrency) as w:
+                futures = {}
+                for resource_set, tags in batches:
+                    futures[w.submit(
+                        self.process_batch, limiter, resource_set, tags)] = (
+                            resource_set, tags)
+                for f in as_completed(futures):
+                    if not f.exception():
+                        continue
+                    if (utils.is_throttle_error(f.exception()) and
+                            attempt + 1 < self.max_attempts):
+                        retries.append(futures[f])
+                        continue
+                    error = f.exception()
+                    self.log.error(
+                        "Exception with tags: %s  %s", futures[f][1], f.exception())
+            if not retries:
+                break
+            self.log.debug(
+                "Tagging throttled, retrying %d batches with concurrency %d",
+                len(retries), self.concurrency)
+            time.sleep(next(delays))
+            batches = retries
+
+        if error:
+            raise error
+
+    def process_batch(self, limiter, resource_set, tags):
+        with limiter.slot():
+            return self.process_resource_set(self.client, resource_set, tags)
+
+
+def flush_tag_schedulers(manager):
+    """Write tags still queued on the manager's tag schedulers.
+
+    Tag actions leave their tags queued for a following tag action to
+    write, policy execution calls this once its actions have run, so
+    queued tags are written even when a later action fails.
+    """
+    for scheduler in getattr(manager, 'tag_schedulers', {}).values():
+        if scheduler.pending:
+            scheduler.flush()
+
+
+class TagWriterMixin:
+    """Coalesces tag writes of consecutive tag actions within a policy.
+
+    Tag actions which write through the same tagging api share a
+    scheduler on the resource manager. When the next action of the
+    policy also writes through that api, queued tags are left for it to
+    flush, so tagging and marking resources for an operation in one
+    policy results in a single call per batch of resources. Tags left
+    queued when a later action fails are written by
+    :py:func:`flush_tag_schedulers`.
+    """
+
+    def get_tagger(self):
+        return self
+
+    def get_tag_scheduler_key(self):
+        method = type(self.get_tagger()).process_resource_set
+        return getattr(method, '__func__', method)
+
+    def get_tag_scheduler(self, client, batch_size):
+        schedulers = getattr(self.manager, 'tag_schedulers', None)
+        if schedulers is None:
+            schedulers = self.manager.tag_schedulers = {}
+        key = self.get_tag_scheduler_key()
+        scheduler = schedulers.get(key)
+        if scheduler is None:
+            scheduler = schedulers[key] = TagScheduler(
+                self.executor_factory, client,
+                self.get_tagger().process_resource_set,
+                batch_size, self.concurrency, self.log)
+        # sessions and their clients are periodically refreshed
+        scheduler.client = client
+        scheduler.batch_size = min(scheduler.batch_size, batch_size)
+        return scheduler
+
+    def schedule_tags(self, client, resources, tags, batch_size):
+        scheduler = self.get_tag_scheduler(client, batch_size)
+        scheduler.add(resources, tags)
+        next_action = self.get_next_action()
+        if (isinstance(next_action, TagWriterMixin) and
+                next_action.get_tag_scheduler_key() == self.get_tag_scheduler_key()):
+            return
+        scheduler.flush()
+
+    def get_next_action(self):
+        actions = self.manager.actions
+        for idx, a in enumerate(actions):
+            if a is self and idx + 1 < len(actions):
+                return actions[idx + 1]
 
 
 class TagTrim(Action):
@@ -361,11 +534,13 @@ class TagCountFilter(Filter):
         return op(tag_count, count)
 
 
-class Tag(Action):
+class Tag(TagWriterMixin, Action):
     """Tag an ec2 resource.
     """
 
     batch_size = 25
+    # resource ids per ec2 create_tags call
+    ec2_batch_size = 1000
     concurrency = 2
 
     schema = utils.type_schema(
@@ -407,12 +582,16 @@ class Tag(Action):
 
         self.interpolate_values(tags)
 
-        batch_size = self.data.get('batch_size', self.batch_size)
-
         client = self.get_client()
-        _common_tag_processer(
-            self.executor_factory, batch_size, self.concurrency, client,
-            self.process_resource_set, self.id_key, resources, tags, self.log)
+        self.schedule_tags(client, resources, tags, self.get_batch_size())
+
+    def get_batch_size(self):
+        if 'batch_size' in self.data:
+            return self.data['batch_size']
+        # subclasses tagging through other apis set their own batch size
+        if type(self).process_resource_set is Tag.process_resource_set:
+            return self.ec2_batch_size
+        return self.batch_size
 
     def process_resource_set(self, client, resource_set, tags):
         mid = self.manager.get_model().id
@@ -440,6 +619,8 @@ class RemoveTag(Action):
     """
 
     batch_size = 100
+    # resource ids per ec2 delete_tags call
+    ec2_batch_size = 1000
     concurrency = 2
 
     schema = utils.type_schema(
@@ -453,6 +634,9 @@ class RemoveTag(Action):
 
         tags = self.data.get('tags', [DEFAULT_TAG])
         batch_size = self.data.get('batch_size', self.batch_size)
+        if ('batch_size' not in self.data and
+                type(self).process_resource_set is RemoveTag.process_resource_set):
+            batch_size = self.ec2_batch_size
 
         client = self.get_client()
         _common_tag_processer(
@@ -568,7 +752,7 @@ class RenameTag(Action):
             self.manager.resource_type.service)
 
 
-class TagDelayedAction(Action):
+class TagDelayedAction(TagWriterMixin, Action):
     """Tag resources for future action.
 
     The optional 'tz' parameter can be used to adjust the clock to align
@@ -664,17 +848,20 @@ class TagDelayedAction(Action):
 
         # if the tag implementation has a specified batch size, it's typically
         # due to some restraint on the api so we defer to that.
-        batch_size = getattr(
-            self.manager.action_registry.get('tag'), 'batch_size', self.batch_size)
+        tagger = self.get_tagger()
+        if hasattr(tagger, 'get_batch_size'):
+            batch_size = tagger.get_batch_size()
+        else:
+            batch_size = getattr(tagger, 'batch_size', self.batch_size)
 
         client = self.get_client()
-        _common_tag_processer(
-            self.executor_factory, batch_size, self.concurrency, client,
-            self.process_resource_set, self.id_key, resources, tags, self.log)
+        self.schedule_tags(client, resources, tags, batch_size)
+
+    def get_tagger(self):
+        return self.manager.action_registry['tag']({}, self.manager)
 
     def process_resource_set(self, client, resource_set, tags):
-        tagger = self.manager.action_registry['tag']({}, self.manager)
-        tagger.process_resource_set(client, resource_set, tags)
+        self.get_tagger().process_resource_set(client, resource_set, tags)
 
     def get_client(self):
         return utils.local_session(
@@ -836,10 +1023,7 @@ class UniversalTag(Tag):
 
         batch_size = self.data.get('batch_size', self.batch_size)
         client = self.get_client()
-
-        _common_tag_processer(
-            self.executor_factory, batch_size, self.concurrency, client,
-            self.process_resource_set, self.id_key, resources, tags, self.log)
+        self.schedule_tags(client, resources, tags, batch_size)
 
     def process_resource_set(self, client, resource_set, tags):
         arns = self.manager.get_arns(resource_set)
@@ -920,15 +1104,13 @@ class UniversalTagDelayedAction(TagDelayedAction):
 
         batch_size = self.data.get('batch_size', self.batch_size)
         client = self.get_client()
+        self.schedule_tags(client, resources, tags, batch_size)
 
-        _common_tag_processer(
-            self.executor_factory, batch_size, self.concurrency, client,
-            self.process_resource_set, self.id_key, resources, tags, self.log)
+    def get_tagger(self):
+        return self
 
-    def process_resource_set(self, client, resource_set, tags):
-        arns = self.manager.get_arns(resource_set)
-        return universal_retry(
-            client.tag_resources, ResourceARNList=arns, Tags=tags)
+    # shared with the tag action, so their tag writes are coalesced
+    process_resource_set = UniversalTag.process_resource_set
 
     def get_client(self):
         return utils.local_session(
@@ -1,5 +1,6 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
+import contextlib
 import copy
 from datetime import datetime, timedelta
 import json
@@ -274,6 +275,12 @@ def reset_session_cache():
     for k in [k for k in dir(CONN_CACHE) if not k.startswith('_')]:
         setattr(CONN_CACHE, k, {})
 
+    THROTTLES.reset()
+
+    from c7n.credentials import CLIENT_POOL
+    if CLIENT_POOL is not None:
+        CLIENT_POOL.clear()
+
 
 def annotation(i, k):
     return i.get(k, ())
@@ -359,6 +366,116 @@ def snapshot_identifier(prefix, db_identifier):
 
 retry_log = logging.getLogger('c7n.retry')
 
+THROTTLE_CODES = (
+    'Throttling', 'ThrottlingException', 'ThrottledException', 'Throttled',
+    'RequestLimitExceeded', 'Client.RequestLimitExceeded',
+    'TooManyRequestsException', 'RequestThrottled', 'SlowDown')
+
+
+def is_throttle_error(e):
+    return getattr(e, 'response', {}).get('Error', {}).get('Code') in THROTTLE_CODES
+
+
+class AdaptiveLimiter:
+    """Shared concurrency limit for calls to an api operation.
+
+    The limit is adjusted additively up on success and multiplicatively
+    down on throttling (AIMD), throttles of calls started before the last
+    decrease are not counted again, so a burst of throttled in flight
+    calls only shrinks the limit once.
+    """
+
+    def __init__(self, max_limit=64, min_limit=1, decrease=0.5):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.decrease = decrease
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self.epoch = 0
+        self.calls = 0
+        self.throttles = 0
+        self.cond = threading.Condition()
+
+    @property
+    def concurrency(self):
+        return max(self.min_limit, int(self.limit))
+
+    def acquire(self):
+        with self.cond:
+            while self.in_flight >= self.concurrency:
+                self.cond.wait()
+            self.in_flight += 1
+            return self.epoch
+
+    def release(self, epoch, throttled=False):
+        with self.cond:
+            self.in_flight -= 1
+            self.calls += 1
+            if throttled:
+                self.throttles += 1
+                if epoch == self.epoch:
+                    self.epoch += 1
+                    self.limit = max(self.min_limit, self.limit * self.decrease)
+            elif self.limit < self.max_limit:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self.cond.notify_all()
+
+    @contextlib.contextmanager
+    def slot(self):
+        epoch = self.acquire()
+        throttled = False
+        try:
+            yield
+        except ClientError as e:
+            throttled = is_throttle_error(e)
+            raise
+        finally:
+            self.release(epoch, throttled)
+
+    def get_stats(self):
+        return {
+            'limit': round(self.limit, 2),
+            'calls': self.calls,
+            'throttles': self.throttles}
+
+
+class ThrottleRegistry:
+    """Adaptive limiters keyed by (service, region, operation)."""
+
+    def __init__(self):
+        self.limiters = {}
+        self.lock = threading.Lock()
+
+    def get(self, service, region, operation, max_limit=64):
+        key = (service, region, operation)
+        limiter = self.limiters.get(key)
+        if limiter is None:
+            with self.lock:
+                limiter = self.limiters.setdefault(key, AdaptiveLimiter(max_limit))
+        return limiter
+
+    def get_client_limiter(self, func):
+        """Return the limiter for a bound boto client method, if func is one."""
+        meta = getattr(getattr(func, '__self__', None), 'meta', None)
+        service_model = getattr(meta, 'service_model', None)
+        if service_model is None:
+            return None
+        return self.get(
+            service_model.service_name, meta.region_name, func.__name__)
+
+    def get_stats(self):
+        """Limiter state for operations which have been throttled."""
+        return {
+            "%s.%s.%s" % k: limiter.get_stats()
+            for k, limiter in list(self.limiters.items()) if limiter.throttles}
+
+    def reset(self):
+        with self.lock:
+            self.limiters.clear()
+
+
+THROTTLES = ThrottleRegistry()
+
 
 def get_retry(retry_codes=(), max_attempts=8, min_delay=1, log_retries=False):
     """Decorator for retry boto3 api call on transient errors.
@@ -376,15 +493,20 @@ def get_retry(retry_codes=(), max_attempts=8, min_delay=1, log_retries=False):
            derived from the number of attempts.
 
     Returns a function for invoking aws client calls that
-    retries on retryable error codes.
+    retries on retryable error codes. Calls to boto client methods also
+    wait on the operation's shared :py:class:`AdaptiveLimiter`.
     """
     max_delay = max(min_delay, 2) ** max_attempts
 
     def _retry(func, *args, ignore_err_codes=(), **kw):
+        limiter = THROTTLES.get_client_limiter(func)
         for idx, delay in enumerate(
                 backoff_delays(min_delay, max_delay, jitter=True)):
             try:
-                return func(*args, **kw)
+                if limiter is None:
+                    return func(*args, **kw)
+                with limiter.slot():
+                    return func(*args, **kw)
             except ClientError as e:
                 if e.response['Error']['Code'] in ignore_err_codes:
                     return
@@ -133,6 +133,10 @@ class UtilTest(BaseTest):
 
 class TracerTest(BaseTest):
 
+    def setUp(self):
+        super().setUp()
+        aws.load_xray()
+
     def test_context(self):
         store = aws.XrayContext()
         self.assertEqual(store.handle_context_missing(), None)
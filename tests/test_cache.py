@@ -3,8 +3,12 @@
 from unittest import TestCase
 from c7n import cache, config
 from argparse import Namespace
+from datetime import datetime, timedelta
 import pickle
+import shutil
+import sqlite3
 import tempfile
+import threading
 import mock
 import os
 
@@ -14,7 +18,7 @@ class TestCache(TestCase):
     def test_factory(self):
         self.assertIsInstance(cache.factory(None), cache.NullCache)
         test_config = Namespace(cache_period=60, cache="test-cloud-custodian.cache")
-        self.assertIsInstance(cache.factory(test_config), cache.FileCacheManager)
+        self.assertIsInstance(cache.factory(test_config), cache.SqlKvCache)
         test_config.cache = None
         self.assertIsInstance(cache.factory(test_config), cache.NullCache)
 
@@ -150,3 +154,169 @@ class FileCacheManagerTest(TestCase):
         self.addCleanup(os.unlink, t.name)
         self.addCleanup(t.close)
         return t
+
+
+class SqlKvCacheTest(TestCase):
+
+    def get_cache(self, cache_period=60):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        c = cache.SqlKvCache(Namespace(
+            cache_period=cache_period,
+            cache=os.path.join(temp_dir, 'nested', 'c7n.cache')))
+        self.addCleanup(c.close)
+        return c
+
+    def test_get_set(self):
+        c = self.get_cache()
+        self.assertTrue(c.load())
+        self.assertTrue(os.path.exists(c.cache_path))
+        k1 = {"account": "12345678901234", "region": "us-west-2", "resource": "ec2"}
+        k2 = {"account": "98765432101234", "region": "eu-west-1", "resource": "asg"}
+        self.assertEqual(c.get(k1), None)
+        c.save(k1, [{'InstanceId': 'i-1'}])
+        c.save(k2, [{'AutoScalingGroupName': 'asg'}])
+        self.assertEqual(c.get(k1), [{'InstanceId': 'i-1'}])
+
+        c2 = cache.SqlKvCache(c.config)
+        self.addCleanup(c2.close)
+        self.assertEqual(c2.get(k2), [{'AutoScalingGroupName': 'asg'}])
+        c2.save(k2, [])
+        self.assertEqual(c.get(k2), [])
+        self.assertTrue(c.size() > 0)
+
+    def test_per_key_expiry(self):
+        c = self.get_cache(cache_period=5)
+        c.load()
+        c.save('stale', [1], timestamp=datetime.utcnow() - timedelta(minutes=10))
+        c.save('fresh', [2])
+        self.assertEqual(c.get('stale'), None)
+        self.assertEqual(c.get('fresh'), [2])
+
+        # expired entries are purged when a cache is opened.
+        c.save('stale', [1], timestamp=datetime.utcnow() - timedelta(minutes=10))
+        c2 = cache.SqlKvCache(c.config)
+        self.addCleanup(c2.close)
+        c2.load()
+        self.assertEqual(
+            c2.conn.execute('select count(*) from c7n_cache').fetchone()[0], 1)
+
+    def test_migrate_legacy_pickle(self):
+        c = self.get_cache()
+        os.makedirs(os.path.dirname(c.cache_path))
+        with open(c.cache_path, 'wb') as fh:
+            pickle.dump({pickle.dumps('key'): [1, 2]}, fh, protocol=2)
+        self.assertTrue(c.load())
+        self.assertEqual(c.get('key'), None)
+        c.save('key', [3])
+        self.assertEqual(c.get('key'), [3])
+
+    def test_init_keeps_empty_file(self):
+        c = self.get_cache()
+        os.makedirs(os.path.dirname(c.cache_path))
+        open(c.cache_path, 'wb').close()
+        with mock.patch.object(cache.os, 'remove') as remove:
+            self.assertTrue(c.load())
+        self.assertFalse(remove.called)
+        c.save('key', [1])
+        self.assertEqual(c.get('key'), [1])
+
+    def test_accounts_share_database(self):
+        c = self.get_cache()
+        config = dict(vars(c.config), region='us-east-1')
+        accounts = []
+        for account_id in ('111111111111', '222222222222'):
+            account = cache.SqlKvCache(Namespace(account_id=account_id, **config))
+            self.addCleanup(account.close)
+            accounts.append(account)
+        a, b = accounts
+        self.assertEqual(a.cache_path, b.cache_path)
+
+        # keys without the account are still scoped to it
+        a.save('iam-credential-report', 'report-a')
+        self.assertEqual(b.get('iam-credential-report'), None)
+        b.save('iam-credential-report', 'report-b')
+        self.assertEqual(a.get('iam-credential-report'), 'report-a')
+        self.assertEqual(b.get('iam-credential-report'), 'report-b')
+
+        # as are fill leases
+        with a.fill_lock('ec2'):
+            with b.fill_lock('ec2'):
+                pass
+
+    def test_migrate_unscoped_table(self):
+        c = self.get_cache()
+        os.makedirs(os.path.dirname(c.cache_path))
+        conn = sqlite3.connect(c.cache_path)
+        conn.execute('create table c7n_cache (key blob primary key, value blob, '
+                     'create_date timestamp)')
+        conn.commit()
+        conn.close()
+        self.assertTrue(c.load())
+        c.save('key', [1])
+        self.assertEqual(c.get('key'), [1])
+
+    def test_load_error(self):
+        c = self.get_cache()
+        with mock.patch.object(cache.sqlite3, 'connect') as connect:
+            connect.side_effect = sqlite3.OperationalError('unable to open')
+            self.assertFalse(c.load())
+            self.assertEqual(c.get('key'), None)
+            c.save('key', [1])
+        self.assertEqual(c.conn, None)
+
+    def test_fill_lock_exclusive(self):
+        c = self.get_cache()
+        c2 = cache.SqlKvCache(c.config)
+        self.addCleanup(c2.close)
+        c2.load()
+        key = sqlite3.Binary(pickle.dumps('ec2'))
+
+        with c.fill_lock('ec2'):
+            self.assertFalse(c2._acquire(key, 'other'))
+            # locks are per key
+            with c2.fill_lock('asg'):
+                pass
+        self.assertTrue(c2._acquire(key, 'other'))
+        c2._release(key, 'other')
+
+    def test_fill_lock_lease_expiry(self):
+        c = self.get_cache()
+        c2 = cache.SqlKvCache(c.config)
+        self.addCleanup(c2.close)
+        c.load()
+        c2.load()
+        key = sqlite3.Binary(pickle.dumps('ec2'))
+        # simulate a worker which died holding the lock
+        c.lease_period = -1
+        self.assertTrue(c._acquire(key, 'dead'))
+        self.assertTrue(c2._acquire(key, 'live'))
+        c2._release(key, 'live')
+
+    def test_fill_lock_single_flight(self):
+        c = self.get_cache()
+        c.load()
+        c.poll_interval = 0.01
+        fetches = []
+
+        def fill():
+            worker = cache.SqlKvCache(c.config)
+            worker.poll_interval = 0.01
+            with worker.fill_lock('ec2'):
+                if worker.get('ec2') is None:
+                    fetches.append(1)
+                    worker.save('ec2', [{'InstanceId': 'i-1'}])
+            worker.close()
+
+        threads = [threading.Thread(target=fill) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(fetches), 1)
+        self.assertEqual(c.get('ec2'), [{'InstanceId': 'i-1'}])
+
+    def test_null_fill_lock(self):
+        for c in (cache.NullCache(None), cache.InMemoryCache()):
+            with c.fill_lock('ec2'):
+                pass
@@ -535,6 +535,84 @@ class RunTest(CliTest):
             ["custodian", "run", "-s", temp_dir, "--debug", yaml_file], CustomError
         )
 
+    def test_parallel(self):
+        from c7n.executor import MainThreadExecutor
+        from c7n.policy import Policy
+
+        executed = []
+
+        def policy_call(p):
+            executed.append((p.name, p.options.region))
+            if p.name == 'error':
+                raise Exception("foobar")
+
+        self.patch(Policy, "__call__", policy_call)
+        self.patch(commands, "ProcessPoolExecutor", MainThreadExecutor)
+
+        temp_dir = self.get_temp_dir()
+        yaml_file = self.write_policy_file(
+            {
+                "policies": [
+                    {"name": "error", "resource": "ec2"},
+                    {"name": "ec2-running", "resource": "ec2",
+                     "filters": [{"State.Name": "running"}]},
+                    {"name": "ec2-stopped", "resource": "aws.ec2",
+                     "query": [{"instance-state-name": "stopped"}]},
+                    {"name": "asg", "resource": "asg"},
+                ]
+            }
+        )
+        self.run_and_expect_failure(
+            ["custodian", "run", "--parallel", "2",
+             "-r", "us-east-1", "-r", "us-west-2", "-s", temp_dir, yaml_file],
+            2)
+        self.assertEqual(len(executed), 8)
+        self.assertEqual(
+            {name for name, region in executed},
+            {"error", "ec2-running", "ec2-stopped", "asg"})
+
+    def test_run_policy_group_isolates_errors(self):
+        from c7n.config import Config
+        from c7n.policy import Policy
+
+        executed = []
+        self.patch(Policy, "__call__", lambda p: executed.append(p.name))
+        options = Config.empty()
+        group = [
+            ({"name": "invalid", "resource": "ec2",
+              "filters": [{"type": "bogus"}]}, options),
+            ({"name": "valid", "resource": "ec2"}, options)]
+        self.assertEqual(commands.run_policy_group(group), ["invalid"])
+        self.assertEqual(executed, ["valid"])
+
+    def test_parallel_cache_disabled(self):
+        from c7n.config import Config
+        from c7n.executor import MainThreadExecutor
+
+        self.patch(commands, "ProcessPoolExecutor", MainThreadExecutor)
+        self.patch(commands, "run_policy_group", lambda group: [])
+        log_output = self.capture_logging('custodian.commands')
+        policy = self.load_policy({"name": "ec2", "resource": "ec2"})
+        commands._run_parallel(
+            Config.empty(cache='', cache_period=15), [policy], 2)
+        self.assertIn("Resource cache is disabled", log_output.getvalue())
+
+    def test_group_policies(self):
+        policies = [
+            self.load_policy({"name": "ec2-a", "resource": "ec2"}),
+            self.load_policy({"name": "ec2-b", "resource": "aws.ec2",
+                              "filters": [{"State.Name": "running"}]}),
+            self.load_policy({"name": "ec2-query", "resource": "ec2",
+                              "query": [{"instance-state-name": "running"}]}),
+            self.load_policy({"name": "ec2-west", "resource": "ec2"},
+                             config={"region": "us-west-2"}),
+            self.load_policy({"name": "asg", "resource": "asg"}),
+        ]
+        groups = commands.group_policies(policies)
+        self.assertEqual(
+            [[p.name for p in g] for g in groups],
+            [["ec2-a", "ec2-b"], ["ec2-query"], ["ec2-west"], ["asg"]])
+
 
 class MetricsTest(CliTest):
 
@@ -55,6 +55,33 @@ class CloudFront(BaseTest):
         resources = p.run()
         self.assertEqual(len(resources), 0)
 
+    def test_shield_metric_filter_batch(self):
+        factory = self.replay_flight_data("test_distribution_shield_metrics_batch")
+        p = self.load_policy(
+            {
+                "name": "ddos-filter",
+                "resource": "distribution",
+                "filters": [
+                    {
+                        "type": "shield-metrics",
+                        "name": "DDoSDetected",
+                        "value": 1,
+                        "op": "ge",
+                        "batch": True,
+                    }
+                ],
+            },
+            session_factory=factory,
+        )
+        self.assertEqual(
+            p.resource_manager.filters[0].get_permissions(),
+            ("cloudwatch:GetMetricData",))
+        resources = p.run()
+        self.assertEqual([r["Id"] for r in resources], ["E53370FUHBNLK"])
+        self.assertEqual(
+            resources[0]["c7n.metrics"]["AWS/DDoSProtection.DDoSDetected.Average"][0][
+                "Average"], 1.0)
+
     def test_distribution_metric_filter(self):
         factory = self.replay_flight_data("test_distribution_metric_filter")
         p = self.load_policy(
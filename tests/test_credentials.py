@@ -1,11 +1,14 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
 import os
+from boto3 import Session
+from botocore.config import Config
 from botocore.exceptions import ClientError
 import placebo
 
 from c7n import credentials
-from c7n.credentials import SessionFactory, assumed_session, get_sts_client
+from c7n.credentials import (
+    ClientPool, SessionFactory, assumed_session, get_sts_client)
 from c7n.version import version
 from c7n.utils import local_session
 
@@ -82,3 +85,64 @@ class Credential(BaseTest):
         client = local_session(factory).client('ec2')
         self.assertTrue(
             'check-ec2' in client._client_config.user_agent)
+
+
+class ClientPoolTest(BaseTest):
+
+    def get_session(self, pool, key='foo', subscribers=()):
+        session = Session(
+            region_name='us-east-1', aws_access_key_id=key, aws_secret_access_key='bar')
+        return pool.attach(session, subscribers)
+
+    def test_client_pool_shared(self):
+        pool = ClientPool(25)
+        client = self.get_session(pool).client('sqs')
+        self.assertIs(self.get_session(pool).client('sqs'), client)
+        self.assertEqual(client.meta.config.max_pool_connections, 25)
+        self.assertIsNot(
+            self.get_session(pool).client('sqs', region_name='us-west-2'), client)
+        self.assertIsNot(self.get_session(pool, 'baz').client('sqs'), client)
+        self.assertIsNot(
+            self.get_session(pool, subscribers=(object(),)).client('sqs'), client)
+
+        config_client = self.get_session(pool).client(
+            'sqs', config=Config(retries={'max_attempts': 2}))
+        self.assertIsNot(config_client, client)
+        self.assertEqual(config_client.meta.config.max_pool_connections, 25)
+
+    def test_client_pool_evict_on_refresh(self):
+        pool = ClientPool()
+        session = self.get_session(pool)
+        client = session.client('ec2')
+        credentials = session._session.get_credentials()
+        credentials.access_key = 'rotated'
+        self.assertIsNot(session.client('ec2'), client)
+        self.assertEqual(
+            [k[0] for k in pool.clients], ['rotated'])
+
+    def test_client_pool_release(self):
+        pool = ClientPool()
+        subscribers = (object(),)
+        self.get_session(pool, subscribers=subscribers).client('ec2')
+        self.get_session(pool).client('ec2')
+        pool.release(subscribers)
+        self.assertEqual(len(pool.clients), 1)
+
+    def test_client_pool_lru(self):
+        pool = ClientPool()
+        pool.max_clients = 2
+        first = self.get_session(pool, 'a').client('ec2')
+        self.get_session(pool, 'b').client('ec2')
+        self.assertIs(self.get_session(pool, 'a').client('ec2'), first)
+        self.get_session(pool, 'c').client('ec2')
+        self.assertEqual([k[0] for k in pool.clients], ['a', 'c'])
+
+    def test_client_pool_from_env(self):
+        self.patch(os, 'environ', {'C7N_TEST_RUN': 'true'})
+        self.assertEqual(
+            ClientPool.from_env().max_pool_connections,
+            ClientPool.default_max_pool_connections)
+        self.patch(os, 'environ', {ClientPool.env_var: '0'})
+        self.assertIsNone(ClientPool.from_env())
+        self.patch(os, 'environ', {ClientPool.env_var: '12'})
+        self.assertEqual(ClientPool.from_env().max_pool_connections, 12)
@@ -8,6 +8,9 @@ import random
 import unittest
 import os
 
+import mock
+
+from c7n.config import Config
 from c7n.exceptions import PolicyValidationError
 from c7n.executor import MainThreadExecutor
 from c7n import filters as base_filters
@@ -17,6 +20,7 @@ from c7n.testing import mock_datetime_now
 from c7n.utils import annotation
 from .common import instance, event_data, Bag, BaseTest
 from c7n.filters.core import ValueRegex, parse_date as core_parse_date
+from c7n.filters.related import RelatedResourceIndex
 
 
 class BaseFilterTest(unittest.TestCase):
@@ -101,6 +105,33 @@ class TestOrFilter(unittest.TestCase):
         self.assertEqual(f.process(results), results)
         self.assertEqual(f.process([instance(Architecture="amd64")]), [])
 
+    def test_or_compiled_annotations(self):
+        f = filters.factory(
+            {"or": [
+                {"Architecture": "x86_64"},
+                {"and": [{"Color": "green"}, {"tag:Name": "present"}]},
+                {"not": [{"Color": "blue"}]}]}
+        )
+        self.assertTrue(callable(f.compile()))
+        resources = [
+            instance(Architecture="x86_64", Color="blue"),
+            instance(Architecture="armv8", Color="green"),
+            instance(Architecture="armv8", Color="blue"),
+        ]
+        results = f.process(resources)
+        self.assertEqual(results, resources[:2])
+        self.assertEqual(
+            annotation(results[0], base_filters.ANNOTATION_KEY), ["Architecture"])
+        self.assertEqual(
+            annotation(results[1], base_filters.ANNOTATION_KEY), ["Color", "tag:Name"])
+        self.assertFalse(annotation(resources[2], base_filters.ANNOTATION_KEY))
+
+    def test_or_uncompiled(self):
+        f = filters.factory(
+            {"or": [{"Architecture": "x86_64"}, {"type": "instance-age", "days": 1}]}
+        )
+        self.assertEqual(f.compile(), None)
+
 
 class TestAndFilter(unittest.TestCase):
 
@@ -230,6 +261,25 @@ class TestValueFilter(unittest.TestCase):
         self.assertEqual(vf.v, None)
         self.assertFalse(res)
 
+    def test_value_compile(self):
+        vf = filters.factory({"type": "value", "key": "a.b", "value": "absent"})
+        matcher = vf.compile()
+        self.assertIs(vf.compile(), matcher)
+        self.assertTrue(matcher({"a": {}}))
+        self.assertFalse(matcher({"a": {"b": 1}}))
+        self.assertFalse(matcher(None))
+
+        vf = filters.factory({
+            "type": "value", "key": "c7n:size", "op": "gte",
+            "value_type": "integer", "value": 5})
+        self.assertTrue(vf.match({"c7n:size": "10"}))
+        self.assertFalse(vf.match({"c7n:size": "2"}))
+
+        vf = filters.factory({
+            "type": "value", "key": "tag:Name", "op": "in", "value": ["a", "b"]})
+        self.assertTrue(vf.match({"Tags": [{"Key": "Name", "Value": "a"}]}))
+        self.assertFalse(vf.match({"Tags": []}))
+
 
 class TestAgeFilter(unittest.TestCase):
 
@@ -1055,6 +1105,44 @@ class TestMetricsFilter(BaseTest):
                 for res in resources)
         )
 
+    def test_metrics_batch(self):
+        self.patch(ELB, "executor_factory", MainThreadExecutor)
+        session_factory = self.replay_flight_data("test_metrics_batch")
+
+        p = self.load_policy(
+            {
+                "name": "elb-metrics-batch",
+                "resource": "elb",
+                "filters": [
+                    {
+                        "type": "metrics",
+                        "value": 0,
+                        "name": "RequestCount",
+                        "op": "eq",
+                        "statistics": "Sum",
+                        "missing-value": 0.0,
+                        "batch": True,
+                    }
+                ],
+            },
+            config={"account_id": "644160558196"},
+            session_factory=session_factory,
+        )
+        self.assertEqual(
+            p.resource_manager.filters[0].get_permissions(),
+            ("cloudwatch:GetMetricData",))
+        resources = p.run()
+        self.assertEqual(
+            sorted(r["LoadBalancerName"] for r in resources),
+            ["test-elb-missing-metrics", "test-elb-zero-metrics"])
+        datapoints = {
+            r["LoadBalancerName"]: r["c7n.metrics"]["AWS/ELB.RequestCount.Sum"]
+            for r in resources}
+        self.assertEqual(datapoints["test-elb-zero-metrics"][0]["Sum"], 0.0)
+        self.assertEqual(
+            datapoints["test-elb-missing-metrics"][0]["c7n:detail"],
+            "Fill value for missing data")
+
     def test_metric_period_rounding(self):
         """Round the start time for metrics queries to the top of the previous hour"""
 
@@ -1090,6 +1178,45 @@ class TestMetricsFilter(BaseTest):
         self.assertEqual(len(datapoints), 1)
 
 
+class TestRelatedResourceIndex(unittest.TestCase):
+
+    def get_manager(self, cache='memory', cache_period=15):
+        groups = [{'GroupId': 'sg-%d' % i} for i in range(20)]
+        manager = mock.MagicMock()
+        manager.config = Config.empty(
+            cache=cache, cache_period=cache_period, account_id='123', region='us-east-1')
+        manager.get_model.return_value = Bag(id='GroupId')
+        manager.get_resources.side_effect = lambda ids: [
+            g for g in groups if g['GroupId'] in ids]
+        manager.resources.return_value = groups
+        return manager
+
+    def test_index_lookups(self):
+        self.addCleanup(RelatedResourceIndex.clear)
+        manager = self.get_manager()
+        index = RelatedResourceIndex.get_index(manager)
+        self.assertIs(index, RelatedResourceIndex.get_index(manager))
+
+        self.assertEqual(
+            index.get_resources(['sg-1', 'sg-99']), {'sg-1': {'GroupId': 'sg-1'}})
+        self.assertEqual(index.get_resources(['sg-1', 'sg-99']).keys(), {'sg-1'})
+        manager.get_resources.assert_called_once_with(['sg-1', 'sg-99'])
+        self.assertFalse(manager.resources.called)
+
+        ids = ['sg-%d' % i for i in range(2, 14)]
+        self.assertEqual(sorted(index.get_resources(ids)), sorted(ids))
+        self.assertEqual(len(index.get_resources(['sg-15', 'sg-16'])), 2)
+        manager.resources.assert_called_once_with()
+        self.assertEqual(manager.get_resources.call_count, 1)
+        self.assertEqual(len(index.all_resources()), 20)
+
+    def test_index_not_shared_without_cache(self):
+        manager = self.get_manager(cache='')
+        self.assertIsNot(
+            RelatedResourceIndex.get_index(manager),
+            RelatedResourceIndex.get_index(manager))
+
+
 class TestReduceFilter(BaseFilterTest):
 
     def instances(self):
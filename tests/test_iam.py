@@ -1817,6 +1817,36 @@ class CrossAccountChecker(TestCase):
             violations = checker.check(p)
             self.assertEqual(bool(violations), expected)
 
+    def test_check_memoized(self):
+        PolicyChecker.clear_cache()
+        self.addCleanup(PolicyChecker.clear_cache)
+        policy = {
+            "Version": "2012-10-17",
+            "Statement": [
+                {"Action": "SQS:SendMessage", "Effect": "Allow",
+                 "Principal": "*"}]}
+        text = json.dumps(policy)
+
+        checker = PolicyChecker({"allowed_accounts": {"221800032964"}})
+        with mock.patch.object(
+                PolicyChecker, 'evaluate', autospec=True,
+                side_effect=PolicyChecker.evaluate) as evaluate:
+            results = checker.check_many([text, None, json.dumps(policy, indent=2)])
+            self.assertEqual(results[0], policy['Statement'])
+            self.assertEqual(results, [results[0], None, results[0]])
+            self.assertIsNot(results[0], results[2])
+            self.assertEqual(evaluate.call_count, 1)
+
+            # shared across checker instances with the same config
+            other = PolicyChecker({"allowed_accounts": {"221800032964"}})
+            self.assertTrue(other.check(dict(policy)))
+            self.assertEqual(evaluate.call_count, 1)
+
+            other = PolicyChecker({"allowed_accounts": {"221800032964"},
+                                   "everyone_only": True})
+            self.assertTrue(other.check(text))
+            self.assertEqual(evaluate.call_count, 2)
+
 
 class SetRolePolicyAction(BaseTest):
     def test_set_policy_attached(self):
@@ -113,6 +113,27 @@ class Publish(BaseTest):
         self.assertFalse('Updating function: test-foo-bar config Layers' in lines)
         self.assertTrue('Removing function: test-foo-bar concurrency' in lines)
 
+    def test_publish_skips_upload_unchanged_code(self):
+        client = mock.MagicMock()
+        mgr = LambdaManager(lambda: mock.MagicMock(client=lambda svc: client))
+        mgr._upload_func = mock.MagicMock()
+        func = self.make_func()
+        client.get_function.return_value = {
+            'Configuration': {
+                'FunctionArn': 'arn:aws:lambda:us-east-1:644160558196:function:test-foo-bar',
+                'CodeSha256': func.get_archive().get_checksum()}}
+
+        mgr._create_or_update(func, s3_uri='s3://custodian-assets/lambda')
+        self.assertFalse(mgr._upload_func.called)
+        self.assertFalse(client.update_function_code.called)
+
+        client.get_function.return_value['Configuration']['CodeSha256'] = 'xyz'
+        mgr._upload_func.return_value = ('custodian-assets', 'lambda/test-foo-bar')
+        mgr._create_or_update(func, s3_uri='s3://custodian-assets/lambda')
+        client.update_function_code.assert_called_once_with(
+            FunctionName='test-foo-bar', Publish=True,
+            S3Bucket='custodian-assets', S3Key='lambda/test-foo-bar')
+
     def test_can_switch_runtimes(self):
         session_factory = self.replay_flight_data("test_can_switch_runtimes")
         func = self.make_func()
@@ -1012,6 +1033,27 @@ class PythonArchiveTest(unittest.TestCase):
         filenames = archive.get_filenames()
         self.assertTrue("c7n/__init__.py" in filenames)
 
+    def test_custodian_archive_reuses_package_build(self):
+        with mock.patch.dict('c7n.mu._archive_cache', clear=True), mock.patch.object(
+                PythonPackageArchive, 'add_modules',
+                wraps=PythonPackageArchive.add_modules,
+                autospec=True) as add_modules:
+            archives = [custodian_archive(['c7n', 'placebo']) for i in range(2)]
+        # only the first build zips the modules, further archives copy it
+        self.assertEqual(
+            [c[0][2] for c in add_modules.call_args_list if c[0][2]],
+            [['c7n', 'placebo']])
+        for idx, archive in enumerate(archives):
+            self.addCleanup(archive.remove)
+            archive.add_contents('config.json', str(idx))
+            archive.close()
+            self.assertIn('placebo/__init__.py', archive.get_filenames())
+        fresh = self.make_open_archive(['c7n', 'placebo'])
+        fresh.add_contents('config.json', '0')
+        fresh.close()
+        self.assertEqual(archives[0].get_checksum(), fresh.get_checksum())
+        self.assertNotEqual(archives[0].get_checksum(), archives[1].get_checksum())
+
     def make_file(self):
         bench = tempfile.mkdtemp()
         path = os.path.join(bench, "foo.txt")
@@ -3,12 +3,14 @@
 from .common import BaseTest, functional
 
 import base64
+import mock
 import os
 import json
 import time
 import tempfile
 import zlib
 
+from c7n.actions.notify import MessagePacker
 from c7n.exceptions import PolicyValidationError
 
 
@@ -274,3 +276,87 @@ class NotifyTest(BaseTest):
         self.assertEqual(len(messages), 1)
         body = json.loads(zlib.decompress(base64.b64decode(messages[0]["Body"])))
         self.assertTrue("tag:k1" in body.get("resources")[0].get("c7n:MatchedFilters"))
+
+
+def unpack(body):
+    return json.loads(zlib.decompress(base64.b64decode(body)))
+
+
+class MessagePackerTest(BaseTest):
+
+    def get_resources(self, count, size):
+        return [{'Id': str(i), 'Data': base64.b64encode(os.urandom(size)).decode('ascii')}
+                for i in range(count)]
+
+    def test_pack_within_budget(self):
+        resources = self.get_resources(40, 3000)
+        packed = list(MessagePacker({'policy': 'x'}, 20000).pack(resources))
+        self.assertTrue(len(packed) > 1)
+        received = []
+        for batch, body in packed:
+            self.assertTrue(len(body) <= 20000)
+            message = unpack(body)
+            self.assertEqual(message['policy'], 'x')
+            self.assertEqual(message['resources'], batch)
+            received.extend(batch)
+        self.assertEqual(received, resources)
+
+    def test_pack_batch_size(self):
+        resources = [{'Id': str(i)} for i in range(25)]
+        packed = list(MessagePacker({'policy': 'x'}, 262144, 10).pack(resources))
+        self.assertEqual([len(b) for b, body in packed], [10, 10, 5])
+        self.assertEqual(unpack(packed[-1][1])['resources'], resources[20:])
+
+    def test_pack_oversize_resource(self):
+        resources = self.get_resources(3, 2000)
+        resources[1]['Data'] = self.get_resources(1, 8000)[0]['Data']
+        packed = list(MessagePacker({'policy': 'x'}, 5000).pack(resources))
+        self.assertEqual(
+            [(b[0]['Id'], body is None) for b, body in packed],
+            [('0', False), ('1', True), ('2', False)])
+
+
+class NotifyBatchTest(BaseTest):
+
+    def get_action(self, client, transport=None):
+        transport = dict(
+            transport or {},
+            type='sqs', queue='https://sqs.us-east-1.amazonaws.com/123456789012/c7n')
+        p = self.load_policy({
+            'name': 'notify-batch',
+            'resource': 'ec2',
+            'actions': [{'type': 'notify', 'to': ['a@example.com'],
+                         'transport': transport}]})
+        action = p.resource_manager.actions[0]
+        session = mock.MagicMock()
+        session.client.return_value = client
+        action.manager.session_factory = lambda region=None, assume=None: session
+        return action
+
+    def test_max_message_size_attributes(self):
+        action = self.get_action(mock.MagicMock(), {'max_message_size': 2048})
+        self.assertEqual(action.get_max_message_size(), 2048 - 22)
+
+    def test_send_sqs_batches(self):
+        client = mock.MagicMock()
+        client.send_message_batch.side_effect = lambda QueueUrl, Entries: {
+            'Successful': [{'Id': e['Id'], 'MessageId': 'b%s' % e['Id']}
+                           for e in Entries if e['Id'] != '1'],
+            'Failed': [{'Id': '1', 'SenderFault': False, 'Code': 'InternalError'}]}
+        client.send_message.return_value = {'MessageId': 'single'}
+        action = self.get_action(client)
+        message = {'policy': 'x', 'account_id': '123456789012', 'region': 'us-east-1'}
+        packed = [([{'Id': str(i)}], 'body%d' % i) for i in range(12)]
+        sent = list(action.send_sqs_batches(message, iter(packed)))
+
+        self.assertEqual(
+            sorted(r[0]['Id'] for r, receipt in sent), sorted(str(i) for i in range(12)))
+        self.assertEqual(
+            [len(c[1]['Entries']) for c in client.send_message_batch.call_args_list],
+            [10, 2])
+        # the failed entry of each batch, is resent individually
+        self.assertEqual(client.send_message.call_count, 2)
+        self.assertEqual(
+            client.send_message_batch.call_args_list[0][1]['Entries'][0][
+                'MessageAttributes']['mtype']['StringValue'],
+            'maidmsg/1.0')
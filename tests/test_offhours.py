@@ -9,7 +9,8 @@ from dateutil import tz as tzutil
 from .common import BaseTest, instance
 
 from c7n.exceptions import PolicyValidationError
-from c7n.filters.offhours import OffHour, OnHour, ScheduleParser, Time
+from c7n.filters.offhours import (
+    OffHour, OnHour, ScheduleParser, Time, TimezoneAliases)
 from c7n.testing import mock_datetime_now
 
 
@@ -187,6 +188,23 @@ class OffHoursFilterTest(BaseTest):
                 results.append(f(i))
         self.assertEqual(results, [True, True, False, False])
 
+    def test_compiled_schedule_cache(self):
+        t = datetime.datetime.now(tzutil.gettz("America/Los_Angeles"))
+        t = t.replace(year=2015, month=12, day=6, hour=18, minute=5)
+        f = OffHour({})
+        value = "off=[(m-f,21),(u,18)];on=[(m-f,6),(u,10)];tz=pt"
+        resources = [
+            instance(InstanceId="i-%d" % n, Tags=[{"Key": "maid_offhours", "Value": value}])
+            for n in range(5)]
+        with mock_datetime_now(t, datetime):
+            self.assertEqual(f.process(resources), resources)
+        self.assertEqual(list(f.schedules), [(value.lower(), "off")])
+        schedule = f.schedules[(value.lower(), "off")]
+        self.assertEqual(schedule.tz, tzutil.gettz("America/Los_Angeles"))
+        self.assertEqual(
+            [(h // 24, h % 24) for h in range(7 * 24) if schedule.hours >> h & 1],
+            [(0, 21), (1, 21), (2, 21), (3, 21), (4, 21), (6, 18)])
+
     def test_resource_schedule_error(self):
         t = datetime.datetime.now(tzutil.gettz("America/New_York"))
         t = t.replace(year=2015, month=12, day=1, hour=19, minute=5)
@@ -514,6 +532,18 @@ class OffHoursFilterTest(BaseTest):
             i = instance(Tags=[{"Key": "maid_offhours", "Value": "on"}])
             self.assertEqual(OnHour({})(i), True)
 
+    def test_tz_aliases_lazy_zone_names(self):
+        aliases = TimezoneAliases({'pt': 'America/Los_Angeles'})
+        self.assertEqual(aliases.get('pt'), 'America/Los_Angeles')
+        self.assertFalse(aliases.loaded)
+        self.assertEqual(aliases.get('us/eastern'), 'US/Eastern')
+        self.assertTrue(aliases.loaded)
+        self.assertEqual(aliases['pt'], 'America/Los_Angeles')
+        self.assertEqual(aliases.get('not/a-zone'), None)
+        self.assertRaises(KeyError, aliases.__getitem__, 'not/a-zone')
+        self.assertEqual(
+            Time.get_tz('us/pacific'), tzutil.gettz('America/Los_Angeles'))
+
 
 class ScheduleParserTest(BaseTest):
     # table style test
@@ -2,6 +2,7 @@
 # SPDX-License-Identifier: Apache-2.0
 import datetime
 import gzip
+import json
 import logging
 import mock
 import shutil
@@ -11,7 +12,9 @@ from dateutil.parser import parse as date_parse
 
 from c7n.ctx import ExecutionContext
 from c7n.config import Config
-from c7n.output import DirectoryOutput, BlobOutput, LogFile, metrics_outputs
+from c7n.output import (
+    DirectoryOutput, BlobOutput, JsonLinesWriter, LogFile, load_records, metrics_outputs)
+from c7n.reports.csvout import fs_record_set
 from c7n.resources.aws import S3Output, MetricsOutput
 from c7n.testing import mock_datetime_now, TestUtils
 
@@ -135,6 +138,19 @@ class S3OutputTest(TestUtils):
                 with gzip.open(os.path.join(root, f)) as fh:
                     self.assertEqual(fh.read(), b"abc")
 
+    def test_compress_skips_streamed_records(self):
+        output = self.get_s3_output()
+        with JsonLinesWriter(os.path.join(output.root_dir, "resources.jsonl.gz")) as w:
+            w.write({"id": 1})
+        with open(os.path.join(output.root_dir, "foo.txt"), "w") as fh:
+            fh.write("abc")
+
+        output.compress()
+        self.assertEqual(
+            sorted(os.listdir(output.root_dir)), ["foo.txt.gz", "resources.jsonl.gz"])
+        with open(os.path.join(output.root_dir, "resources.jsonl.gz"), "rb") as fh:
+            self.assertEqual(load_records(fh, fh.name), [{"id": 1}])
+
     def test_upload(self):
 
         with mock_datetime_now(date_parse('2018/09/01 13:00'), datetime):
@@ -173,3 +189,74 @@ class S3OutputTest(TestUtils):
             "%s/foo.txt" % output.key_prefix.lstrip('/'),
             extra_args={"ACL": "bucket-owner-full-control", "ServerSideEncryption": "AES256"},
         )
+
+
+class ResourcesFormatTest(BaseTest):
+
+    def test_json_lines_formats(self):
+        temp_dir = self.get_temp_dir()
+        records = [{"id": i, "when": datetime.datetime(2020, 1, 1)} for i in range(3)]
+        for name in ("resources.jsonl", "resources.jsonl.gz"):
+            path = os.path.join(temp_dir, name)
+            with JsonLinesWriter(path) as w:
+                self.assertEqual(w.write_records(records), 3)
+            with open(path, "rb") as fh:
+                self.assertEqual(
+                    load_records(fh, name),
+                    [{"id": i, "when": "2020-01-01T00:00:00"} for i in range(3)])
+
+        with gzip.open(os.path.join(temp_dir, "legacy.json.gz"), "wt") as fh:
+            json.dump([{"id": 1}], fh, indent=2)
+        with open(os.path.join(temp_dir, "legacy.json.gz"), "rb") as fh:
+            self.assertEqual(load_records(fh, "resources.json.gz"), [{"id": 1}])
+
+    def test_policy_streams_resources(self):
+        output_dir = self.get_temp_dir()
+        p = self.load_policy(
+            {"name": "stream-records", "resource": "aws.ec2"},
+            config={"resources_format": "jsonl.gz"},
+            output_dir=output_dir)
+        records = [{"InstanceId": "i-%d" % i} for i in range(5)]
+        self.patch(p.resource_manager, "resources", lambda *args, **kw: records)
+        self.assertEqual(len(p.run()), 5)
+
+        log_dir = os.path.join(output_dir, "stream-records")
+        self.assertNotIn("resources.json", os.listdir(log_dir))
+        with gzip.open(os.path.join(log_dir, "resources.jsonl.gz"), "rt") as fh:
+            lines = fh.read().splitlines()
+        self.assertEqual(lines[0], '{"InstanceId":"i-0"}')
+        self.assertEqual(len(lines), 5)
+
+        report_records = fs_record_set(log_dir, p.name)
+        self.assertEqual(
+            [r["InstanceId"] for r in report_records], [r["InstanceId"] for r in records])
+        self.assertIn("CustodianDate", report_records[0])
+
+    def test_policy_replaces_other_resource_formats(self):
+        output_dir = self.get_temp_dir()
+        log_dir = os.path.join(output_dir, "stream-records")
+        os.makedirs(log_dir)
+        with open(os.path.join(log_dir, "resources.json"), "w") as fh:
+            json.dump([{"InstanceId": "i-stale"}], fh)
+        p = self.load_policy(
+            {"name": "stream-records", "resource": "aws.ec2"},
+            config={"resources_format": "jsonl"},
+            output_dir=output_dir)
+        self.patch(
+            p.resource_manager, "resources", lambda *args, **kw: [{"InstanceId": "i-1"}])
+        p.run()
+        self.assertEqual(
+            [f for f in os.listdir(log_dir) if f.startswith("resources.")],
+            ["resources.jsonl"])
+        self.assertEqual(
+            [r["InstanceId"] for r in fs_record_set(log_dir, p.name)], ["i-1"])
+
+    def test_record_set_newest_format(self):
+        log_dir = self.get_temp_dir()
+        with open(os.path.join(log_dir, "resources.jsonl"), "w") as fh:
+            fh.write('{"InstanceId":"i-new"}\n')
+        with open(os.path.join(log_dir, "resources.json"), "w") as fh:
+            json.dump([{"InstanceId": "i-stale"}], fh)
+        os.utime(os.path.join(log_dir, "resources.json"), (0, 0))
+        self.assertEqual(
+            [r["InstanceId"] for r in fs_record_set(log_dir, "policy")], ["i-new"])
@@ -3,9 +3,14 @@
 import json
 import logging
 import os
+import time
 
+import mock
+from botocore.exceptions import ClientError
 
-from c7n.query import ResourceQuery, RetryPageIterator
+from c7n.executor import MainThreadExecutor
+from c7n.query import (
+    ConfigSource, ResourceQuery, RetryPageIterator, split_stream_filters)
 from c7n.resources.vpc import InternetGateway
 
 from botocore.config import Config
@@ -125,6 +130,105 @@ class ConfigSourceTest(BaseTest):
         p.data['query'] = [{'clause': "configuration.imageId = 'xyz'"}]
         self.assertIn("imageId = 'xyz'", source.get_query_params(None)['expr'])
 
+    def get_config_source(self, client):
+        p = self.load_policy({'name': 'x', 'resource': 'ec2', 'source': 'config'})
+        p.resource_manager.executor_factory = MainThreadExecutor
+        self.patch(time, 'sleep', lambda delay: None)
+        factory = mock.MagicMock(region='config-source')
+        factory.return_value.client.return_value = client
+        p.resource_manager.session_factory = factory
+        return p.resource_manager.get_source('config')
+
+    def test_config_batch_get(self):
+        throttle = ClientError(
+            {'Error': {'Code': 'ThrottlingException', 'Message': 'slow down'}},
+            'BatchGetResourceConfig')
+        calls, deferred = [], []
+
+        def batch_get(resourceKeys):
+            calls.append(len(resourceKeys))
+            if len(calls) == 1:
+                raise throttle
+            # leave a key unprocessed the first time it's fetched.
+            keys = list(resourceKeys)
+            unprocessed = [k for k in keys if k['resourceId'] == 'i-7' and not deferred]
+            deferred.extend(unprocessed)
+            return {
+                'unprocessedResourceKeys': unprocessed,
+                'baseConfigurationItems': [
+                    {'resourceId': k['resourceId'],
+                     'configuration': json.dumps({'instanceId': k['resourceId']}),
+                     'supplementaryConfiguration': {}}
+                    for k in keys if k not in unprocessed]}
+
+        client = mock.MagicMock()
+        client.batch_get_resource_config.side_effect = batch_get
+        source = self.get_config_source(client)
+        ids = ['i-%d' % i for i in range(250)]
+        resources = source.get_resources(ids)
+        self.assertEqual(sorted(r['InstanceId'] for r in resources), sorted(ids))
+        # throttled batch is retried and the unprocessed key refetched
+        self.assertEqual(calls, [100, 100, 50, 100, 1])
+        # halved on the throttled round, then recovering as calls succeed.
+        limiter = source.get_batch_limiter()
+        self.assertEqual(limiter.throttles, 1)
+        self.assertEqual(limiter.concurrency, 4)
+        self.assertFalse(client.get_resource_config_history.called)
+
+    def test_config_batch_get_unsupported(self):
+        self.addCleanup(ConfigSource.batch_unsupported.discard, 'AWS::EC2::Instance')
+        client = mock.MagicMock()
+        client.batch_get_resource_config.side_effect = ClientError(
+            {'Error': {'Code': 'ValidationException', 'Message': 'unsupported'}},
+            'BatchGetResourceConfig')
+        client.get_resource_config_history.side_effect = lambda **kw: {
+            'configurationItems': [{
+                'configuration': {'instanceId': kw['resourceId']},
+                'supplementaryConfiguration': {}}]}
+        source = self.get_config_source(client)
+        self.assertEqual(
+            [r['InstanceId'] for r in source.get_resources(['i-1', 'i-2'])],
+            ['i-1', 'i-2'])
+        self.assertIn('AWS::EC2::Instance', ConfigSource.batch_unsupported)
+        source.get_resources(['i-3'])
+        self.assertEqual(client.batch_get_resource_config.call_count, 1)
+        self.assertEqual(client.get_resource_config_history.call_count, 3)
+
+    def test_config_batch_get_access_denied(self):
+        client = mock.MagicMock()
+        client.batch_get_resource_config.side_effect = ClientError(
+            {'Error': {'Code': 'AccessDeniedException', 'Message': 'denied'}},
+            'BatchGetResourceConfig')
+        client.get_resource_config_history.side_effect = lambda **kw: {
+            'configurationItems': [{
+                'configuration': {'instanceId': kw['resourceId']},
+                'supplementaryConfiguration': {}}]}
+        source = self.get_config_source(client)
+        self.assertEqual(
+            [r['InstanceId'] for r in source.get_resources(['i-1'])], ['i-1'])
+        # denied roles aren't remembered as the type lacking batch support
+        self.assertNotIn('AWS::EC2::Instance', ConfigSource.batch_unsupported)
+
+    def test_config_batch_get_error_continues(self):
+        def batch_get(resourceKeys):
+            if resourceKeys[0]['resourceId'] == 'i-0':
+                raise ClientError(
+                    {'Error': {'Code': 'InternalFailure', 'Message': 'boom'}},
+                    'BatchGetResourceConfig')
+            return {'baseConfigurationItems': [
+                {'resourceId': k['resourceId'],
+                 'configuration': json.dumps({'instanceId': k['resourceId']}),
+                 'supplementaryConfiguration': {}}
+                for k in resourceKeys]}
+
+        client = mock.MagicMock()
+        client.batch_get_resource_config.side_effect = batch_get
+        source = self.get_config_source(client)
+        with mock.patch.object(source.manager.log, 'error') as log_error:
+            resources = source.get_resources(['i-%d' % i for i in range(150)])
+        self.assertEqual(len(resources), 50)
+        self.assertEqual(log_error.call_count, 1)
+
 
 class QueryResourceManagerTest(BaseTest):
 
@@ -151,6 +255,60 @@ class QueryResourceManagerTest(BaseTest):
         p.run()
         self.assertTrue("Using cached internet-gateway: 3", output.getvalue())
 
+    def test_resources_stream(self):
+        session_factory = self.replay_flight_data("test_query_manager")
+        p = self.load_policy(
+            {
+                "name": "igw-check",
+                "resource": "internet-gateway",
+                "stream": True,
+                "filters": [{"InternetGatewayId": "igw-2e65104a"}],
+            },
+            session_factory=session_factory,
+        )
+        pages = list(p.resource_manager.source.resources_pages({}))
+        self.assertEqual([len(page) for page in pages], [1])
+        resources = p.run()
+        self.assertEqual(len(resources), 1)
+
+    def test_stream_barrier(self):
+        p = self.load_policy(
+            {
+                "name": "ec2-stream",
+                "resource": "ec2",
+                "stream": True,
+                "filters": [
+                    {"State.Name": "running"},
+                    {"type": "reduce", "sort-by": "InstanceId", "limit": 2},
+                    {"InstanceId": "present"},
+                ],
+            }
+        )
+        rm = p.resource_manager
+        stream, barrier = split_stream_filters(rm.filters)
+        self.assertEqual([f.type for f in stream], ["value"])
+        self.assertEqual([f.type for f in barrier], ["reduce", "value"])
+
+        pages = [
+            [{"InstanceId": "i-4", "State": {"Name": "running"}},
+             {"InstanceId": "i-5", "State": {"Name": "stopped"}}],
+            [{"InstanceId": "i-3", "State": {"Name": "running"}},
+             {"InstanceId": "i-1", "State": {"Name": "running"}}],
+        ]
+        augmented = []
+
+        def augment(resources):
+            augmented.append([r["InstanceId"] for r in resources])
+            return resources
+
+        self.patch(rm.source, "resources_pages", lambda query: iter(pages))
+        self.patch(rm, "augment", augment)
+        self.patch(rm, "check_resource_limit",
+                   lambda selected, population: augmented.append((selected, population)))
+        resources = rm.resources()
+        self.assertEqual([r["InstanceId"] for r in resources], ["i-1", "i-3"])
+        self.assertEqual(augmented, [["i-4", "i-5"], ["i-3", "i-1"], (2, 4)])
+
     def test_get_resources(self):
         session_factory = self.replay_flight_data("test_query_manager_get")
         p = self.load_policy(
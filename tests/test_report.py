@@ -1,9 +1,82 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
-from c7n.reports.csvout import Formatter
+import datetime
+import gzip
+import io
+import json
+import os
+
+from c7n.reports.csvout import Formatter, ReportIndex, record_set
 from .common import BaseTest, load_data
 
 
+class StubS3:
+
+    def __init__(self):
+        self.objects = {}
+        self.fetched = []
+
+    def __call__(self):
+        return self
+
+    def client(self, service_name):
+        return self
+
+    def put(self, key, etag, records):
+        self.objects[key] = (etag, gzip.compress(json.dumps(records).encode('utf8')))
+
+    def get_paginator(self, op):
+        return self
+
+    def paginate(self, Bucket, Prefix, StartAfter):
+        yield {'Contents': [
+            {'Key': k, 'ETag': etag} for k, (etag, _) in sorted(self.objects.items())
+            if k > StartAfter]}
+
+    def get_object(self, Bucket, Key):
+        self.fetched.append(Key)
+        return {'Body': io.BytesIO(self.objects[Key][1])}
+
+
+class ReportIndexTest(BaseTest):
+
+    def test_incremental_record_set(self):
+        s3 = StubS3()
+        s3.region = 'report-index-test'
+        s3.put('policies/xyz/2020/01/01/01/resources.json.gz', '"a"', [{'InstanceId': 'i-1'}])
+        s3.objects['policies/xyz/2020/01/02/05/resources.jsonl.gz'] = ('"b"', gzip.compress(
+            b'{"InstanceId":"i-2"}\n{"InstanceId":"i-3"}\n'))
+        index = ReportIndex(os.path.join(self.get_temp_dir(), 'index', 'report.db'))
+        self.addCleanup(index.close)
+        start = datetime.datetime(2020, 1, 1)
+
+        records = record_set(s3, 'bucket', 'policies/xyz', start, index=index)
+        self.assertEqual(sorted(r['InstanceId'] for r in records), ['i-1', 'i-2', 'i-3'])
+        self.assertEqual(len(s3.fetched), 2)
+
+        # only new or rewritten objects are downloaded on the next report
+        s3.fetched = []
+        s3.put('policies/xyz/2020/01/03/00/resources.json.gz', '"c"', [{'InstanceId': 'i-4'}])
+        s3.put('policies/xyz/2020/01/01/01/resources.json.gz', '"d"', [{'InstanceId': 'i-5'}])
+        records = record_set(s3, 'bucket', 'policies/xyz', start, index=index)
+        self.assertEqual(
+            sorted(s3.fetched),
+            ['policies/xyz/2020/01/01/01/resources.json.gz',
+             'policies/xyz/2020/01/03/00/resources.json.gz'])
+        self.assertEqual(
+            sorted(r['InstanceId'] for r in records), ['i-2', 'i-3', 'i-4', 'i-5'])
+        self.assertEqual(
+            {r['InstanceId']: r['CustodianDate'] for r in records}['i-2'],
+            datetime.datetime(2020, 1, 2, 5))
+
+        # date range queries are served from the index
+        s3.fetched = []
+        records = record_set(
+            s3, 'bucket', 'policies/xyz', datetime.datetime(2020, 1, 2), index=index)
+        self.assertEqual(s3.fetched, [])
+        self.assertEqual(sorted(r['InstanceId'] for r in records), ['i-2', 'i-3', 'i-4'])
+
+
 class TestEC2Report(BaseTest):
 
     def setUp(self):
@@ -1,10 +1,12 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
 import csv
+import io
 import json
 import pickle
 import os
 import tempfile
+import mock
 import vcr
 from urllib.request import urlopen
 
@@ -12,6 +14,7 @@ from .common import BaseTest, ACCOUNT_ID, Bag
 from .test_s3 import destroyBucket
 
 from c7n.config import Config
+from c7n.exceptions import ClientError
 from c7n.resolver import ValuesFrom, URIResolver
 
 
@@ -33,14 +36,22 @@ class FakeCache:
 
 class FakeResolver:
 
-    def __init__(self, contents):
+    def __init__(self, contents, revision=None):
         if isinstance(contents, bytes):
             contents = contents.decode("utf8")
         self.contents = contents
+        self.revision = revision
+        self.requests = []
 
     def resolve(self, uri):
         return self.contents
 
+    def resolve_revision(self, uri, revision=None):
+        self.requests.append(revision)
+        if revision and revision == self.revision:
+            return None, revision
+        return self.contents, self.revision or {}
+
 
 class ResolverTest(BaseTest):
 
@@ -89,12 +100,43 @@ class ResolverTest(BaseTest):
             fh.flush()
             self.assertEqual(resolver.resolve("file:%s" % fh.name), content)
 
+    def test_resolve_s3_not_modified(self):
+        client = mock.MagicMock()
+        client.get_object.side_effect = ClientError(
+            {'Error': {'Code': '304', 'Message': 'Not Modified'}}, 'GetObject')
+        session = mock.MagicMock()
+        session.client.return_value = client
+        resolver = URIResolver(lambda: session, None)
+        revision = {'ETag': '"abc"'}
+        self.assertEqual(
+            resolver.resolve_revision("s3://bucket/accounts.txt", revision),
+            (None, revision))
+        client.get_object.assert_called_with(
+            Bucket='bucket', Key='accounts.txt', IfNoneMatch='"abc"')
+
+        client.get_object.side_effect = None
+        client.get_object.return_value = {'Body': io.BytesIO(b'123'), 'ETag': '"def"'}
+        self.assertEqual(
+            resolver.resolve_revision("s3://bucket/accounts.txt", revision),
+            ('123', {'ETag': '"def"'}))
+
+    def test_resolve_file_revision(self):
+        resolver = URIResolver(None, None)
+        with tempfile.NamedTemporaryFile(mode="w+", dir=os.getcwd(), delete=False) as fh:
+            self.addCleanup(os.unlink, fh.name)
+            fh.write("abc")
+            fh.flush()
+            contents, revision = resolver.resolve_revision("file:%s" % fh.name)
+        self.assertEqual(contents, "abc")
+        self.assertIn('Last-Modified', revision)
+
 
 class UrlValueTest(BaseTest):
 
     def setUp(self):
         self.old_dir = os.getcwd()
         os.chdir(tempfile.gettempdir())
+        self.addCleanup(ValuesFrom.store.clear)
 
     def tearDown(self):
         os.chdir(self.old_dir)
@@ -234,5 +276,63 @@ class UrlValueTest(BaseTest):
         self.assertEqual(values.get_values(), {"east-resource"})
         self.assertEqual(values.get_values(), {"east-resource"})
         self.assertEqual(values.get_values(), {"east-resource"})
-        self.assertEqual(cache.saves, 1)
-        self.assertEqual(cache.gets, 3)
+        # the fetched contents and the values are both cached
+        self.assertEqual(cache.saves, 2)
+        self.assertEqual(cache.gets, 4)
+
+    def test_value_from_shared_store(self):
+        data = {"url": "s3://bucket/accounts.txt"}
+        values = self.get_values_from(data, "a\nb\n")
+        values.resolver.revision = {"ETag": '"v1"'}
+        self.assertEqual(values.get_values(), frozenset(("a", "b")))
+        self.assertIsInstance(values.get_values(), frozenset)
+        # a recently validated fetch is reused without a request
+        self.assertEqual(values.resolver.requests, [None])
+
+        # another policy revalidates and reuses the parsed values
+        self.patch(ValuesFrom, 'revalidate_period', -1)
+        other = self.get_values_from(data, "a\nb\n")
+        other.resolver.revision = {"ETag": '"v1"'}
+        with mock.patch.object(ValuesFrom, 'parse_values') as parse:
+            self.assertIs(other.get_values(), values.get_values())
+            self.assertFalse(parse.called)
+        self.assertEqual(other.resolver.requests, [{"ETag": '"v1"'}])
+
+        # changed content is refetched and reparsed
+        changed = self.get_values_from(data, "c\n")
+        changed.resolver.revision = {"ETag": '"v2"'}
+        self.assertEqual(changed.get_values(), frozenset(("c",)))
+
+    def test_value_from_shared_fetch(self):
+        content = json.dumps([{"a": 1, "b": 2}])
+        first = self.get_values_from({"url": "data.json", "expr": "[].a"}, content)
+        second = self.get_values_from({"url": "data.json", "expr": "[].b"}, content)
+        self.assertEqual(first.get_values(), {1})
+        self.assertEqual(second.get_values(), {2})
+        self.assertEqual(first.resolver.requests, [None])
+        self.assertEqual(second.resolver.requests, [])
+
+    def test_value_from_resolver_cache(self):
+        cache = FakeCache()
+        cache.save(("uri-resolver", "accounts.txt"), "a\nb\n")
+        values = self.get_values_from({"url": "accounts.txt"}, "c\n", cache=cache)
+        self.assertEqual(values.get_values(), frozenset(("a", "b")))
+        self.assertEqual(values.resolver.requests, [])
+
+    def test_value_from_in_lookup_set(self):
+        values_data = {"url": "ids.json", "format": "json"}
+        p = self.load_policy({
+            "name": "value-from-set", "resource": "aws.ec2",
+            "filters": [{"type": "value", "key": "InstanceId", "op": "in",
+                         "value_from": values_data}]})
+        ValuesFrom.store["ids.json"] = {
+            "contents": None, "digest": None, "revision": {}, "checked": 0,
+            "values": {("json", None): ["i-1", "i-2"]}}
+        f = p.resource_manager.filters[0]
+        with mock.patch.object(
+                URIResolver, "resolve_revision", return_value=(None, {})):
+            self.assertEqual(
+                [r["InstanceId"] for r in f.process(
+                    [{"InstanceId": "i-1"}, {"InstanceId": "i-3"}])],
+                ["i-1"])
+        self.assertEqual(f.v, frozenset(("i-1", "i-2")))
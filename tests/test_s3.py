@@ -5,12 +5,15 @@ import functools
 import json
 import os
 import io
+import pickle
 import shutil
 import tempfile
 import time  # NOQA needed for some recordings
 
 from unittest import TestCase
 
+import mock
+
 from botocore.exceptions import ClientError
 from dateutil.tz import tzutc
 
@@ -18,8 +21,9 @@ from c7n.exceptions import PolicyValidationError
 from c7n.executor import MainThreadExecutor
 from c7n.resources import s3
 from c7n.mu import LambdaManager
+from c7n.output import BlobOutput
 from c7n.ufuncs import s3crypt
-from c7n.utils import get_account_alias_from_sts
+from c7n.utils import chunks, get_account_alias_from_sts
 
 from .common import (
     BaseTest,
@@ -65,6 +69,93 @@ class BucketScanLogTests(TestCase):
             self.assertEqual(data, [first_five, next_five, []])
 
 
+class BucketScanPartitionTest(BaseTest):
+
+    keys = ['home.txt', 'a/1', 'a/2', 'a/3', 'b/1']
+
+    def get_client(self, calls, fail):
+
+        def paginate(Bucket, Prefix='', Delimiter=None, Marker=None):
+            calls.append((Prefix, Delimiter, Marker))
+            keys = [k for k in self.keys if k.startswith(Prefix)]
+            if Delimiter:
+                prefixes = sorted({
+                    Prefix + k[len(Prefix):].split(Delimiter)[0] + Delimiter
+                    for k in keys if Delimiter in k[len(Prefix):]})
+                yield {'Contents': [{'Key': k} for k in keys
+                                    if Delimiter not in k[len(Prefix):]],
+                       'CommonPrefixes': [{'Prefix': p} for p in prefixes],
+                       'IsTruncated': False}
+                return
+            if Marker:
+                keys = keys[keys.index(Marker) + 1:]
+            pages = list(chunks(keys, 2))
+            for idx, page in enumerate(pages):
+                if fail and Prefix == 'a/' and idx == 1:
+                    fail.pop()
+                    raise ClientError(
+                        {'Error': {'Code': 'InternalError', 'Message': 'boom'}},
+                        'ListObjects')
+                yield {'Contents': [{'Key': k} for k in page],
+                       'IsTruncated': idx + 1 < len(pages)}
+
+        client = mock.MagicMock()
+        client.get_paginator.return_value.paginate.side_effect = paginate
+        return client
+
+    def test_resume_partitioned_scan(self):
+        log_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, log_dir)
+        p = self.load_policy({
+            'name': 's3-scan-partitions',
+            'resource': 's3',
+            'actions': [{'type': 'encrypt-keys', 'partition': {'delimiter': '/'}}]},
+            output_dir=log_dir)
+        action = p.resource_manager.actions[0]
+        action.executor_factory = MainThreadExecutor
+        calls, fail = [], [True]
+        client = self.get_client(calls, fail)
+        action.get_bucket_client = lambda b, kms=False: client
+        action.process_chunk = lambda batch, b: [k['Key'] for k in batch]
+        bucket = {'Name': 'scanned'}
+        with p.ctx:
+            checkpoint = action.get_checkpoint(bucket)
+            self.assertTrue(checkpoint.path.startswith(
+                os.path.join(p.ctx.log_dir, 'scanned.')))
+
+            self.assertEqual(action.process_bucket(bucket), None)
+            self.assertTrue(os.path.exists(checkpoint.path))
+            self.assertEqual(
+                checkpoint.load('partitions'),
+                [{'Prefix': '', 'Delimiter': '/'}, {'Prefix': 'a/'}, {'Prefix': 'b/'}])
+            self.assertEqual(checkpoint.load(1)['Marker'], {'Marker': 'a/2'})
+            self.assertTrue(checkpoint.load(2)['Complete'])
+
+            # the next run only lists the remainder of the failed partition
+            calls[:] = []
+            self.assertEqual(
+                action.process_bucket(bucket),
+                {'Bucket': 'scanned', 'Remediated': 5, 'Count': 5})
+            self.assertEqual(calls, [('a/', None, 'a/2')])
+            self.assertFalse(os.path.exists(checkpoint.path))
+            self.assertEqual(bucket['KeyScanCount'], 5)
+
+            # a changed partition config doesn't resume another's scan
+            action.data['partition'] = {'prefixes': ['a/']}
+            self.assertNotEqual(action.get_checkpoint(bucket).path, checkpoint.path)
+
+    def test_checkpoint_remote_output(self):
+        p = self.load_policy({
+            'name': 's3-scan-partitions',
+            'resource': 's3',
+            'actions': [{'type': 'encrypt-keys', 'partition': {'delimiter': '/'}}]})
+        # remote outputs stage in a temporary directory per run.
+        p.ctx.output = mock.MagicMock(spec=BlobOutput, root_dir=tempfile.gettempdir())
+        checkpoint = p.resource_manager.actions[0].get_checkpoint({'Name': 'scanned'})
+        self.assertEqual(checkpoint.log_dir, None)
+        self.assertEqual(checkpoint.load('partitions'), None)
+
+
 def destroyBucket(client, bucket):
     for o in client.list_objects(Bucket=bucket).get("Contents", []):
         client.delete_object(Bucket=bucket, Key=o["Key"])
@@ -3626,3 +3717,146 @@ class S3LifecycleTest(BaseTest):
         lifecycle = client.get_bucket_lifecycle_configuration(Bucket=bname)
         self.assertEqual(len(lifecycle["Rules"]), 1)
         self.assertEqual(lifecycle["Rules"][0]["ID"], lifecycle_id2)
+
+
+class S3AugmentProjectionTest(BaseTest):
+
+    def get_manager(self, data):
+        data.setdefault('name', 's3-augment')
+        data.setdefault('resource', 's3')
+        return self.load_policy(data).resource_manager
+
+    def test_augment_keys_from_policy(self):
+        manager = self.get_manager({
+            'filters': [
+                {'tag:Env': 'prod'},
+                {'or': [
+                    {'type': 'global-grants'},
+                    {'type': 'value', 'key': 'Versioning.Status', 'value': 'Enabled'},
+                    {'type': 'value', 'key': 'CreationDate', 'value_type': 'age',
+                     'op': 'gt', 'value': 30}]}],
+            'actions': ['delete-global-grants']})
+        self.assertEqual(
+            manager.get_augment_keys(),
+            {'Location', 'Tags', 'Acl', 'Website', 'Versioning'})
+        self.assertEqual(
+            manager.get_cache_key(None)['augment'],
+            ['Acl', 'Location', 'Tags', 'Versioning', 'Website'])
+
+        # unknown filters and actions, or unresolvable keys need everything
+        self.assertEqual(self.get_manager({}).get_augment_keys(), None)
+        self.assertEqual(self.get_manager({
+            'filters': [{'type': 'value', 'key': 'length(Tags)', 'value': 0}]}
+        ).get_augment_keys(), None)
+        self.assertEqual(self.get_manager({
+            'filters': [{'tag:Env': 'absent'}],
+            'actions': ['notify']}).get_augment_keys(), None)
+        self.assertEqual(
+            self.get_manager({'filters': [{'tag:Env': 'absent'}]}).get_cache_key(
+                None)['augment'],
+            ['Location', 'Tags'])
+
+    def test_augment_keys_explicit(self):
+        manager = self.get_manager({
+            'query': [{'augment': ['Policy']}],
+            'filters': [
+                {'type': 'value', 'key': 'length(Tags)', 'value': 0}]})
+        self.assertEqual(manager.get_augment_keys(), {'Location', 'Policy'})
+        self.assertRaises(
+            PolicyValidationError,
+            self.load_policy,
+            {'name': 's3-augment', 'resource': 's3',
+             'query': [{'augment': ['Policy', 'Bogus']}],
+             'filters': [{'tag:Env': 'absent'}]})
+
+    def test_augment_projection_lazy_fill(self):
+        client = mock.MagicMock()
+        client.get_bucket_location.return_value = {
+            'ResponseMetadata': {}, 'LocationConstraint': None}
+        client.get_bucket_tagging.return_value = {
+            'ResponseMetadata': {}, 'TagSet': [{'Key': 'Env', 'Value': 'dev'}]}
+        client.get_bucket_policy.return_value = {
+            'ResponseMetadata': {}, 'Policy': '{}'}
+        session = mock.MagicMock()
+        session.client.return_value = client
+
+        manager = self.get_manager({'filters': [{'tag:Env': 'dev'}]})
+        manager.session_factory = mock.MagicMock(return_value=session, region='s3-augment')
+        [b] = manager.source.augment([{'Name': 'bucket'}])
+        self.assertEqual(
+            sorted(b), ['Location', 'Name', 'Tags'])
+        self.assertFalse(client.get_bucket_policy.called)
+        self.assertFalse(client.get_bucket_acl.called)
+
+        self.assertTrue('Policy' in b)
+        self.assertEqual(b['Policy'], '{}')
+        self.assertEqual(b.get('Policy'), '{}')
+        self.assertEqual(client.get_bucket_policy.call_count, 1)
+        self.assertEqual(
+            pickle.loads(pickle.dumps(b)),
+            {'Name': 'bucket', 'Location': {'LocationConstraint': None},
+             'Tags': [{'Key': 'Env', 'Value': 'dev'}], 'Policy': '{}'})
+
+    def test_augment_projection_materialize_matched(self):
+        calls = []
+
+        class Client:
+            def __getattr__(self, name):
+                def method(Bucket):
+                    calls.append((name, Bucket))
+                    if name == 'get_bucket_tagging':
+                        return {'ResponseMetadata': {},
+                                'TagSet': [{'Key': 'Env', 'Value': Bucket}]}
+                    return {'ResponseMetadata': {}}
+                return method
+
+        session = mock.MagicMock()
+        session.client.return_value = Client()
+        manager = self.get_manager({'filters': [{'tag:Env': 'dev'}]})
+        manager.session_factory = mock.MagicMock(return_value=session, region='s3-augment')
+        [b] = manager.filter_resources(
+            manager.source.augment([{'Name': 'dev'}, {'Name': 'prod'}]))
+        self.assertEqual(b.pending, set())
+        self.assertEqual(
+            set(json.loads(json.dumps(b))),
+            {'Name', 'c7n:MatchedFilters'} | {el[1] for el in s3.S3_AUGMENT_TABLE})
+        self.assertEqual(
+            sorted(name for name, bucket in calls if bucket == 'prod'),
+            ['get_bucket_location', 'get_bucket_tagging'])
+
+
+class BucketClientsTest(BaseTest):
+
+    def test_regional_client_pool(self):
+        session = mock.MagicMock()
+        session.client.side_effect = lambda service, region_name=None, config=None: (
+            mock.MagicMock(region=region_name))
+        factory = mock.MagicMock(return_value=session, region='bucket-clients')
+
+        def get_location(name):
+            return {'ResponseMetadata': {}, 'LocationConstraint': {
+                'west': 'us-west-2', 'east': None, 'eu': 'EU'}[name]}
+
+        clients = s3.BucketClients(factory)
+        clients.get_client(None).get_bucket_location.side_effect = (
+            lambda Bucket: get_location(Bucket.rstrip('2')))
+        self.patch(s3, 'S3_AUGMENT_TABLE', [
+            ('get_bucket_location', 'Location', {}, None, 's3:GetBucketLocation')])
+
+        for name in ('west', 'east', 'eu', 'west2'):
+            s3.assemble_bucket((factory, {'Name': name}), clients=clients)
+        self.assertEqual(
+            clients.regions,
+            {'west': 'us-west-2', 'west2': 'us-west-2',
+             'east': 'us-east-1', 'eu': 'eu-west-1'})
+        # one client per region, plus the default region client.
+        self.assertEqual(
+            sorted(c.region or '' for c in clients.clients.values()),
+            ['', 'eu-west-1', 'us-east-1', 'us-west-2'])
+        self.assertEqual(session.client.call_count, 4)
+
+        # bucket region is reused without a location
+        self.assertEqual(clients.bucket_client({'Name': 'eu'}).region, 'eu-west-1')
+        self.assertEqual(
+            clients.bucket_client({'Name': 'eu'}, kms=True).region, 'eu-west-1')
+        self.assertEqual(session.client.call_count, 5)
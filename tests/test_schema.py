@@ -1,10 +1,17 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
+import json
+import os
+import sys
+import tempfile
+import types
+
 import mock
 from jsonschema.exceptions import best_match
 
 from c7n.exceptions import PolicyValidationError
 from c7n.filters import ValueFilter
+from c7n.loader import SchemaValidator
 from c7n.registry import PluginRegistry
 from c7n.resources import load_resources
 from c7n.schema import (
@@ -557,3 +564,75 @@ class SchemaTest(BaseTest):
         self.assertEqual(ElementSchema.doc(F), "")
         self.assertEqual(
             ElementSchema.doc(B), "Hello World\n\nxyz")
+
+
+class SchemaCacheTest(BaseTest):
+
+    def setUp(self):
+        load_resources(('aws.ec2', 'aws.s3'))
+
+    def test_schema_cache_round_trip(self):
+        cache = schema.SchemaCache(self.get_temp_dir())
+        key, rt_schema = cache.load(('aws.ec2',))
+        self.assertEqual(rt_schema, None)
+        generated = generate(('aws.ec2',))
+        self.assertTrue(cache.save(key, generated))
+
+        key2, rt_schema = cache.load(('aws.ec2',))
+        self.assertEqual(key, key2)
+        self.assertEqual(rt_schema, json.loads(json.dumps(generated)))
+        self.assertEqual(cache.load(('aws.s3',))[1], None)
+
+    def test_schema_cache_registry_fingerprint(self):
+        fingerprint = schema.registry_fingerprint(('aws.ec2',))
+        self.assertEqual(fingerprint, schema.registry_fingerprint(('aws.ec2',)))
+        self.assertNotEqual(fingerprint, schema.registry_fingerprint(('aws.s3',)))
+
+        ec2 = schema.clouds['aws'].resources['ec2']
+
+        class Extra(ValueFilter):
+            pass
+
+        ec2.filter_registry.register('schema-cache-extra', Extra)
+        self.addCleanup(ec2.filter_registry.unregister, 'schema-cache-extra')
+        self.assertNotEqual(fingerprint, schema.registry_fingerprint(('aws.ec2',)))
+
+    def test_schema_cache_package_mtimes(self):
+        package_dir = os.path.join(self.get_temp_dir(), 'site-packages', 'c7n_fake')
+        os.makedirs(package_dir)
+        package = types.ModuleType('c7n_fake')
+        package.__file__ = os.path.join(package_dir, '__init__.py')
+        module = types.ModuleType('c7n_fake.resources')
+        module.__file__ = os.path.join(package_dir, 'resources.py')
+        with mock.patch.dict(sys.modules, {'c7n_fake': package, 'c7n_fake.resources': module}):
+            # installed packages are identified by their directory
+            self.assertEqual(
+                [p for p, _ in schema.package_mtimes(['c7n_fake.resources'])],
+                [package_dir])
+        # modules of a checkout are edited in place
+        self.assertEqual(
+            [p for p, _ in schema.package_mtimes(['c7n.schema'])], [schema.__file__])
+
+    def test_schema_cache_from_env(self):
+        # test runs use a temporary directory rather than the user's cache
+        self.assertTrue(schema.SchemaCache.from_env().path.startswith(
+            tempfile.gettempdir()))
+        self.change_environment(C7N_SCHEMA_CACHE='')
+        self.assertEqual(schema.SchemaCache.from_env(), None)
+        temp_dir = self.get_temp_dir()
+        self.change_environment(C7N_SCHEMA_CACHE=temp_dir)
+        self.assertEqual(schema.SchemaCache.from_env().path, temp_dir)
+
+    def test_loader_uses_schema_cache(self):
+        self.change_environment(C7N_SCHEMA_CACHE=self.get_temp_dir())
+        policy = {'policies': [{'name': 'check', 'resource': 'aws.ec2'}]}
+        self.assertEqual(SchemaValidator().validate(policy), [])
+
+        with mock.patch('c7n.schema.generate') as gen:
+            gen.side_effect = AssertionError('schema regenerated')
+            validator = SchemaValidator()
+            self.assertEqual(validator.validate(policy), [])
+            self.assertEqual(
+                validator.validate({'policies': [{'name': 'check', 'resource': 'aws.ec2',
+                                                  'actions': ['bogus']}]})[1],
+                'check')
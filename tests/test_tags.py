@@ -3,11 +3,16 @@
 """Most tags tests within their corresponding resource tags, we use this
 module to test some universal tagging infrastructure not directly exposed.
 """
+import logging
 import time
 from mock import MagicMock, call
 
-from c7n.tags import universal_retry, coalesce_copy_user_tags
-from c7n.exceptions import PolicyExecutionError, PolicyValidationError
+from c7n.tags import (
+    universal_retry, coalesce_copy_user_tags, RemoveTag, Tag, TagDelayedAction,
+    TagScheduler)
+from c7n.exceptions import ClientError, PolicyExecutionError, PolicyValidationError
+from c7n.executor import MainThreadExecutor
+from c7n import utils
 from c7n.utils import yaml_load
 
 from .common import BaseTest
@@ -78,6 +83,105 @@ class UniversalTagTest(BaseTest):
         self.assertRaises(Exception, universal_retry, method, ["arn:abc"])
 
 
+class TagSchedulerTest(BaseTest):
+
+    def get_scheduler(self, process, batch_size=2, concurrency=2):
+        return TagScheduler(
+            MainThreadExecutor, None, process, batch_size, concurrency,
+            logging.getLogger('custodian.tags'))
+
+    def test_scheduler_groups_merged_tags(self):
+        calls = []
+        scheduler = self.get_scheduler(
+            lambda client, rs, tags: calls.append(([r['id'] for r in rs], tags)))
+        resources = [{'id': i} for i in range(4)]
+        scheduler.add(resources, [{'Key': 'Env', 'Value': 'dev'}])
+        scheduler.add(resources[:3], [{'Key': 'Owner', 'Value': 'me'}])
+        scheduler.add(resources[3:], [{'Key': 'Env', 'Value': 'prod'}])
+        scheduler.flush()
+        self.assertEqual(sorted(calls), [
+            ([0, 1], [{'Key': 'Env', 'Value': 'dev'}, {'Key': 'Owner', 'Value': 'me'}]),
+            ([2], [{'Key': 'Env', 'Value': 'dev'}, {'Key': 'Owner', 'Value': 'me'}]),
+            ([3], [{'Key': 'Env', 'Value': 'prod'}])])
+        self.assertEqual(scheduler.pending, {})
+
+    def test_scheduler_throttle_concurrency(self):
+        self.patch(time, 'sleep', MagicMock())
+        throttle = ClientError(
+            {'Error': {'Code': 'RequestLimitExceeded', 'Message': 'slow down'}},
+            'CreateTags')
+        process = MagicMock(side_effect=[throttle] + [None] * 6)
+        scheduler = self.get_scheduler(process, concurrency=4)
+        scheduler.add([{'id': 1}, {'id': 2}, {'id': 3}], ['Env'])
+        scheduler.flush()
+        self.assertEqual(process.call_count, 3)
+        self.assertEqual(scheduler.concurrency, 2)
+        for i in range(2):
+            scheduler.add([{'id': i}], ['Env'])
+            scheduler.flush()
+        self.assertEqual(scheduler.concurrency, 3)
+
+    def test_scheduler_shared_client_limiter(self):
+        client = MagicMock()
+        client.meta.service_model.service_name = 'ec2'
+        client.meta.region_name = 'us-east-1'
+        scheduler = TagScheduler(
+            MainThreadExecutor, client, MagicMock(), 2, 4,
+            logging.getLogger('custodian.tags'))
+        self.assertIs(
+            scheduler.limiter, utils.THROTTLES.get('ec2', 'us-east-1', 'tagging'))
+        self.assertEqual(scheduler.concurrency, 4)
+
+    def test_scheduler_error(self):
+        process = MagicMock(side_effect=ValueError('bad'))
+        scheduler = self.get_scheduler(process)
+        scheduler.add([{'id': 1}], {'Env': 'dev'})
+        self.assertRaises(ValueError, scheduler.flush)
+
+    def test_coalesce_tag_actions(self):
+        client = MagicMock()
+        self.patch(Tag, 'get_client', lambda self: client)
+        self.patch(TagDelayedAction, 'get_client', lambda self: client)
+        self.patch(RemoveTag, 'get_client', lambda self: client)
+        p = self.load_policy({
+            'name': 'ec2-mark',
+            'resource': 'ec2',
+            'actions': [
+                {'type': 'mark-for-op', 'op': 'stop', 'msg': 'stop@{action_date}',
+                 'days': 1},
+                {'type': 'tag', 'key': 'Owner', 'value': 'ops'},
+                {'type': 'tag', 'key': 'Env', 'value': 'dev'},
+                {'type': 'remove-tag', 'tags': ['Temp']}]})
+        resources = [{'InstanceId': 'i-%04d' % i} for i in range(1200)]
+        for a in p.resource_manager.actions:
+            a.process(resources)
+        self.assertEqual(client.create_tags.call_count, 2)
+        self.assertEqual(client.delete_tags.call_count, 2)
+        params = client.create_tags.call_args_list[0][1]
+        self.assertEqual(len(params['Resources']), 1000)
+        self.assertEqual(
+            [t['Key'] for t in params['Tags']], ['Env', 'Owner', 'maid_status'])
+
+    def test_coalesced_tags_flushed_on_error(self):
+        client = MagicMock()
+        self.patch(Tag, 'get_client', lambda self: client)
+        self.patch(TagDelayedAction, 'get_client', lambda self: client)
+        p = self.load_policy({
+            'name': 'ec2-mark-error',
+            'resource': 'ec2',
+            'actions': [
+                {'type': 'tag', 'key': 'Owner', 'value': 'ops'},
+                {'type': 'mark-for-op', 'op': 'stop', 'msg': 'stop@{bogus}',
+                 'days': 1}]})
+        resources = [{'InstanceId': 'i-%04d' % i} for i in range(3)]
+        self.patch(p.resource_manager, 'resources', lambda *args, **kw: resources)
+        self.assertRaises(KeyError, p.run)
+        self.assertEqual(client.create_tags.call_count, 1)
+        params = client.create_tags.call_args[1]
+        self.assertEqual(params['Tags'], [{'Key': 'Owner', 'Value': 'ops'}])
+        self.assertEqual(len(params['Resources']), 3)
+
+
 class CoalesceCopyUserTags(BaseTest):
     def test_copy_bool_user_tags(self):
         tags = [{'Key': 'test-key', 'Value': 'test-value'}]
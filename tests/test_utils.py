@@ -51,6 +51,70 @@ class Backoff(BaseTest):
         else:
             self.fail("should have raised")
 
+    def test_retry_limiter(self):
+        self.patch(time, "sleep", lambda x: x)
+        self.addCleanup(utils.THROTTLES.reset)
+        client = mock.MagicMock()
+        client.meta.service_model.service_name = "ec2"
+        client.meta.region_name = "us-east-1"
+        responses = [ClientError({"Error": {"Code": "Throttling"}}, "DescribeVolumes"), 42]
+
+        class Method:
+            __self__ = client
+            __name__ = "describe_volumes"
+
+            def __call__(self):
+                response = responses.pop(0)
+                if isinstance(response, Exception):
+                    raise response
+                return response
+
+        retry = utils.get_retry(("Throttling",))
+        self.assertEqual(retry(Method()), 42)
+        limiter = utils.THROTTLES.get("ec2", "us-east-1", "describe_volumes")
+        self.assertEqual(limiter.throttles, 1)
+        self.assertEqual(limiter.calls, 2)
+        self.assertEqual(
+            utils.THROTTLES.get_stats(),
+            {"ec2.us-east-1.describe_volumes": {
+                "limit": 32.03, "calls": 2, "throttles": 1}})
+
+    def test_api_stats_throttles_per_policy(self):
+        self.addCleanup(utils.THROTTLES.reset)
+        limiter = utils.THROTTLES.get("ec2", "us-east-1", "describe_volumes")
+        # throttled by an earlier policy in the process
+        limiter.release(limiter.acquire(), throttled=True)
+        p = self.load_policy({"name": "throttled", "resource": "ec2"})
+        with p.ctx:
+            self.assertNotIn("api-throttles", p.ctx.get_metadata())
+            limiter.release(limiter.acquire(), throttled=True)
+            metadata = p.ctx.get_metadata()
+        self.assertEqual(metadata["api-stats"], {})
+        self.assertEqual(
+            metadata["api-throttles"],
+            {"ec2.us-east-1.describe_volumes": {"limit": 16.0, "throttles": 1}})
+
+    def test_adaptive_limiter(self):
+        limiter = utils.AdaptiveLimiter(4)
+        # concurrent throttles from the same window only decrease once
+        epochs = [limiter.acquire() for i in range(4)]
+        limiter.release(epochs[0], throttled=True)
+        limiter.release(epochs[1], throttled=True)
+        self.assertEqual(limiter.concurrency, 2)
+        limiter.release(epochs[2])
+        limiter.release(epochs[3])
+        self.assertEqual(limiter.in_flight, 0)
+        self.assertEqual(limiter.concurrency, 2)
+        limiter.release(limiter.acquire(), throttled=True)
+        self.assertEqual(limiter.concurrency, 1)
+        limiter.release(limiter.acquire(), throttled=True)
+        self.assertEqual(limiter.concurrency, 1)
+        for i in range(8):
+            with limiter.slot():
+                pass
+        self.assertEqual(limiter.concurrency, 4)
+        self.assertEqual(limiter.get_stats()['throttles'], 4)
+
     def test_delays(self):
         self.assertEqual(
             list(utils.backoff_delays(1, 256)),
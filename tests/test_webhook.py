@@ -4,6 +4,7 @@
 import datetime
 import json
 import mock
+import urllib3
 
 from c7n.actions.webhook import Webhook
 from c7n.exceptions import PolicyValidationError
@@ -291,6 +292,59 @@ class WebhookTest(BaseTest):
             self.assertEqual(1, proxy_request_mock.call_count)
             self.assertEqual(0, pool_request_mock.call_count)
 
+    @mock.patch('c7n.actions.webhook.urllib3.PoolManager.request')
+    def test_process_concurrent(self, request_mock):
+        resources = [{"name": "test%d" % i} for i in range(20)]
+        data = {
+            "url": "http://foo.com",
+            "body": "resource.name",
+            "concurrency": 4
+        }
+
+        wh = Webhook(data=data, manager=self._get_manager())
+        with mock.patch.object(wh.log, 'info') as log_info:
+            wh.process(resources)
+
+        # each request is built from its own resource
+        self.assertEqual(
+            sorted(json.loads(c[1]['body']) for c in request_mock.call_args_list),
+            sorted(r['name'] for r in resources))
+        self.assertEqual(wh.http.connection_pool_kw['maxsize'], 4)
+        retry = request_mock.call_args[1]['retries']
+        self.assertEqual(retry.total, 3)
+        self.assertEqual(retry.status_forcelist, (429, 503))
+        self.assertEqual(retry.read, 0)
+        self.assertIn(
+            "20 requests to http://foo.com errors:0", log_info.call_args[0][0] % (
+                log_info.call_args[0][1:]))
+
+    def test_retry_idempotent(self):
+        wh = Webhook(
+            data={"url": "http://foo.com", "method": "GET"}, manager=self._get_manager())
+        retry = wh._build_retry()
+        self.assertEqual(retry.status_forcelist, (429, 500, 502, 503, 504))
+        self.assertTrue(retry.is_retry('GET', 502))
+
+        wh = Webhook(data={"url": "http://foo.com"}, manager=self._get_manager())
+        retry = wh._build_retry()
+        self.assertFalse(retry.is_retry('POST', 502))
+        self.assertTrue(retry.is_retry('POST', 429))
+
+        # older urllib3 names the allowed methods argument method_whitelist
+        with mock.patch('c7n.actions.webhook.urllib3.Retry') as retry_class:
+            retry_class.side_effect = [TypeError('allowed_methods'), mock.sentinel.retry]
+            self.assertEqual(wh._build_retry(), mock.sentinel.retry)
+        self.assertEqual(retry_class.call_args[1]['method_whitelist'], None)
+
+    @mock.patch('c7n.actions.webhook.urllib3.PoolManager.request')
+    def test_process_error(self, request_mock):
+        request_mock.side_effect = urllib3.exceptions.MaxRetryError(
+            None, "http://foo.com", "too many 503 error responses")
+        wh = Webhook(data={"url": "http://foo.com"}, manager=self._get_manager())
+        with mock.patch.object(wh.log, 'error') as log_error:
+            wh.process([{"name": "test1"}])
+        self.assertEqual(log_error.call_count, 1)
+
     def _get_manager(self):
         """The tests don't require real resource data
         or recordings, but they do need a valid manager with
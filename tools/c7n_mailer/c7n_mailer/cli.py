@@ -40,6 +40,7 @@ CONFIG_SCHEMA = {
     'properties': {
         'queue_url': {'type': 'string'},
         'endpoint_url': {'type': 'string'},
+        'visibility_timeout': {'type': 'integer', 'minimum': 30},
         'from_address': {'type': 'string'},
         'additional_email_headers': {
             'type': 'object',
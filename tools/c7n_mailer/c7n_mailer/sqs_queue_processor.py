@@ -8,8 +8,10 @@ SQS Message Processing
 import base64
 import json
 import logging
+import threading
 import traceback
 import zlib
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
 from .email_delivery import EmailDelivery
 from .sns_delivery import SnsDelivery
@@ -23,12 +25,17 @@ class MailerSqsQueueIterator:
     # Copied from custodian to avoid runtime library dependency
     msg_attributes = ['sequence_id', 'op', 'ser']
 
-    def __init__(self, aws_sqs, queue_url, logger, limit=0, timeout=10):
+    # sqs api limit on messages per receive and per batch call
+    batch_size = 10
+
+    def __init__(self, aws_sqs, queue_url, logger, limit=0, timeout=10,
+                 visibility_timeout=None):
         self.aws_sqs = aws_sqs
         self.queue_url = queue_url
         self.limit = limit
         self.logger = logger
         self.timeout = timeout
+        self.visibility_timeout = visibility_timeout
         self.messages = []
 
     # this and the next function make this object iterable with a for loop
@@ -38,13 +45,16 @@ class MailerSqsQueueIterator:
     def __next__(self):
         if self.messages:
             return self.messages.pop(0)
-        response = self.aws_sqs.receive_message(
+        params = dict(
             QueueUrl=self.queue_url,
             WaitTimeSeconds=self.timeout,
-            MaxNumberOfMessages=3,
+            MaxNumberOfMessages=self.batch_size,
             MessageAttributeNames=self.msg_attributes,
             AttributeNames=['SentTimestamp']
         )
+        if self.visibility_timeout:
+            params['VisibilityTimeout'] = self.visibility_timeout
+        response = self.aws_sqs.receive_message(**params)
 
         msgs = response.get('Messages', [])
         self.logger.debug('Messages received %d', len(msgs))
@@ -61,9 +71,101 @@ class MailerSqsQueueIterator:
             QueueUrl=self.queue_url,
             ReceiptHandle=m['ReceiptHandle'])
 
+    def ack_batch(self, messages):
+        for idx in range(0, len(messages), self.batch_size):
+            batch = messages[idx:idx + self.batch_size]
+            response = self.aws_sqs.delete_message_batch(
+                QueueUrl=self.queue_url,
+                Entries=[{'Id': str(i), 'ReceiptHandle': m['ReceiptHandle']}
+                         for i, m in enumerate(batch)])
+            for f in response.get('Failed', ()):
+                self.logger.warning(
+                    "Unable to delete message %s: %s",
+                    batch[int(f['Id'])]['MessageId'], f.get('Message', f['Code']))
+
+    def extend_visibility(self, messages, visibility_timeout):
+        for idx in range(0, len(messages), self.batch_size):
+            batch = messages[idx:idx + self.batch_size]
+            response = self.aws_sqs.change_message_visibility_batch(
+                QueueUrl=self.queue_url,
+                Entries=[{'Id': str(i), 'ReceiptHandle': m['ReceiptHandle'],
+                          'VisibilityTimeout': visibility_timeout}
+                         for i, m in enumerate(batch)])
+            for f in response.get('Failed', ()):
+                self.logger.warning(
+                    "Unable to extend visibility of message %s: %s",
+                    batch[int(f['Id'])]['MessageId'], f.get('Message', f['Code']))
+
+
+class MessageLeases:
+    """Keeps received messages invisible on the queue until they're acked.
+
+    A background thread extends the visibility timeout of held messages
+    every half timeout, so deliveries which take a while to render and
+    send aren't redelivered to another consumer.
+    """
+
+    def __init__(self, queue, visibility_timeout, logger):
+        self.queue = queue
+        self.visibility_timeout = visibility_timeout
+        self.logger = logger
+        self.messages = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def add(self, message):
+        with self.lock:
+            self.messages[message['ReceiptHandle']] = message
+
+    def remove(self, messages):
+        with self.lock:
+            for m in messages:
+                self.messages.pop(m['ReceiptHandle'], None)
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type=None, exc_value=None, exc_traceback=None):
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self):
+        while not self.stopped.wait(self.visibility_timeout / 2.0):
+            with self.lock:
+                messages = list(self.messages.values())
+            if not messages:
+                continue
+            try:
+                self.queue.extend_visibility(messages, self.visibility_timeout)
+            except Exception as e:
+                self.logger.warning("Error extending message visibility %s", e)
+
+
+class ThreadSafeSession:
+    """Serializes client construction on a boto3 session shared by threads.
+
+    Clients are thread safe once created, sessions are not.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.lock = threading.Lock()
+
+    def client(self, *args, **kw):
+        with self.lock:
+            return self.session.client(*args, **kw)
+
+    def __getattr__(self, k):
+        return getattr(self.session, k)
+
 
 class MailerSqsQueueProcessor:
 
+    default_visibility_timeout = 300
+
     def __init__(self, config, session, logger, max_num_processes=16):
         self.config = config
         self.logger = logger
@@ -71,6 +173,8 @@ class MailerSqsQueueProcessor:
         self.max_num_processes = max_num_processes
         self.receive_queue = self.config['queue_url']
         self.endpoint_url = self.config.get('endpoint_url', None)
+        self.visibility_timeout = self.config.get(
+            'visibility_timeout', self.default_visibility_timeout)
         if self.config.get('debug', False):
             self.logger.debug('debug logging is turned on from mailer config file.')
             logger.setLevel(logging.DEBUG)
@@ -92,38 +196,81 @@ class MailerSqsQueueProcessor:
         any resources with SnSTopic set with a value that is a valid sns topic.
     """
     def run(self, parallel=False):
+        """Deliver messages on the queue until it's empty.
+
+        Messages are received ten at a time and delivered by a pool of
+        max_num_processes worker threads when running in parallel, else
+        by a single worker. Messages are acked in batches once delivered,
+        messages which fail delivery are left for the queue to redeliver.
+        """
         self.logger.info("Downloading messages from the SQS queue.")
         aws_sqs = self.session.client('sqs', endpoint_url=self.endpoint_url)
-        sqs_messages = MailerSqsQueueIterator(aws_sqs, self.receive_queue, self.logger)
-
+        sqs_messages = MailerSqsQueueIterator(
+            aws_sqs, self.receive_queue, self.logger,
+            visibility_timeout=self.visibility_timeout)
         sqs_messages.msg_attributes = ['mtype', 'recipient']
-        # lambda doesn't support multiprocessing, so we don't instantiate any mp stuff
-        # unless it's being run from CLI on a normal system with SHM
-        if parallel:
-            import multiprocessing
-            process_pool = multiprocessing.Pool(processes=self.max_num_processes)
-        for sqs_message in sqs_messages:
-            self.logger.debug(
-                "Message id: %s received %s" % (
-                    sqs_message['MessageId'], sqs_message.get('MessageAttributes', '')))
-            msg_kind = sqs_message.get('MessageAttributes', {}).get('mtype')
-            if msg_kind:
-                msg_kind = msg_kind['StringValue']
-            if not msg_kind == DATA_MESSAGE:
-                warning_msg = 'Unknown sqs_message or sns format %s' % (sqs_message['Body'][:50])
-                self.logger.warning(warning_msg)
-            if parallel:
-                process_pool.apply_async(self.process_sqs_message, args=sqs_message)
-            else:
-                self.process_sqs_message(sqs_message)
-            self.logger.debug('Processed sqs_message')
-            sqs_messages.ack(sqs_message)
+
+        workers = 1
         if parallel:
-            process_pool.close()
-            process_pool.join()
+            workers = self.max_num_processes
+            if not isinstance(self.session, ThreadSafeSession):
+                self.session = ThreadSafeSession(self.session)
+        # bound received messages awaiting a worker to one receive batch.
+        max_in_flight = workers + sqs_messages.batch_size
+
+        futures = {}
+        acks = []
+        with MessageLeases(sqs_messages, self.visibility_timeout, self.logger) as leases, \
+                ThreadPoolExecutor(max_workers=workers) as executor:
+            for sqs_message in sqs_messages:
+                leases.add(sqs_message)
+                futures[executor.submit(self.process_message, sqs_message)] = sqs_message
+                if len(futures) >= max_in_flight:
+                    wait(futures, return_when=FIRST_COMPLETED)
+                done = [f for f in futures if f.done()]
+                acks.extend(self.get_delivered(futures, done, leases))
+                while len(acks) >= sqs_messages.batch_size:
+                    self.ack_messages(sqs_messages, leases, acks[:sqs_messages.batch_size])
+                    acks = acks[sqs_messages.batch_size:]
+            done, _ = wait(futures)
+            acks.extend(self.get_delivered(futures, done, leases))
+            self.ack_messages(sqs_messages, leases, acks)
         self.logger.info('No sqs_messages left on the queue, exiting c7n_mailer.')
         return
 
+    def process_message(self, sqs_message):
+        self.logger.debug(
+            "Message id: %s received %s" % (
+                sqs_message['MessageId'], sqs_message.get('MessageAttributes', '')))
+        msg_kind = sqs_message.get('MessageAttributes', {}).get('mtype')
+        if msg_kind:
+            msg_kind = msg_kind['StringValue']
+        if not msg_kind == DATA_MESSAGE:
+            warning_msg = 'Unknown sqs_message or sns format %s' % (sqs_message['Body'][:50])
+            self.logger.warning(warning_msg)
+        self.process_sqs_message(sqs_message)
+        self.logger.debug('Processed sqs_message')
+
+    def get_delivered(self, futures, done, leases):
+        delivered = []
+        for f in done:
+            sqs_message = futures.pop(f)
+            if f.exception():
+                self.logger.error(
+                    "Error processing message %s, leaving for redelivery: %s",
+                    sqs_message['MessageId'], f.exception())
+                # stop extending, so the message becomes visible again.
+                leases.remove([sqs_message])
+                continue
+            delivered.append(sqs_message)
+        return delivered
+
+    def ack_messages(self, sqs_messages, leases, messages):
+        if not messages:
+            return
+        sqs_messages.ack_batch(messages)
+        leases.remove(messages)
+
     # This function when processing sqs messages will only deliver messages over email or sns
     # If you explicitly declare which tags are aws_usernames (synonymous with ldap uids)
     # in the ldap_uid_tags section of your mailer.yml, we'll do a lookup of those emails
@@ -0,0 +1,90 @@
+# Copyright The Cloud Custodian Authors.
+# SPDX-License-Identifier: Apache-2.0
+import logging
+import threading
+import unittest
+
+from mock import MagicMock
+
+from c7n_mailer.sqs_queue_processor import (
+    DATA_MESSAGE, MailerSqsQueueIterator, MailerSqsQueueProcessor, MessageLeases,
+    ThreadSafeSession)
+from common import MAILER_CONFIG
+
+
+class StubSqs:
+
+    def __init__(self, count):
+        self.messages = [
+            {'MessageId': str(i), 'ReceiptHandle': 'r%d' % i, 'Body': str(i),
+             'MessageAttributes': {'mtype': {'StringValue': DATA_MESSAGE}}}
+            for i in range(count)]
+        self.receives = []
+        self.deleted = []
+        self.delete_calls = 0
+        self.extended = []
+        self.lock = threading.Lock()
+
+    def receive_message(self, **kw):
+        self.receives.append(kw)
+        with self.lock:
+            received = self.messages[:kw['MaxNumberOfMessages']]
+            self.messages = self.messages[kw['MaxNumberOfMessages']:]
+        return {'Messages': received}
+
+    def delete_message_batch(self, QueueUrl, Entries):
+        self.delete_calls += 1
+        self.deleted.extend(e['ReceiptHandle'] for e in Entries)
+        return {'Successful': [{'Id': e['Id']} for e in Entries]}
+
+    def change_message_visibility_batch(self, QueueUrl, Entries):
+        self.extended.extend(
+            (e['ReceiptHandle'], e['VisibilityTimeout']) for e in Entries)
+        return {'Successful': [{'Id': e['Id']} for e in Entries]}
+
+
+class SqsQueueProcessorTest(unittest.TestCase):
+
+    def get_processor(self, sqs, process):
+        session = MagicMock()
+        session.client.return_value = sqs
+        processor = MailerSqsQueueProcessor(
+            MAILER_CONFIG, session, logging.getLogger('c7n_mailer'), max_num_processes=4)
+        processor.process_sqs_message = process
+        return processor
+
+    def test_run_batches_receive_and_ack(self):
+        sqs = StubSqs(25)
+        processed = []
+        self.get_processor(sqs, lambda m: processed.append(m['MessageId'])).run()
+        self.assertEqual(len(processed), 25)
+        self.assertEqual(sqs.receives[0]['MaxNumberOfMessages'], 10)
+        self.assertEqual(sqs.receives[0]['VisibilityTimeout'], 300)
+        self.assertEqual(sorted(sqs.deleted), sorted('r%d' % i for i in range(25)))
+        self.assertEqual(sqs.delete_calls, 3)
+
+    def test_run_parallel_leaves_failed(self):
+        sqs = StubSqs(30)
+
+        def process(m):
+            if m['MessageId'] == '7':
+                raise ValueError('bad template')
+
+        processor = self.get_processor(sqs, process)
+        processor.run(parallel=True)
+        self.assertIsInstance(processor.session, ThreadSafeSession)
+        self.assertEqual(len(sqs.deleted), 29)
+        self.assertNotIn('r7', sqs.deleted)
+
+    def test_leases_extend_visibility(self):
+        sqs = StubSqs(2)
+        queue = MailerSqsQueueIterator(sqs, 'queue', logging.getLogger('c7n_mailer'))
+        messages = list(queue)
+        leases = MessageLeases(queue, 0.02, logging.getLogger('c7n_mailer'))
+        with leases:
+            for m in messages:
+                leases.add(m)
+            leases.remove(messages[1:])
+            while not sqs.extended:
+                leases.stopped.wait(0.01)
+        self.assertEqual(set(sqs.extended), {('r0', 0.02)})
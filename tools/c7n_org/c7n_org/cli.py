@@ -523,7 +523,10 @@ def run_account(account, region, policies_config, output_path,
     if '{' not in output_path:
         output_path = os.path.join(output_path, account['name'], region)
 
-    cache_path = os.path.join(cache_path, "%s-%s.cache" % (account['account_id'], region))
+    # a single cache database is shared by all workers, the cache scopes
+    # entries to the configured account and region, and concurrent fills
+    # of a key are serialized.
+    cache_path = os.path.join(cache_path, "cloud-custodian.cache")
 
     config = Config.empty(
         region=region, cache=cache_path,
@@ -0,0 +1,120 @@
+# Copyright The Cloud Custodian Authors.
+# SPDX-License-Identifier: Apache-2.0
+"""Benchmark c7n-mailer sqs queue consumption against a local sqs stub.
+
+The stub serves a backlog of messages with a fixed latency per sqs api
+call, and message delivery is simulated with a fixed render/send time,
+so results reflect the consumer's receive, ack and concurrency overhead.
+The legacy mode approximates the previous consumer, receiving three
+messages per poll and deleting each message individually.
+
+  python tools/dev/benchmailer.py --messages 500 --workers 16
+"""
+import logging
+import threading
+import time
+
+import click
+
+from c7n_mailer.sqs_queue_processor import (
+    DATA_MESSAGE, MailerSqsQueueIterator, MailerSqsQueueProcessor)
+
+
+class StubSqs:
+
+    def __init__(self, count, latency):
+        self.latency = latency
+        self.messages = [
+            {'MessageId': str(i), 'ReceiptHandle': 'r%d' % i, 'Body': '',
+             'MessageAttributes': {'mtype': {'StringValue': DATA_MESSAGE}}}
+            for i in range(count)]
+        self.deleted = set()
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def call(self):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.latency)
+
+    def receive_message(self, MaxNumberOfMessages, **kw):
+        self.call()
+        with self.lock:
+            received = self.messages[:MaxNumberOfMessages]
+            del self.messages[:MaxNumberOfMessages]
+        return {'Messages': received}
+
+    def delete_message(self, QueueUrl, ReceiptHandle):
+        self.call()
+        self.deleted.add(ReceiptHandle)
+
+    def delete_message_batch(self, QueueUrl, Entries):
+        self.call()
+        self.deleted.update(e['ReceiptHandle'] for e in Entries)
+        return {'Successful': [{'Id': e['Id']} for e in Entries]}
+
+    def change_message_visibility_batch(self, QueueUrl, Entries):
+        self.call()
+        return {'Successful': [{'Id': e['Id']} for e in Entries]}
+
+
+class StubSession:
+
+    def __init__(self, sqs):
+        self.sqs = sqs
+
+    def client(self, service, **kw):
+        return self.sqs
+
+
+class LegacyQueueIterator(MailerSqsQueueIterator):
+
+    batch_size = 3
+
+    def ack_batch(self, messages):
+        for m in messages:
+            self.ack(m)
+
+
+def bench(messages, workers, api_latency, delivery_latency, legacy):
+    sqs = StubSqs(messages, api_latency)
+    processor = MailerSqsQueueProcessor(
+        {'queue_url': 'https://sqs.us-east-1.amazonaws.com/123456789012/mailer'},
+        StubSession(sqs), logging.getLogger('custodian-mailer'), max_num_processes=workers)
+    processor.process_sqs_message = lambda m: time.sleep(delivery_latency)
+
+    import c7n_mailer.sqs_queue_processor as consumer
+    iterator = consumer.MailerSqsQueueIterator
+    if legacy:
+        consumer.MailerSqsQueueIterator = LegacyQueueIterator
+    try:
+        t = time.time()
+        processor.run(parallel=workers > 1)
+        elapsed = time.time() - t
+    finally:
+        consumer.MailerSqsQueueIterator = iterator
+    assert len(sqs.deleted) == messages
+    return elapsed, sqs.calls
+
+
+@click.command()
+@click.option('--messages', default=200, help='number of queued messages')
+@click.option('--workers', default=8, help='delivery workers for the parallel run')
+@click.option('--api-latency', default=0.02, help='seconds per sqs api call')
+@click.option('--delivery-latency', default=0.05, help='seconds to deliver a message')
+def main(messages, workers, api_latency, delivery_latency):
+    logging.basicConfig(level=logging.WARNING)
+    runs = (
+        ('legacy', 1, True),
+        ('serial', 1, False),
+        ('parallel', workers, False))
+    click.echo("mailer consumer %d messages api:%0.3fs delivery:%0.3fs" % (
+        messages, api_latency, delivery_latency))
+    for name, run_workers, legacy in runs:
+        elapsed, calls = bench(messages, run_workers, api_latency, delivery_latency, legacy)
+        click.echo("  %-9s workers:%-3d %7.2fs %8.1f msg/s sqs calls:%d" % (
+            name, run_workers, elapsed, messages / elapsed, calls))
+
+
+if __name__ == '__main__':
+    main()
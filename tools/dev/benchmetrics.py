@@ -0,0 +1,110 @@
+# Copyright The Cloud Custodian Authors.
+# SPDX-License-Identifier: Apache-2.0
+"""Benchmark the metrics filter against a stubbed cloudwatch api.
+
+Compares per resource GetMetricStatistics calls with batched GetMetricData
+calls, using a fixed simulated latency per api call so no aws credentials
+or network access are needed.
+
+  python tools/dev/benchmetrics.py --resources 2000 --latency 0.02
+"""
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+import click
+
+from c7n.config import Config
+from c7n.policy import Policy
+from c7n.resources import load_resources
+from c7n.utils import reset_session_cache
+
+
+class StubCloudWatch:
+
+    def __init__(self, stats, latency):
+        self.stats = stats
+        self.latency = latency
+
+    def record(self, op):
+        with self.stats['lock']:
+            self.stats['calls'][op] += 1
+        time.sleep(self.latency)
+
+    def get_metric_statistics(self, **params):
+        self.record('GetMetricStatistics')
+        return {'Datapoints': [
+            {'Timestamp': params['StartTime'], params['Statistics'][0]: 1.0}]}
+
+    def get_paginator(self, op):
+        return StubPaginator(self)
+
+
+class StubPaginator:
+
+    PAGE_ITERATOR_CLS = None
+
+    def __init__(self, client):
+        self.client = client
+
+    def paginate(self, MetricDataQueries, StartTime, **params):
+        self.client.record('GetMetricData')
+        yield {'MetricDataResults': [
+            {'Id': q['Id'], 'Timestamps': [StartTime], 'Values': [1.0]}
+            for q in MetricDataQueries]}
+
+
+class StubSession:
+
+    region_name = 'us-east-1'
+
+    def __init__(self, stats, latency):
+        self.stats = stats
+        self.latency = latency
+
+    def __call__(self):
+        return self
+
+    def client(self, service_name, *args, **kw):
+        return StubCloudWatch(self.stats, self.latency)
+
+
+def run(count, latency, batch):
+    stats = {'lock': threading.Lock(), 'calls': Counter()}
+    reset_session_cache()
+    policy = Policy({
+        'name': 'bench-metrics',
+        'resource': 'aws.ec2',
+        'filters': [{
+            'type': 'metrics',
+            'name': 'CPUUtilization',
+            'days': 4,
+            'value': 30,
+            'op': 'less-than',
+            'batch': batch}]},
+        Config.empty(region='us-east-1', account_id='123456789012'),
+        session_factory=StubSession(stats, latency))
+    resources = [{'InstanceId': 'i-%017x' % i} for i in range(count)]
+    f = policy.resource_manager.filters[0]
+    start = time.time()
+    matched = f.process(resources)
+    return time.time() - start, len(matched), stats['calls']
+
+
+@click.command()
+@click.option('--resources', 'count', default=1000, help='number of resources')
+@click.option('--latency', default=0.01, help='simulated seconds per api call')
+def main(count, latency):
+    load_resources(('aws.ec2',))
+    click.echo("%s resources, %0.3fs simulated latency (%s)" % (
+        count, latency, datetime.utcnow().isoformat()))
+    for batch in (False, True):
+        elapsed, matched, calls = run(count, latency, batch)
+        click.echo("  %-22s %6.2fs matched:%d calls:%s" % (
+            batch and 'GetMetricData' or 'GetMetricStatistics',
+            elapsed, matched, dict(calls)))
+
+
+if __name__ == '__main__':
+    main()
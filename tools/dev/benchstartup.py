@@ -0,0 +1,98 @@
+# Copyright The Cloud Custodian Authors.
+# SPDX-License-Identifier: Apache-2.0
+"""Benchmark cli startup import cost per custodian command.
+
+Each command's startup path (cli import, policy loading, resource
+loading and schema validation, without any api calls) is run in a fresh
+interpreter under ``python -X importtime``, reporting wall time, total
+import time, module count and the most expensive imports.
+
+  python tools/dev/benchstartup.py --resource aws.ec2 --top 5
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import click
+import yaml
+
+
+COMMANDS = {
+    'version': "import c7n.cli",
+    'schema': (
+        "import c7n.cli\n"
+        "from c7n.resources import load_resources\n"
+        "from c7n.provider import get_resource_class\n"
+        "load_resources(({resource!r},))\n"
+        "get_resource_class({resource!r})"),
+    'validate': (
+        "import c7n.cli\n"
+        "from c7n.config import Config\n"
+        "from c7n.loader import PolicyLoader\n"
+        "PolicyLoader(Config.empty()).load_file({path!r})"),
+    'run': (
+        "import c7n.cli\n"
+        "from c7n.config import Config\n"
+        "from c7n.loader import PolicyLoader\n"
+        "from c7n.utils import load_file\n"
+        "collection = PolicyLoader(Config.empty(region='us-east-1')).load_data(\n"
+        "    load_file({path!r}), {path!r}, validate=False)\n"
+        "[p.resource_manager for p in collection]"),
+}
+
+
+def parse_importtime(output):
+    """Return (self us, cumulative us) per top level module from -X importtime output."""
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us), name.rstrip())
+    return modules
+
+
+def run(command, path, resource):
+    code = COMMANDS[command].format(path=path, resource=resource)
+    env = dict(os.environ, C7N_SCHEMA_CACHE='')
+    start = time.time()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        stderr=subprocess.PIPE, env=env, universal_newlines=True)
+    elapsed = time.time() - start
+    if result.returncode != 0:
+        raise click.ClickException(result.stderr[-2000:])
+    return elapsed, parse_importtime(result.stderr)
+
+
+@click.command()
+@click.option('--resource', default='aws.ec2', help='resource type for the sample policy')
+@click.option('-c', '--command', 'commands', multiple=True, type=click.Choice(list(COMMANDS)),
+              help='commands to measure (default all)')
+@click.option('--top', default=5, help='number of slowest imports to list per command')
+def main(resource, commands, top):
+    with tempfile.NamedTemporaryFile('w', suffix='.yml', delete=False) as fh:
+        yaml.safe_dump({'policies': [{'name': 'bench-startup', 'resource': resource}]}, fh)
+    try:
+        click.echo("startup import time for %s (%s)" % (
+            resource, datetime.utcnow().isoformat()))
+        for command in (commands or COMMANDS):
+            elapsed, modules = run(command, fh.name, resource)
+            roots = [m for m in modules.values() if not m[2].startswith('  ')]
+            total = sum(m[1] for m in roots)
+            c7n_count = len([n for n in modules if n.startswith(('c7n.', 'c7n_'))])
+            click.echo("  %-9s wall:%6.3fs imports:%6.3fs modules:%d c7n:%d" % (
+                command, elapsed, total / 1e6, len(modules), c7n_count))
+            for self_us, cumulative_us, name in sorted(
+                    modules.values(), key=lambda m: m[0], reverse=True)[:top]:
+                click.echo("      %8.3fs self %8.3fs cumulative %s" % (
+                    self_us / 1e6, cumulative_us / 1e6, name.strip()))
+    finally:
+        os.unlink(fh.name)
+
+
+if __name__ == '__main__':
+    main()